@@ -0,0 +1,45 @@
+# Este archivo contiene el comando de administración del caché en disco (nucleo/cache_disco.py).
+# No importa Streamlit: se puede correr con la app encendida, por ejemplo para liberar espacio.
+
+# Función: main
+# - listar: entradas y tamaño por función, total y límite.
+# - limpiar: borra todas las entradas o solo las de una función.
+# - podar: desaloja las entradas menos usadas hasta caber en el límite.
+
+# Uso:
+#   python admin_cache.py listar
+#   python admin_cache.py limpiar [--funcion nucleo.historial.historial_entre_cargas]
+#   python admin_cache.py podar [--limite-mb 512]
+
+import argparse
+
+from nucleo.cache_disco import DIRECTORIO_CACHE, LIMITE_CACHE_MB, entradas, limpiar, podar, version_codigo
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Administra el caché en disco de PyTrack.")
+    parser.add_argument('--directorio', default=DIRECTORIO_CACHE, help="Carpeta del caché (por defecto PYTRACK_CACHE).")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('listar', help="Muestra las entradas y el tamaño por función.")
+    limpiar_cmd = comandos.add_parser('limpiar', help="Borra todas las entradas o solo las de una función.")
+    limpiar_cmd.add_argument('--funcion', default=None, help="Nombre completo de la función (columna 'funcion' de listar).")
+    podar_cmd = comandos.add_parser('podar', help="Desaloja las entradas menos usadas hasta caber en el límite.")
+    podar_cmd.add_argument('--limite-mb', type=float, default=None, help="Tamaño máximo en MB (por defecto PYTRACK_CACHE_MB).")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'listar':
+        tabla = entradas(args.directorio)
+        if tabla.empty:
+            print(f"El caché en {args.directorio} está vacío.")
+            return
+        resumen = tabla.groupby('funcion').agg(entradas=('clave', 'size'), mb=('bytes', 'sum'), ultimo_uso=('ultimo_uso', 'max'))
+        resumen['mb'] = (resumen['mb'] / 1024 ** 2).round(2)
+        print(resumen.sort_values('ultimo_uso', ascending=False).to_string())
+        print(f"Total: {len(tabla):,} entradas, {tabla['bytes'].sum() / 1024 ** 2:,.2f} MB de {LIMITE_CACHE_MB:,.0f} MB "
+              f"(código {version_codigo()})")
+    elif args.comando == 'limpiar':
+        print(f"Entradas borradas: {limpiar(args.directorio, args.funcion):,}")
+    else:
+        print(f"Entradas desalojadas: {podar(args.directorio, args.limite_mb):,}")
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,18 @@
 
 # - Configura el layout y el título de la app.
 # - Carga los datos y los prepara para el análisis.
+# - Si existen artefactos precalculados por el modo batch (python artefactos.py), arranca desde ellos.
+#   Las órdenes y el historial se abren con memoria mapeada: varios procesos del servidor comparten una sola copia física.
+# - Las etapas costosas del inicio corren en segundo plano (precalculo.py): la página se dibuja de inmediato y las
+#   secciones que esperan un resultado muestran un aviso hasta que está listo.
 # - Permite buscar, filtrar y explorar los datos de manera interactiva.
-# - Muestra indicadores generales, gráficos de CPK, completitud, histogramas y comparativos entre tractos.
+# - Cada sección con widgets es un fragmento (st.fragment): cambiar un widget solo vuelve a correr su sección;
+#   aplicar un filtro vuelve a correr la app completa porque cambia los datos de todas las secciones.
+# - Muestra indicadores generales, gráficos de CPK, completitud, histogramas, ranking de rutas y comparativos entre tractos
+#   (con las cargas atípicas de cada tracto).
+# - Exporta a CSV, Parquet o Excel las órdenes seleccionadas, el historial de cargas de los tractos elegidos y la tabla de CPK
+#   (exportar_utils.py): el archivo se escribe por bloques en segundo plano mientras la app sigue respondiendo.
+# - El CPK desglosado y la completitud se pueden ver por día, semana, mes o trimestre.
 # - Integra todas las funciones utilitarias y de visualización para ofrecer una experiencia de análisis completa y flexible.
 # - Usar versión de Streamlit 1.37.1 IMPORTANTE PARA QUE FUNCIONE 
 # - Instalar pip install streamlit-aggrid 
@@ -15,17 +25,21 @@ import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
 import math
-from utils import show_info_columns, df_completitud, plot_completitud_y_mediana
-from turtle import width
+from utils import show_info_columns, plot_completitud_y_mediana
 import plotly.graph_objects as go
 import colorsys
 from tracto_utils import seccion_graficos_tracto, plot_acumulado_vs_kms, plot_costos_vs_kms_bars, monocromatic_color
-from historial_cargas import historial_entre_cargas
 import numpy as np  
-from calculos_cpk import agrupar_componentes_cpk, plot_cpk_barras_comparativo, cpk_desglosado
+from calculos_cpk import plot_cpk_barras_comparativo, cpk_desglosado
 from df_filter_utils import search_and_filter_interface, groupby_interface
 from graph_hist_utils import streamlit_viz_selector, get_viz_figure
-from comparar_comp_utils import construir_df_cpk_periodo, comparar_componentes_cpk
+from comparar_comp_utils import comparar_componentes_cpk
+from ranking_utils import seccion_ranking_tractos
+from rutas_utils import seccion_ranking_rutas
+from exportar_utils import boton_exportar
+from nucleo import GRANULARIDADES, df_completitud, columnas_compartidas
+from precalculo import iniciar_precalculo, listo, resultado, pendientes, esperar_precalculo
+from perfilado import iniciar_rerun, finalizar_rerun, medir, mostrar_panel_tiempos, activado_por_entorno, fragmento
 
 
 
@@ -43,35 +57,158 @@ def horas_a_dhm(horas):
     return ", ".join(partes)
 
 
-if __name__ == "__main__":
+# Secciones con widgets propios: cada una es un fragmento, así un widget solo vuelve a correr su sección.
+# Los datos se leen de st.session_state ('df', 'seleccion', 'historial_cargas', ...) y no de argumentos: en Streamlit 1.37
+# un fragmento que corre solo reutiliza los argumentos de la primera vez que se dibujó.
 
-    st.set_page_config(page_title="Proyecto - PyTrack Analytics", layout="wide")
+@fragmento("Búsqueda y filtrado")
+def seccion_busqueda(columnas_contables, columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num):
+    etapas = st.session_state.precalculo
+    previo = st.session_state.get('filtro')
+    st.session_state.seleccion = search_and_filter_interface(
+        st.session_state.df,
+        columnas_contables=columnas_contables,
+        columnas_forzar_fecha=columnas_forzar_fecha,
+        columnas_forzar_str=columnas_forzar_str,
+        columnas_forzar_num=columnas_forzar_num,
+        include_numeric=False,
+        tabla_sql=st.session_state.tabla_sql,
+        catalogo=resultado(etapas, 'catalogo') if listo(etapas, 'catalogo') else None
+    )
+    # Un filtro nuevo cambia los datos de todas las secciones: solo en ese caso se vuelve a correr la app completa
+    if previo is not None and st.session_state.filtro is not previo:
+        st.rerun()
+
+def selector_granularidad(key):
+    return st.radio("Agrupar por", options=list(GRANULARIDADES), index=list(GRANULARIDADES).index('mes'),
+                    format_func=GRANULARIDADES.get, horizontal=True, key=key)
+
+@fragmento("CPK desglosado")
+def seccion_cpk():
+    etapas = st.session_state.precalculo
+    df_filtered = st.session_state.seleccion
+    granularidad = selector_granularidad("granularidad_cpk")
+    # Sin filtros activos se reutilizan las sumas diarias de la base completa (precálculo o artefactos del modo batch)
+    sin_filtros = len(df_filtered) == len(st.session_state.df)
+    cpk_desglosado(df_filtered, historial_cargas=st.session_state.historial_cargas,
+                   ordenes_segmento=st.session_state.ordenes_segmento, granularidad=granularidad,
+                   diario=resultado(etapas, 'cpk_diario') if sin_filtros and listo(etapas, 'cpk_diario') else None)
+
+@fragmento("Completitud")
+def seccion_completitud():
+    etapas = st.session_state.precalculo
+    df_filtered = st.session_state.seleccion
+    granularidad = selector_granularidad("granularidad_completitud")
+    sin_filtros = len(df_filtered) == len(st.session_state.df)
+    completitud_groupby = df_completitud(
+        df_filtered, granularidad=granularidad,
+        diario=resultado(etapas, 'completitud_diaria') if sin_filtros and listo(etapas, 'completitud_diaria') else None
+    )
 
-    if 'df' not in st.session_state:
-        df = pd.read_excel('Base_viz.xlsx', index_col=0)
+    fig_completitud = plot_completitud_y_mediana(
+            completitud_groupby,
+            columnas_estadistica=[]
+        )
 
-        df['Duración Viaje'] = df['Cierre de la Orden'] - df['Inicio de la Orden']
+    st.plotly_chart(fig_completitud, use_container_width=True)
+
+@fragmento("Gráfico de exploración")
+def seccion_exploracion(idx, key):
+    df_filtered = st.session_state.seleccion
+    seleccionada, tipo_grafico = streamlit_viz_selector(df_filtered, idx=idx, key=key)
+    st.markdown(f"#### Gráfico de {tipo_grafico} para **{seleccionada}**")
+    fig = get_viz_figure(df_filtered, seleccionada, tipo_grafico, width=700, height=700)
+
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
+
+@fragmento("Ranking de la flota")
+def seccion_ranking():
+    seccion_ranking_tractos(st.session_state.historial_cargas_grouped, paneles=("1tracto", "2tracto"))
+
+@fragmento("Ranking de rutas")
+def seccion_rutas():
+    etapas = st.session_state.precalculo
+    df_filtered = st.session_state.seleccion
+    # Sin filtros activos se usan los cubos de la base completa (precálculo)
+    sin_filtros = len(df_filtered) == len(st.session_state.df)
+    seccion_ranking_rutas(df_filtered, cubos=resultado(etapas, 'rutas') if sin_filtros and listo(etapas, 'rutas') else None)
+
+@fragmento("Acumulados de varios tractos")
+def seccion_acumulados():
+    st.markdown("**Acumulados de varios tractos**")
+    tractos_disponibles = list(st.session_state.acumulados_tracto['offsets'].keys())
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        tractos_comparar = st.multiselect(
+            "Selecciona los tractos a comparar (hasta 50)",
+            options=tractos_disponibles,
+            default=tractos_disponibles[:2],
+            max_selections=50,
+            key="tractos_comparar"
+        )
+    with col2:
+        variables_comparar = st.multiselect(
+            "Variables acumuladas",
+            options=["kmstotales", "Costo Combustible", "Costo Peajes", "Costo Mantenimiento"],
+            default=["kmstotales", "Costo Combustible"],
+            key="variables_comparar"
+        )
 
-        if 'Duración Viaje (hrs)' not in df.columns and pd.api.types.is_timedelta64_dtype(df['Duración Viaje']):
-            df['Duración Viaje (hrs)'] = (df['Duración Viaje'].dt.total_seconds() / 3600).round(2)
+    if tractos_comparar and variables_comparar:
+        fig_comparar = plot_acumulado_vs_kms(
+            None,
+            tractos_comparar,
+            title="Acumulados de Costos y Kms por Tracto",
+            height=800,
+            acumulados=st.session_state.acumulados_tracto,
+            variables=variables_comparar
+        )
+        st.plotly_chart(fig_comparar, use_container_width=True)
+    else:
+        st.info("Selecciona al menos un tracto y una variable para ver la comparación.")
+
+@fragmento("Panel tracto")
+def seccion_panel_tracto(key):
+    seccion_graficos_tracto(st.session_state.df, historial_cargas=st.session_state.historial_cargas, key=key,
+                            offsets=st.session_state.offsets_tracto, offsets_historial=st.session_state.offsets_historial,
+                            anomalias=st.session_state.get('anomalias'), offsets_anomalias=st.session_state.get('offsets_anomalias'),
+                            intervalos=st.session_state.get('intervalos_tracto'))
+
+@fragmento("Exportar datos")
+def seccion_exportar():
+    st.markdown("**Órdenes seleccionadas**")
+    boton_exportar(lambda: st.session_state.seleccion, "ordenes_seleccionadas", key="seleccion")
+
+    st.markdown("**Historial de cargas**")
+    if 'offsets_historial' not in st.session_state:
+        st.info("Calculando el historial entre cargas; la exportación aparecerá en cuanto termine.")
+        return
+    offsets = st.session_state.offsets_historial
+    tractos = st.multiselect(
+        "Tractos a exportar",
+        options=list(offsets),
+        default=[t for t in pd.unique(st.session_state.seleccion['Tracto']) if t in offsets],
+        key="tractos_exportar"
+    )
 
-        df = df[['EC', 'Proyecto', 'Cliente', 'Tracto', 'Inicio de la Orden', 'Cierre de la Orden', 'Duración Viaje (hrs)', 'Edo. Origen', 'Edo. Destino', 'Cdad. Origen', 'Cdad. Destino', 'Ruta Estados', 'Ruta Ciudades',
-                'Conductor', 'kmstotales', 'No. Remolques','Litros','Costo por litro', 'Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento','Costo Total','CPK Orden', 'Periodo', 'Conteo',
-                'lat_origen', 'lon_origen', 'lat_destino', 'lon_destino','Orden con Costo de Combustible','Orden con Costo de Peajes', 'Orden con Costo de Mantenimiento']].rename({'Conteo':'No. Viajes'}, axis = 1).copy()
+    def historial_tractos():
+        historial = st.session_state.historial_cargas
+        # Con todos los tractos se exporta el historial tal cual, sin copiarlo
+        if len(tractos) == len(offsets):
+            return historial
+        return pd.concat([historial.iloc[slice(*offsets[t])] for t in tractos]) if tractos else historial.iloc[:0]
 
-        df.index.name = 'No. Orden'
+    boton_exportar(historial_tractos, "historial_cargas", key="historial")
 
-        df.drop(['lat_origen', 'lon_origen', 'lat_destino', 'lon_destino'], axis=1, inplace=True, errors='ignore')
 
-        df.reset_index(inplace=True)
-        
-        st.session_state.df = df.copy()
+if __name__ == "__main__":
 
-    if 'historial_cargas' and 'historial_cargas_grouped' not in st.session_state:
-        historial_cargas, historial_cargas_grouped = historial_entre_cargas(st.session_state.df)
-        st.session_state.historial_cargas = historial_cargas
-        st.session_state.historial_cargas_grouped = historial_cargas_grouped
+    st.set_page_config(page_title="Proyecto - PyTrack Analytics", layout="wide")
 
+    # Perfilado opcional: tiempos por sección en la barra lateral y en perfilado.jsonl
+    depuracion = st.sidebar.toggle("Depuración: tiempos por sección", value=activado_por_entorno(), key="depuracion_tiempos")
+    iniciar_rerun(activo=depuracion)
 
     # Ejemplo de columnas contables y forzadas
     columnas_contables = [
@@ -81,6 +218,68 @@ if __name__ == "__main__":
     columnas_forzar_str = ["Proyecto", "Cliente", "Tracto","No. Orden"]
     columnas_forzar_num = ["kmstotales", "No. Remolques", "Duración Viaje (hrs)"]
 
+    # La carga, el historial entre cargas, los acumulados, el catálogo de columnas y los agregados de la base completa
+    # corren en segundo plano (o se leen de los artefactos del modo batch); la página se dibuja mientras tanto
+    if 'precalculo' not in st.session_state:
+        st.session_state.precalculo = iniciar_precalculo(columnas_forzar={
+            'columnas_forzar_fecha': columnas_forzar_fecha,
+            'columnas_forzar_str': columnas_forzar_str,
+            'columnas_forzar_num': columnas_forzar_num,
+        })
+    etapas = st.session_state.precalculo
+    pendientes_al_inicio = pendientes(etapas)
+
+    if 'df' not in st.session_state and listo(etapas, 'ordenes'):
+        ordenes = resultado(etapas, 'ordenes')
+        st.session_state.tabla_sql = ordenes['tabla_sql']
+        st.session_state.df = ordenes['df']
+        st.session_state.offsets_tracto = ordenes['offsets_tracto']
+
+    if 'historial_cargas_grouped' not in st.session_state and listo(etapas, 'historial'):
+        historial = resultado(etapas, 'historial')
+        st.session_state.historial_cargas = historial['historial_cargas']
+        st.session_state.offsets_historial = historial['offsets_historial']
+        st.session_state.historial_cargas_grouped = historial['historial_cargas_grouped']
+        st.session_state.ordenes_segmento = historial['ordenes_segmento']
+
+    if 'acumulados_tracto' not in st.session_state and listo(etapas, 'acumulados_tracto'):
+        st.session_state.acumulados_tracto = resultado(etapas, 'acumulados_tracto')
+
+    if 'intervalos_tracto' not in st.session_state and listo(etapas, 'intervalos'):
+        st.session_state.intervalos_tracto = resultado(etapas, 'intervalos')
+
+    if 'anomalias' not in st.session_state and listo(etapas, 'anomalias'):
+        anomalias = resultado(etapas, 'anomalias')
+        st.session_state.anomalias = anomalias['anomalias']
+        st.session_state.offsets_anomalias = anomalias['offsets_anomalias']
+
+    # Versión de la base cargada (huella de su contenido, ver nucleo/huellas.py)
+    if 'metadatos_datos' not in st.session_state and listo(etapas, 'metadatos'):
+        st.session_state.metadatos_datos = resultado(etapas, 'metadatos')
+
+    hay_historial = 'historial_cargas_grouped' in st.session_state
+
+    if depuracion and etapas['tiempos']:
+        st.sidebar.markdown("**Precálculo en segundo plano: listo a los (s)**")
+        st.sidebar.dataframe(pd.Series(etapas['tiempos'], name='Segundos').round(3), use_container_width=True)
+    if depuracion and 'metadatos_datos' in st.session_state:
+        metadatos = st.session_state.metadatos_datos
+        st.sidebar.caption(
+            f"Versión de datos: {metadatos['version']} ({metadatos['filas']:,} órdenes, "
+            f"{len(metadatos['columnas'])} columnas, {len(metadatos['grupos'])} tractos)"
+        )
+    if depuracion and 'df' in st.session_state:
+        # Columnas que apuntan a los artefactos Arrow con memoria mapeada (compartidas entre procesos del servidor)
+        st.sidebar.caption(
+            f"Memoria mapeada: {len(columnas_compartidas(st.session_state.df))} de {st.session_state.df.shape[1]} columnas de órdenes"
+        )
+        # Sin filtro, el filtro y la selección son las mismas órdenes: deben seguir apuntando a la memoria mapeada
+        if 'seleccion' in st.session_state:
+            st.sidebar.caption(
+                f"Memoria mapeada: {len(columnas_compartidas(st.session_state.filtro))} columnas en el filtro y "
+                f"{len(columnas_compartidas(st.session_state.seleccion))} en la selección"
+            )
+
     # Título de la aplicación
     st.title("Bienvenido, TDR")
     st.markdown(""" """)
@@ -111,14 +310,24 @@ if __name__ == "__main__":
             """
         )
 
-    df_filtered = search_and_filter_interface(
-        st.session_state.df,
-        columnas_contables=columnas_contables,
-        columnas_forzar_fecha=columnas_forzar_fecha,
-        columnas_forzar_str=columnas_forzar_str,
-        columnas_forzar_num=columnas_forzar_num,
-        include_numeric=False
-    )
+    # Todo lo que sigue usa las órdenes; mientras se cargan solo se muestra el encabezado
+    if 'df' not in st.session_state:
+        st.info("Cargando las órdenes en segundo plano...")
+        esperar_precalculo(etapas, pendientes_al_inicio)
+        finalizar_rerun()
+        mostrar_panel_tiempos()
+        st.stop()
+
+    seccion_busqueda(columnas_contables, columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num)
+    df_filtered = st.session_state.seleccion
+
+    with st.expander("Exportar datos", expanded=False):
+        st.info(
+            "Descarga las órdenes seleccionadas o el historial de cargas de los tractos que elijas en CSV, Parquet o Excel. "
+            "El archivo se prepara en segundo plano; puedes seguir usando la app mientras tanto. "
+            "Excel admite hasta 1,048,575 filas: para selecciones más grandes usa CSV o Parquet."
+        )
+        seccion_exportar()
 
     st.subheader("Resumen de las órdenes seleccionadas")
 
@@ -127,7 +336,8 @@ if __name__ == "__main__":
         "Puedes explorar los datos de manera interactiva y obtener información valiosa sobre las órdenes de transporte.")
 
     # Mostrar indicadores generales
-    show_info_columns(df_filtered)
+    with medir("Indicadores generales", filas=len(df_filtered)):
+        show_info_columns(df_filtered)
 
     st.subheader("Análisis Desglosado de CPK por Componente")
     with st.expander("Información de la sección", expanded=False):
@@ -140,14 +350,17 @@ if __name__ == "__main__":
             3. **Solo órdenes con el componente:** Para cada componente, solo se consideran las órdenes que presentan ese componente (por ejemplo, solo las órdenes con costo de peajes para el CPK de peajes).
             4. **Entre Cargas:** Se calcula el CPK considerando los costos y kms recorridos entre carga y carga.
 
-            **Nota:** Los cálculos de CPK "entre carga y carga" **no aplican los filtros seleccionados**, ya que estos podrían excluir órdenes necesarias para este tipo de análisis. Por ello, **siempre se consideran todas las órdenes disponibles** para calcular los indicadores entre cargas, asegurando así la consistencia y precisión de los resultados.
+            **Nota:** Los cálculos de CPK "entre carga y carga" se hacen sobre **tramos completos** entre dos cargas, calculados una sola vez con todas las órdenes disponibles. Al aplicar filtros se consideran los tramos que incluyen alguna de las órdenes seleccionadas, completos, para que un filtro no parta un tramo y los indicadores entre cargas sigan siendo consistentes.
 
             Esto permite comparar cómo varía el CPK según el criterio de inclusión de órdenes y analizar la importancia de cada componente en el costo total.
 
             A continuación puedes ver la gráfica comparativa de CPK por periodo y por cada criterio.
             """)
 
-    cpk_desglosado(df_filtered, historial_cargas=st.session_state.historial_cargas)
+    if not hay_historial:
+        st.info("Calculando el historial entre cargas; el CPK desglosado aparecerá en cuanto termine.")
+    else:
+        seccion_cpk()
 
     with st.expander("Completitud de las órdenes seleccionadas", expanded=False):
 
@@ -157,16 +370,9 @@ if __name__ == "__main__":
             "A continuación se muestra el porcentaje de órdenes que tienen costos de combustible, peajes y mantenimiento a lo largo del tiempo. "
             "Esto te ayudará a identificar la completitud de los datos y detectar posibles áreas de mejora en la recolección de información.")
 
-        completitud_groupby = df_completitud(df_filtered)
-        
-        fig_completitud = plot_completitud_y_mediana(
-                completitud_groupby,
-                columnas_estadistica=[]
-            )
-
-        st.plotly_chart(fig_completitud, use_container_width=True)
+        seccion_completitud()
 
-    with st.expander("Exploración visual de las órdenes seleccionadas", expanded=False):
+    with st.expander("Exploración visual de las órdenes seleccionadas", expanded=False), medir("Exploración visual", filas=len(df_filtered)):
 
         st.subheader("Exploración visual de las órdenes seleccionadas")
         st.info(
@@ -178,30 +384,38 @@ if __name__ == "__main__":
         col1, col2, col3 = st.columns([1,1,1])
 
         with col1:
-            seleccionada1, tipo_grafico1 = streamlit_viz_selector(df_filtered, idx = 5, key = '1g')
-            st.markdown(f"#### Gráfico de {tipo_grafico1} para **{seleccionada1}**")
-            fig1 = get_viz_figure(df_filtered, seleccionada1, tipo_grafico1, width=700, height=700)
-
-            if fig1 is not None:
-                st.plotly_chart(fig1, use_container_width=True)
-        
+            seccion_exploracion(5, '1g')
         with col2:
-            seleccionada2, tipo_grafico2 = streamlit_viz_selector(df_filtered, idx = 6, key = '2g')
-            st.markdown(f"#### Gráfico de {tipo_grafico2} para **{seleccionada2}**")
-            fig2 = get_viz_figure(df_filtered, seleccionada2, tipo_grafico2, width=700, height=700)
+            seccion_exploracion(6, '2g')
+        with col3:
+            seccion_exploracion(7, '3g')
 
-            if fig2 is not None:
-                st.plotly_chart(fig2, use_container_width=True)
+    with st.expander("Ranking de Rutas", expanded=False):
 
-        with col3:
-            seleccionada3, tipo_grafico3 = streamlit_viz_selector(df_filtered, idx = 7, key = '3g')
-            st.markdown(f"#### Gráfico de {tipo_grafico3} para **{seleccionada3}**")
-            fig3 = get_viz_figure(df_filtered, seleccionada3, tipo_grafico3, width=700, height=700)
+        st.subheader("Ranking de Rutas")
+        st.info(
+            "Ordena las rutas de las órdenes seleccionadas por CPK, número de órdenes, kms o participación en el costo total. "
+            "Puedes agrupar por ruta de ciudades o de estados, o por estado o ciudad de origen o destino, y limitar los periodos. "
+            "Las órdenes mínimas evitan que rutas con muy pocas órdenes encabecen el ranking por CPK."
+        )
 
-            if fig3 is not None:
-                st.plotly_chart(fig3, use_container_width=True)
+        seccion_rutas()
 
-    with st.expander("Comparativo entre Tractos", expanded=False):
+    with st.expander("Ranking de la Flota", expanded=False):
+
+        st.subheader("Ranking de la Flota")
+        st.info(
+            "Ordena todos los tractos según las métricas entre cargas seleccionadas (CPK, rendimiento, kms por día, etc.). "
+            "Con varias métricas, el ranking usa el promedio de los percentiles de cada una (100 = mejor). "
+            "Selecciona un tracto de la página y ábrelo en uno de los paneles del Comparativo entre Tractos."
+        )
+
+        if hay_historial:
+            seccion_ranking()
+        else:
+            st.info("Calculando el historial entre cargas; el ranking aparecerá en cuanto termine.")
+
+    with st.expander("Comparativo entre Tractos", expanded=False), medir("Comparativo entre tractos"):
 
         st.subheader("Comparativo entre Tractos")
         st.info(
@@ -209,8 +423,22 @@ if __name__ == "__main__":
             "Puedes seleccionar los tractos que deseas comparar y ver cómo se desempeñan en términos de costos y rendimiento. "
         )
 
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            seccion_graficos_tracto(st.session_state.df, historial_cargas=st.session_state.historial_cargas,key="1tracto")
-        with col2:
-            seccion_graficos_tracto(st.session_state.df, historial_cargas=st.session_state.historial_cargas,key="2tracto")
+        if 'acumulados_tracto' in st.session_state:
+            seccion_acumulados()
+        else:
+            st.info("Calculando los acumulados por tracto; la comparación aparecerá en cuanto termine.")
+
+        if hay_historial:
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                seccion_panel_tracto("1tracto")
+            with col2:
+                seccion_panel_tracto("2tracto")
+        else:
+            st.info("Calculando el historial entre cargas; los paneles por tracto aparecerán en cuanto termine.")
+
+    # Mientras queden etapas en segundo plano, la app se vuelve a correr sola cuando alguna termina
+    esperar_precalculo(etapas, pendientes_al_inicio)
+
+    finalizar_rerun()
+    mostrar_panel_tiempos()
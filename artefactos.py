@@ -0,0 +1,310 @@
+# Este archivo contiene el modo batch (sin interfaz) que precalcula los agregados de la app y los guarda en Parquet.
+# No importa Streamlit, Plotly ni AgGrid: está pensado para correr en un programador de tareas nocturno.
+
+# Función: precalcular_artefactos
+# - Corre sobre la base completa historial_entre_cargas (con su mapeo orden -> segmento), las sumas diarias de CPK y de completitud
+#   (que la app reagrupa a día, semana, mes o trimestre)
+#   y los resúmenes por tracto (historial agrupado y acumulados), igual que lo hace app.py al iniciar.
+# - Los puntajes de cargas atípicas (nucleo/anomalias.py) continúan desde la versión anterior aunque la base de origen cambie:
+#   con las huellas por tracto del manifest, los tractos cuyas órdenes no cambiaron conservan sus puntajes y su estado,
+#   los que solo tienen cargas nuevas continúan desde su estado, y los nuevos o con cargas corregidas o quitadas
+#   se califican desde cero. Con --reiniciar-anomalias se recalculan todos.
+
+# Función: guardar_artefactos
+# - Escribe cada artefacto como Parquet en una carpeta versionada (artefactos/<versión>/) junto con un manifest.json.
+# - Las tablas grandes que cada sesión mantiene en memoria (ARTEFACTOS_COMPARTIDOS) se escriben además como Arrow IPC
+#   sin compresión (nucleo/compartido.py): varios procesos de Streamlit detrás de un proxy las abren con memoria mapeada
+#   y comparten una sola copia física en el caché de páginas del sistema operativo.
+# - El manifest guarda la versión de la base y sus huellas por columna y por tracto (nucleo/huellas.py);
+#   main compara con la versión anterior, reporta qué columnas y tractos cambiaron y con eso limita las anomalías a recalcular.
+# - Al terminar actualiza el archivo ACTUAL con la versión nueva, de forma atómica, y conserva solo las últimas versiones.
+
+# Función: cargar_artefactos
+# - Lee la versión indicada en ACTUAL; regresa None si no hay artefactos, si el esquema cambió
+#   o si la base de origen es distinta a la que se usó para generarlos.
+# - Las tablas con archivo Arrow se abren con memoria mapeada, salvo con PYTRACK_MAPEAR=0.
+
+# Uso:
+#   python artefactos.py --entrada Base_viz.xlsx --salida artefactos
+#   python artefactos.py --entrada "extractos/*.xlsx" --salida artefactos
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from nucleo.carga import RUTA_BASE, archivos_extractos, cargar_base
+from nucleo.motor import MOTORES
+from nucleo.anomalias import estado_desde_tabla
+from nucleo.huellas import metadatos_dataset, cambios
+from nucleo.compartido import escribir_compartido, leer_compartido
+
+DIRECTORIO_ARTEFACTOS = os.environ.get('PYTRACK_ARTEFACTOS', 'artefactos')
+
+# Se incrementa cuando cambia el contenido o la forma de algún artefacto; las versiones anteriores se ignoran
+ESQUEMA_ARTEFACTOS = 6
+
+ARCHIVO_ACTUAL = 'ACTUAL'
+
+# Artefactos que también se guardan como Arrow IPC para abrirse con memoria mapeada
+ARTEFACTOS_COMPARTIDOS = ('ordenes', 'historial_cargas', 'ordenes_segmento')
+
+def mapear_activo():
+    return os.environ.get('PYTRACK_MAPEAR', '1') != '0'
+
+def _huella_fuente(ruta):
+    # Tamaño y fecha de modificación de la base de origen, para detectar artefactos desactualizados.
+    # Con extractos mensuales (carpeta o patrón) cuentan el tamaño total y el extracto modificado más recientemente
+    if not ruta:
+        return None
+    archivos = [a for a in archivos_extractos(ruta) if os.path.exists(a)]
+    if not archivos:
+        return None
+    info = [os.stat(a) for a in archivos]
+    return {
+        'ruta': os.path.abspath(ruta) if isinstance(ruta, str) else [os.path.abspath(a) for a in archivos],
+        'bytes': sum(i.st_size for i in info),
+        'modificado': max(i.st_mtime for i in info),
+        'archivos': len(archivos),
+    }
+
+def _tabla_acumulados(acumulados):
+    from nucleo.tractos import COLUMNAS_ACUMULADAS
+
+    tabla = pd.DataFrame({
+        'Inicio de la Orden': acumulados['fechas'],
+        'No. Orden': acumulados['ordenes'],
+    })
+    tabla[COLUMNAS_ACUMULADAS] = acumulados['puntuales']
+    tabla[[f'Acumulado {c}' for c in COLUMNAS_ACUMULADAS]] = acumulados['acumulados']
+    # Las filas ya vienen agrupadas por tracto; basta con guardar cada tracto con su rebanada
+    tractos = np.empty(len(tabla), dtype=object)
+    for tracto, (inicio, fin) in acumulados['offsets'].items():
+        tractos[inicio:fin] = tracto
+    tabla.insert(0, 'Tracto', tractos)
+    return tabla
+
+def _acumulados_desde_tabla(tabla):
+    from nucleo.tractos import COLUMNAS_ACUMULADAS
+
+    tractos = tabla['Tracto'].to_numpy()
+    # Inicio de cada tracto: primera fila o cambio de tracto respecto a la fila anterior
+    cortes = np.flatnonzero(np.r_[True, tractos[1:] != tractos[:-1]]) if len(tractos) else np.array([], dtype=int)
+    limites = np.r_[cortes, len(tractos)]
+    return {
+        'fechas': tabla['Inicio de la Orden'].to_numpy(dtype='datetime64[ns]'),
+        'ordenes': tabla['No. Orden'].to_numpy(),
+        'puntuales': np.ascontiguousarray(tabla[COLUMNAS_ACUMULADAS].to_numpy(dtype=float)),
+        'acumulados': np.ascontiguousarray(tabla[[f'Acumulado {c}' for c in COLUMNAS_ACUMULADAS]].to_numpy(dtype=float)),
+        'offsets': {tractos[i]: (int(i), int(f)) for i, f in zip(limites[:-1], limites[1:])},
+    }
+
+def precalcular_artefactos(df, motor=None, previos=None, datos=None):
+    """
+    Calcula todos los agregados que la app necesita al iniciar.
+    Args:
+        df: base de órdenes preparada (resultado de cargar_base).
+        motor: motor de agregación ('pandas', 'polars' o 'duckdb'); None usa PYTRACK_MOTOR.
+        previos: artefactos de la versión anterior (cargar_artefactos); las anomalías continúan desde su estado.
+        datos: metadatos_dataset de df agrupado por tracto; sin ellos todos los tractos cuentan como cambiados.
+    Returns:
+        artefactos: dict nombre -> DataFrame listo para guardarse en Parquet.
+    """
+    from nucleo.historial import historial_entre_cargas
+    from nucleo.cpk import sumas_diarias_cpk
+    from nucleo.estadisticas import completitud_diaria
+    from nucleo.anomalias import iniciar_estado, actualizar_anomalias, conservar_anomalias, tabla_estado
+    from nucleo.tractos import indexar_por_tracto, precalcular_acumulados_tracto
+
+    df, _ = indexar_por_tracto(df, 'Inicio de la Orden')
+
+    historial_cargas, historial_cargas_grouped, ordenes_segmento = historial_entre_cargas(df, motor=motor, mapeo=True)
+    historial_cargas, _ = indexar_por_tracto(historial_cargas, 'Fecha Orden de Carga')
+
+    estado, pendientes = iniciar_estado(), historial_cargas
+    if previos is not None:
+        # Solo los tractos cuya huella cambió respecto a la versión anterior se vuelven a calificar
+        if datos is not None:
+            cambiados = cambios(previos['manifest'].get('datos'), datos)['grupos']
+        else:
+            cambiados = historial_cargas['Tracto'].astype(str).unique()
+        estado, conservadas, pendientes = conservar_anomalias(previos['estado_anomalias'], previos['anomalias'],
+                                                              historial_cargas, cambiados)
+    estado, anomalias = actualizar_anomalias(estado, pendientes)
+    if estado['omitidas']:
+        print(f"Anomalías: {estado['omitidas']:,} cargas no se calificaron "
+              "(fecha igual o anterior a la última calificada de su tracto)")
+    if previos is not None:
+        anomalias = pd.concat([conservadas, anomalias], ignore_index=True)
+
+    return {
+        'ordenes': df,
+        'historial_cargas': historial_cargas,
+        'historial_cargas_grouped': historial_cargas_grouped,
+        'ordenes_segmento': ordenes_segmento,
+        'cpk_diario': sumas_diarias_cpk(df, historial_cargas, motor=motor),
+        'completitud_diaria': completitud_diaria(df, motor=motor),
+        'acumulados_tracto': _tabla_acumulados(precalcular_acumulados_tracto(df)),
+        'anomalias': anomalias,
+        'estado_anomalias': tabla_estado(estado),
+    }
+
+def guardar_artefactos(artefactos, directorio=DIRECTORIO_ARTEFACTOS, fuente=None, conservar=5, datos=None):
+    """
+    Guarda los artefactos en una carpeta versionada y la marca como la versión actual.
+    Args:
+        artefactos: dict nombre -> DataFrame (resultado de precalcular_artefactos).
+        directorio: carpeta raíz de los artefactos.
+        fuente: ruta de la base de origen, para registrar su huella en el manifest.
+        conservar: número de versiones a mantener en disco (None para no borrar ninguna).
+        datos: metadatos de las órdenes (nucleo.huellas.metadatos_dataset), para registrarlos en el manifest.
+    Returns:
+        ruta_version: carpeta donde quedaron los artefactos.
+    """
+    version = datetime.now().strftime('%Y%m%d-%H%M%S')
+    ruta_version = os.path.join(directorio, version)
+    # Se escribe en una carpeta temporal para que una corrida interrumpida nunca quede como versión válida
+    ruta_temporal = ruta_version + '.tmp'
+    os.makedirs(ruta_temporal, exist_ok=True)
+
+    archivos = {}
+    for nombre, tabla in artefactos.items():
+        archivo = f'{nombre}.parquet'
+        tabla.to_parquet(os.path.join(ruta_temporal, archivo))
+        archivos[nombre] = {'archivo': archivo, 'filas': int(len(tabla))}
+        if nombre in ARTEFACTOS_COMPARTIDOS:
+            archivos[nombre]['arrow'] = f'{nombre}.arrow'
+            escribir_compartido(tabla, os.path.join(ruta_temporal, archivos[nombre]['arrow']))
+
+    manifest = {
+        'version': version,
+        'esquema': ESQUEMA_ARTEFACTOS,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'fuente': _huella_fuente(fuente),
+        'datos': datos,
+        'artefactos': archivos,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+    }
+    with open(os.path.join(ruta_temporal, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta_version)
+
+    ruta_actual = os.path.join(directorio, ARCHIVO_ACTUAL)
+    with open(ruta_actual + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(ruta_actual + '.tmp', ruta_actual)
+
+    if conservar:
+        versiones = sorted(
+            d for d in os.listdir(directorio)
+            if os.path.isdir(os.path.join(directorio, d)) and not d.endswith('.tmp')
+        )
+        for vieja in versiones[:-conservar]:
+            shutil.rmtree(os.path.join(directorio, vieja), ignore_errors=True)
+
+    return ruta_version
+
+def cargar_artefactos(directorio=DIRECTORIO_ARTEFACTOS, fuente=RUTA_BASE, mapear=None):
+    """
+    Lee la versión actual de los artefactos.
+    Args:
+        directorio: carpeta raíz de los artefactos.
+        fuente: base de origen; si existe y su huella no coincide con la del manifest, los artefactos se ignoran.
+        mapear: si es True, las tablas con archivo Arrow se abren con memoria mapeada (sus columnas numéricas y de fechas
+            son de solo lectura); None usa PYTRACK_MAPEAR.
+    Returns:
+        artefactos: dict nombre -> DataFrame (con 'acumulados_tracto' ya en el formato de precalcular_acumulados_tracto
+            y 'estado_anomalias' en el de nucleo/anomalias.py)
+            más 'manifest' y 'ruta' (carpeta de la versión), o None si no hay artefactos vigentes.
+    """
+    ruta_actual = os.path.join(directorio, ARCHIVO_ACTUAL)
+    if not os.path.exists(ruta_actual):
+        return None
+    with open(ruta_actual, encoding='utf-8') as f:
+        ruta_version = os.path.join(directorio, f.read().strip())
+
+    try:
+        with open(os.path.join(ruta_version, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('esquema') != ESQUEMA_ARTEFACTOS:
+        return None
+
+    huella = _huella_fuente(fuente)
+    if huella is not None and manifest.get('fuente') is not None:
+        if (huella['bytes'], huella['modificado']) != (manifest['fuente']['bytes'], manifest['fuente']['modificado']):
+            return None
+
+    mapear = mapear_activo() if mapear is None else mapear
+    artefactos = {
+        nombre: leer_compartido(os.path.join(ruta_version, info['arrow'])) if mapear and 'arrow' in info
+        else pd.read_parquet(os.path.join(ruta_version, info['archivo']))
+        for nombre, info in manifest['artefactos'].items()
+    }
+    artefactos['acumulados_tracto'] = _acumulados_desde_tabla(artefactos['acumulados_tracto'])
+    artefactos['estado_anomalias'] = estado_desde_tabla(artefactos['estado_anomalias'])
+    artefactos['manifest'] = manifest
+    artefactos['ruta'] = ruta_version
+    return artefactos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcula los agregados de PyTrack y los guarda como artefactos Parquet.")
+    parser.add_argument('--entrada', default=RUTA_BASE, help="Archivo de órdenes (Base_viz.xlsx), o carpeta o patrón glob de extractos mensuales.")
+    parser.add_argument('--salida', default=DIRECTORIO_ARTEFACTOS, help="Carpeta raíz de los artefactos.")
+    parser.add_argument('--conservar', type=int, default=5, help="Versiones a mantener en disco.")
+    parser.add_argument('--motor', choices=MOTORES, default=None, help="Motor de agregación (por defecto PYTRACK_MOTOR o pandas).")
+    parser.add_argument('--reiniciar-anomalias', action='store_true',
+                        help="Recalcula las anomalías desde cero en lugar de continuar desde la versión anterior.")
+    args = parser.parse_args(argv)
+
+    from nucleo.tractos import indexar_por_tracto
+
+    t0 = time.perf_counter()
+    df = cargar_base(args.entrada)
+    print(f"Base cargada: {len(df):,} órdenes en {time.perf_counter() - t0:.1f} s")
+
+    # Huellas de las órdenes tal como quedan en el artefacto (agrupadas por tracto), las mismas que calcula la app
+    df, _ = indexar_por_tracto(df, 'Inicio de la Orden')
+    datos = metadatos_dataset(df)
+
+    # La versión anterior se usa aunque venga de otra base: las huellas por tracto deciden qué anomalías se conservan
+    anteriores = cargar_artefactos(args.salida, fuente=None)
+    previos = None if args.reiniciar_anomalias else anteriores
+    if previos is not None:
+        fuente, anterior = _huella_fuente(args.entrada), previos['manifest'].get('fuente')
+        igual = (fuente is not None and anterior is not None
+                 and (fuente['bytes'], fuente['modificado']) == (anterior['bytes'], anterior['modificado']))
+        if not igual:
+            print(f"Anomalías: la base cambió desde la versión {previos['manifest']['version']}; "
+                  "los tractos con órdenes distintas continúan o se califican desde cero")
+        else:
+            print(f"Anomalías: se continúa desde la versión {previos['manifest']['version']}")
+
+    t0 = time.perf_counter()
+    artefactos = precalcular_artefactos(df, motor=args.motor, previos=previos, datos=datos)
+    print(f"Agregados calculados en {time.perf_counter() - t0:.1f} s")
+
+    diferencias = cambios(anteriores['manifest'].get('datos') if anteriores is not None else None, datos)
+    if diferencias['igual']:
+        print(f"Datos: versión {datos['version']}, sin cambios respecto a la versión anterior")
+    else:
+        print(f"Datos: versión {datos['version']}; cambiaron {len(diferencias['columnas'])} columnas "
+              f"y {len(diferencias['grupos'])} tractos")
+        if anteriores is not None and diferencias['columnas']:
+            print("  Columnas: " + ", ".join(diferencias['columnas']))
+
+    ruta_version = guardar_artefactos(artefactos, args.salida, fuente=args.entrada, conservar=args.conservar, datos=datos)
+    for nombre, tabla in artefactos.items():
+        print(f"  {nombre:<28} {len(tabla):>10,} filas")
+    print(f"Artefactos guardados en {ruta_version}")
+
+if __name__ == "__main__":
+    main()
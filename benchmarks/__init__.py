@@ -0,0 +1,6 @@
+# Paquete de benchmarks de PyTrack.
+# - datos_sinteticos: genera órdenes con el mismo esquema que Base_viz.xlsx ya preparado por app.py.
+# - suite: mide tiempo y memoria de las funciones de cálculo y visualización en varios tamaños de flota.
+# - carga_app: prueba de carga de la app con sesiones simultáneas contra un servidor de Streamlit (latencia p50/p95/p99 por rerun,
+#   pico de memoria del servidor y reruns por segundo).
+# - Uso: python -m benchmarks.suite --tamanos 10000 100000 1000000 --salida benchmark_report.json
@@ -0,0 +1,460 @@
+# Este archivo contiene la prueba de carga de la app: levanta un servidor de Streamlit con app.py, le conecta N sesiones
+# simultáneas por WebSocket (como lo haría el navegador) y mide la latencia de cada rerun, el pico de memoria del servidor
+# y el throughput para cada configuración.
+
+# Función: preparar_datos
+# - Genera órdenes sintéticas del tamaño pedido (benchmarks/datos_sinteticos.py) y las guarda como artefactos del modo batch,
+#   así cada sesión arranca desde ellos igual que en producción.
+
+# Función: iniciar_servidor / detener_servidor
+# - Corre 'streamlit run app.py' sin navegador en un puerto libre, con los artefactos y el caché en carpetas temporales,
+#   y espera a que responda /_stcore/health.
+
+# Clase: Cliente
+# - Cliente mínimo del protocolo de Streamlit: manda BackMsg rerun_script con el estado de los widgets y lee los ForwardMsg
+#   hasta que termina el script. Guarda los widgets dibujados (por key, o por etiqueta si no tienen) y las excepciones.
+# - Los valores van como los manda el navegador: índices de la opción para selectbox, multiselect y select_slider,
+#   y trigger_value para los botones (solo en el rerun del clic).
+
+# Función: sesion
+# - Una sesión de usuario: abre la app, espera a que termine el precálculo y repite el guion ESCENARIO
+#   (aplicar un filtro, mover el periodo del CPK, cambiar el tipo de gráfico y elegir un tracto), con pausas opcionales.
+# - Cada interacción es un rerun completo de la app (no reruns de fragmento): las latencias son el peor caso de cada widget.
+
+# Función: ejecutar_carga
+# - Corre las sesiones a la vez contra el mismo servidor y muestrea su memoria residente mientras tanto.
+#   Regresa p50/p95/p99 por paso y en total, el pico de RSS y los reruns por segundo.
+
+# Uso:
+#   python -m benchmarks.carga_app --tamanos 100000 1000000 --sesiones 1 20 50 --iteraciones 3 --salida carga_report.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datos_sinteticos import generar_ordenes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_APP = os.path.join(RAIZ, 'app.py')
+
+ESCENARIO = ('filtro', 'periodo_cpk', 'tipo_grafico', 'tracto')
+
+PERCENTILES = (50, 95, 99)
+
+# Widgets que deben estar dibujados para que la sesión empiece el guion
+WIDGETS_GUION = ('col_select', 'text_input', 'aplicar_btn', 'tipo_grafico_1g', 'tracto_selector_1tracto')
+
+# Aviso de esperar_precalculo (precalculo.py) mientras quedan etapas pendientes
+AVISO_PRECALCULO = 'Calculando en segundo plano'
+
+ETIQUETA_PERIODO_CPK = 'Selecciona el periodo'
+
+def _rss_mb(pid):
+    # Memoria residente actual del servidor (psutil es opcional; en Linux basta /proc)
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1024 ** 2
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class _Muestreo:
+    # Pico de RSS del servidor durante una configuración, muestreado en un hilo aparte
+    def __init__(self, pid, intervalo=0.1):
+        self.pid = pid
+        self.intervalo = intervalo
+        self.pico = _rss_mb(pid)
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            actual = _rss_mb(self.pid)
+            if actual is not None:
+                self.pico = max(self.pico or 0, actual)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+
+def preparar_datos(tamano, directorio, ordenes_por_tracto=250, meses=12, semilla=0):
+    """
+    Genera órdenes sintéticas y las guarda como la versión actual de los artefactos.
+    Args:
+        tamano: número de órdenes.
+        directorio: carpeta de artefactos (la que lee la app por PYTRACK_ARTEFACTOS).
+        ordenes_por_tracto, meses, semilla: como en generar_ordenes.
+    Returns:
+        n_tractos: tractos generados.
+    """
+    from artefactos import precalcular_artefactos, guardar_artefactos
+
+    n_tractos = max(1, tamano // ordenes_por_tracto)
+    df = generar_ordenes(n_tractos=n_tractos, ordenes_por_tracto=ordenes_por_tracto, meses=meses, semilla=semilla)
+    guardar_artefactos(precalcular_artefactos(df), directorio, conservar=1)
+    return n_tractos
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def iniciar_servidor(entorno, bitacora, timeout=120):
+    """
+    Levanta la app con 'streamlit run' sin navegador.
+    Args:
+        entorno: variables de entorno extra para el servidor (PYTRACK_ARTEFACTOS, PYTRACK_CACHE, PYTRACK_BASE).
+        bitacora: archivo donde queda la salida del servidor.
+        timeout: segundos máximos para que responda.
+    Returns:
+        proceso, puerto: el subprocess.Popen del servidor y su puerto.
+    """
+    puerto = _puerto_libre()
+    comando = [
+        sys.executable, '-m', 'streamlit', 'run', RUTA_APP,
+        '--server.headless', 'true', '--server.port', str(puerto), '--server.address', '127.0.0.1',
+        '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false',
+    ]
+    with open(bitacora, 'ab') as salida:
+        proceso = subprocess.Popen(comando, cwd=RAIZ, env={**os.environ, **entorno}, stdout=salida, stderr=subprocess.STDOUT)
+
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor de Streamlit terminó al iniciar (ver {bitacora})")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/_stcore/health', timeout=1) as respuesta:
+                if respuesta.status == 200:
+                    return proceso, puerto
+        except OSError:
+            pass
+        time.sleep(0.2)
+    detener_servidor(proceso)
+    raise TimeoutError(f"El servidor de Streamlit no respondió en {timeout} s (ver {bitacora})")
+
+def detener_servidor(proceso, timeout=10):
+    proceso.terminate()
+    try:
+        proceso.wait(timeout)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+
+class Cliente:
+    # Una pestaña del navegador conectada a la app
+    def __init__(self, puerto, timeout=300):
+        self.url = f'ws://127.0.0.1:{puerto}/_stcore/stream'
+        self.timeout = timeout
+        self.conexion = None
+        self.pagina = ''
+        # Mensajes grandes ya recibidos: el servidor los vuelve a mandar solo como referencia a su hash
+        self.mensajes = {}
+        # Nombre -> (tipo de elemento, proto) del último rerun; nombre -> (campo de WidgetState, valor) fijado por el usuario
+        self.widgets = {}
+        self.estados = {}
+        self.excepciones = []
+        self.avisos = []
+
+    async def conectar(self):
+        from tornado.websocket import websocket_connect
+
+        # El primer subprotocolo es el que el servidor acepta ('streamlit', como el navegador)
+        self.conexion = await websocket_connect(self.url, subprotocols=['streamlit'])
+
+    def cerrar(self):
+        if self.conexion is not None:
+            self.conexion.close()
+
+    def fijar(self, nombre, campo, valor):
+        self.estados[nombre] = (campo, valor)
+
+    def _back_msg(self, clics):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        mensaje = BackMsg()
+        mensaje.rerun_script.page_script_hash = self.pagina
+        widgets = mensaje.rerun_script.widget_states.widgets
+        # El id de un widget cambia con sus opciones: se toma el del último rerun
+        for nombre, (campo, valor) in list(self.estados.items()) + [(nombre, ('trigger_value', True)) for nombre in clics]:
+            if nombre not in self.widgets:
+                continue
+            estado = widgets.add()
+            estado.id = self.widgets[nombre][1].id
+            if campo.endswith('_array_value'):
+                getattr(estado, campo).data.extend(valor)
+            else:
+                setattr(estado, campo, valor)
+        return mensaje.SerializeToString()
+
+    def _recibir(self, mensaje):
+        tipo = mensaje.WhichOneof('type')
+        if tipo == 'ref_hash':
+            mensaje = self.mensajes[mensaje.ref_hash]
+            tipo = mensaje.WhichOneof('type')
+        elif mensaje.metadata.cacheable:
+            self.mensajes[mensaje.hash] = mensaje
+
+        if tipo == 'new_session':
+            self.pagina = mensaje.new_session.page_script_hash
+            self.widgets, self.avisos = {}, []
+        elif tipo == 'delta' and mensaje.delta.WhichOneof('type') == 'new_element':
+            elemento = mensaje.delta.new_element
+            tipo_elemento = elemento.WhichOneof('type')
+            if tipo_elemento == 'exception':
+                self.excepciones.append(elemento.exception.message)
+            elif tipo_elemento == 'markdown':
+                self.avisos.append(elemento.markdown.body)
+            elif tipo_elemento in ('selectbox', 'multiselect', 'slider', 'button', 'radio'):
+                proto = getattr(elemento, tipo_elemento)
+                # '$$WIDGET_ID-<hash>-<key>'; sin key el último tramo es 'None' y se usa la etiqueta
+                key = proto.id.split('-', 2)[-1]
+                self.widgets[proto.label if key == 'None' else key] = (tipo_elemento, proto)
+        return tipo, mensaje
+
+    async def rerun(self, clics=()):
+        """
+        Vuelve a correr la app con el estado actual de los widgets.
+        Args:
+            clics: nombres de los botones que se presionan en este rerun.
+        Returns:
+            excepciones: mensajes de las excepciones que mostró la app.
+        """
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        self.excepciones = []
+        await self.conexion.write_message(self._back_msg(clics), binary=True)
+        limite = time.perf_counter() + self.timeout
+        while True:
+            datos = await asyncio.wait_for(self.conexion.read_message(), max(limite - time.perf_counter(), 0.001))
+            if datos is None:
+                raise ConnectionError("El servidor cerró la conexión")
+            mensaje = ForwardMsg()
+            mensaje.ParseFromString(datos)
+            tipo, mensaje = self._recibir(mensaje)
+            # Un st.rerun() termina la corrida con EARLY_FOR_RERUN y empieza otra en seguida
+            if tipo == 'script_finished' and mensaje.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                if mensaje.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    self.excepciones.append("Error de compilación de app.py")
+                return self.excepciones
+
+    def listo(self):
+        return all(nombre in self.widgets for nombre in WIDGETS_GUION) and not any(AVISO_PRECALCULO in aviso for aviso in self.avisos)
+
+    def opciones(self, nombre):
+        return list(self.widgets[nombre][1].options)
+
+    def indice(self, nombre):
+        # Índice elegido en un selectbox: el que fijó el usuario o el valor por defecto
+        if nombre in self.estados:
+            return self.estados[nombre][1]
+        return self.widgets[nombre][1].default
+
+def _paso_filtro(cliente, rng):
+    opciones = cliente.opciones('col_select')
+    if 'Proyecto' in opciones and cliente.indice('col_select') != opciones.index('Proyecto'):
+        cliente.fijar('col_select', 'int_value', opciones.index('Proyecto'))
+        yield 'filtro: columna', ()
+    valores = cliente.opciones('text_input')
+    if valores:
+        elegidos = rng.choice(len(valores), size=min(2, len(valores)), replace=False)
+        cliente.fijar('text_input', 'int_array_value', sorted(int(i) for i in elegidos))
+        yield 'filtro: valores', ()
+    yield 'filtro: aplicar', ('aplicar_btn',)
+
+def _paso_periodo_cpk(cliente, rng):
+    nombre = next((n for n in cliente.widgets if n.startswith(ETIQUETA_PERIODO_CPK)), None)
+    if nombre is None or len(cliente.opciones(nombre)) < 2:
+        return
+    a, b = sorted(rng.choice(len(cliente.opciones(nombre)), size=2, replace=False))
+    cliente.fijar(nombre, 'double_array_value', [float(a), float(b)])
+    yield 'periodo_cpk', ()
+
+def _paso_tipo_grafico(cliente, rng):
+    actual = cliente.indice('tipo_grafico_1g')
+    opciones = [i for i in range(len(cliente.opciones('tipo_grafico_1g'))) if i != actual]
+    cliente.fijar('tipo_grafico_1g', 'int_value', int(rng.choice(opciones)))
+    yield 'tipo_grafico', ()
+
+def _paso_tracto(cliente, rng):
+    cliente.fijar('tracto_selector_1tracto', 'int_value', int(rng.integers(len(cliente.opciones('tracto_selector_1tracto')))))
+    yield 'tracto', ()
+
+# Cada paso fija widgets y entrega (nombre del rerun, botones presionados) por cada rerun que provoca
+PASOS = {
+    'filtro': _paso_filtro,
+    'periodo_cpk': _paso_periodo_cpk,
+    'tipo_grafico': _paso_tipo_grafico,
+    'tracto': _paso_tracto,
+}
+
+async def sesion(numero, puerto, iteraciones=3, pausa=0.0, timeout=300, semilla=0):
+    """
+    Simula un usuario de la app.
+    Args:
+        numero: número de sesión (para la semilla y los registros).
+        puerto: puerto del servidor de Streamlit.
+        iteraciones: veces que se repite ESCENARIO.
+        pausa: segundos promedio entre interacciones (tiempo de lectura del usuario; exponencial).
+        timeout: segundos máximos por rerun.
+        semilla: semilla base de las elecciones aleatorias.
+    Returns:
+        registros: lista de dicts con 'sesion', 'paso', 'segundos' y 'excepciones' (una entrada por rerun).
+    """
+    rng = np.random.default_rng(semilla + numero)
+    registros = []
+    cliente = Cliente(puerto, timeout)
+    await cliente.conectar()
+
+    async def rerun(paso, clics=()):
+        t0 = time.perf_counter()
+        excepciones = await cliente.rerun(clics)
+        registros.append({'sesion': numero, 'paso': paso, 'segundos': time.perf_counter() - t0, 'excepciones': excepciones})
+
+    try:
+        await rerun('inicio')
+        # La página se dibuja de inmediato; la sesión queda lista cuando su precálculo termina y aparecen los widgets del guion
+        t0 = time.perf_counter()
+        while not cliente.listo():
+            if time.perf_counter() - t0 > timeout:
+                raise TimeoutError(f"Sesión {numero}: el precálculo no terminó en {timeout} s")
+            await asyncio.sleep(0.5)
+            await cliente.rerun()
+        registros.append({'sesion': numero, 'paso': 'listo', 'segundos': time.perf_counter() - t0, 'excepciones': cliente.excepciones})
+
+        for _ in range(iteraciones):
+            for paso in ESCENARIO:
+                if pausa:
+                    await asyncio.sleep(rng.exponential(pausa))
+                for nombre, clics in PASOS[paso](cliente, rng):
+                    await rerun(nombre, clics)
+    finally:
+        cliente.cerrar()
+    return registros
+
+def _resumen(segundos):
+    if not len(segundos):
+        return {}
+    valores = np.percentile(segundos, PERCENTILES)
+    return {**{f'p{p}_s': float(v) for p, v in zip(PERCENTILES, valores)}, 'reruns': int(len(segundos))}
+
+async def _sesiones(puerto, sesiones, *args):
+    return await asyncio.gather(*(sesion(i, puerto, *args) for i in range(sesiones)))
+
+def ejecutar_carga(puerto, pid, sesiones, iteraciones=3, pausa=0.0, timeout=300, semilla=0):
+    """
+    Corre varias sesiones simultáneas contra un servidor y resume sus latencias.
+    Args:
+        puerto, pid: puerto y proceso del servidor (ver iniciar_servidor).
+        sesiones: número de sesiones simultáneas.
+        iteraciones, pausa, timeout, semilla: como en sesion.
+    Returns:
+        resultado: dict con 'sesiones', 'total' y 'por_paso' (percentiles de latencia por rerun),
+            'rss_pico_mb' (del servidor), 'reruns_por_s', 'segundos' (tiempo total), 'n_errores' (reruns con excepción)
+            y 'errores' (los primeros 20).
+    """
+    t0 = time.perf_counter()
+    with _Muestreo(pid) as muestreo:
+        resultados = asyncio.run(_sesiones(puerto, sesiones, iteraciones, pausa, timeout, semilla))
+    total = time.perf_counter() - t0
+    registros = pd.DataFrame([r for registros in resultados for r in registros])
+
+    # 'inicio' y 'listo' incluyen el arranque de la sesión; el throughput cuenta solo las interacciones
+    interacciones = registros[~registros['paso'].isin(['inicio', 'listo'])]
+    errores = registros[registros['excepciones'].str.len() > 0]
+    return {
+        'sesiones': sesiones,
+        'total': _resumen(interacciones['segundos']),
+        'por_paso': {paso: _resumen(grupo['segundos']) for paso, grupo in registros.groupby('paso', sort=False)},
+        'rss_pico_mb': muestreo.pico,
+        'reruns_por_s': len(interacciones) / total if total else None,
+        'segundos': total,
+        'n_errores': len(errores),
+        'errores': errores[['sesion', 'paso', 'excepciones']].head(20).to_dict('records'),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con sesiones simultáneas contra un servidor de Streamlit.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[100_000], help="Número de órdenes sintéticas por configuración.")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=[1, 20, 50], help="Sesiones simultáneas por configuración.")
+    parser.add_argument('--iteraciones', type=int, default=3, help="Repeticiones del guion por sesión.")
+    parser.add_argument('--pausa', type=float, default=0.0, help="Segundos promedio entre interacciones de cada usuario.")
+    parser.add_argument('--timeout', type=float, default=300, help="Segundos máximos por rerun.")
+    parser.add_argument('--ordenes-por-tracto', type=int, default=250)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='carga_report.json')
+    args = parser.parse_args(argv)
+
+    # El servidor lee sus artefactos y su caché de carpetas temporales; sin base de órdenes, los artefactos siempre son vigentes
+    temporal = tempfile.mkdtemp(prefix='pytrack_carga_')
+    entorno = {
+        'PYTRACK_ARTEFACTOS': os.path.join(temporal, 'artefactos'),
+        'PYTRACK_CACHE': os.path.join(temporal, 'cache'),
+        'PYTRACK_BASE': os.path.join(temporal, 'sin_base.xlsx'),
+    }
+    os.environ.update(entorno)
+    bitacora = os.path.join(temporal, 'servidor.log')
+
+    configuraciones = []
+    for tamano in args.tamanos:
+        t0 = time.perf_counter()
+        n_tractos = preparar_datos(tamano, entorno['PYTRACK_ARTEFACTOS'], args.ordenes_por_tracto, args.meses, args.semilla)
+        print(f"[{tamano:,} órdenes | {n_tractos:,} tractos] artefactos listos en {time.perf_counter() - t0:.1f} s")
+        for sesiones in args.sesiones:
+            # Un servidor nuevo por configuración: el pico de memoria no arrastra las sesiones anteriores
+            proceso, puerto = iniciar_servidor(entorno, bitacora)
+            try:
+                resultado = ejecutar_carga(puerto, proceso.pid, sesiones, args.iteraciones, args.pausa, args.timeout, args.semilla)
+            finally:
+                detener_servidor(proceso)
+            resultado.update({'filas': tamano, 'tractos': n_tractos})
+            configuraciones.append(resultado)
+            total = resultado['total']
+            print(
+                f"  {sesiones:>3} sesiones: p50 {total['p50_s']:.3f} s | p95 {total['p95_s']:.3f} s | p99 {total['p99_s']:.3f} s"
+                f" | {resultado['reruns_por_s']:.2f} reruns/s | RSS pico {resultado['rss_pico_mb'] or float('nan'):,.0f} MB"
+                f" | {resultado['n_errores']} errores"
+            )
+
+    reporte = {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'nucleos': os.cpu_count(),
+            'iteraciones': args.iteraciones,
+            'pausa_s': args.pausa,
+            'escenario': list(ESCENARIO),
+        },
+        'configuraciones': configuraciones,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"Reporte guardado en {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Este archivo genera órdenes de transporte sintéticas con el esquema que app.py proyecta de Base_viz.xlsx.
+
+# Función: generar_ordenes
+# - Genera n_tractos x ordenes_por_tracto órdenes repartidas en el número de meses indicado.
+# - Cada tracto tiene órdenes consecutivas en el tiempo (sin traslaparse), con kms proporcionales a la duración.
+# - Las cargas de combustible ocurren con una probabilidad proporcional a los kms de la orden (aprox. cada 2,000 km).
+# - Los peajes aparecen en poco más de la mitad de las órdenes y el mantenimiento es escaso (~3% de las órdenes).
+# - Devuelve el DataFrame ya preparado (mismas columnas y nombres que st.session_state.df), sin necesidad de datos reales.
+
+import numpy as np
+import pandas as pd
+
+ESTADOS = [
+    'AGS', 'BC', 'BCS', 'CAMP', 'CHIS', 'CHIH', 'CDMX', 'COAH', 'COL', 'DGO', 'GTO', 'GRO', 'HGO', 'JAL', 'MEX', 'MICH',
+    'MOR', 'NAY', 'NL', 'OAX', 'PUE', 'QRO', 'QROO', 'SLP', 'SIN', 'SON', 'TAB', 'TAMPS', 'TLAX', 'VER', 'YUC', 'ZAC'
+]
+
+def generar_ordenes(n_tractos=100, ordenes_por_tracto=100, meses=6, fecha_inicio='2025-01-01', semilla=0):
+    """
+    Genera órdenes sintéticas con el esquema de la base de la app.
+    Args:
+        n_tractos: número de tractos de la flota.
+        ordenes_por_tracto: órdenes que realiza cada tracto en el horizonte.
+        meses: número de meses (periodos) que cubren las órdenes.
+        fecha_inicio: fecha de la primera orden.
+        semilla: semilla del generador aleatorio, para que los benchmarks sean reproducibles.
+    Returns:
+        df: DataFrame con una fila por orden, ordenado por fecha de inicio y con 'No. Orden' consecutivo.
+    """
+    rng = np.random.default_rng(semilla)
+    n = n_tractos * ordenes_por_tracto
+
+    # --- Tiempos: órdenes consecutivas por tracto que cubren el horizonte ---
+    horas_horizonte = meses * 30.4 * 24
+    ciclo_medio = horas_horizonte / ordenes_por_tracto
+    ciclos = rng.gamma(4.0, ciclo_medio / 4.0, size=(n_tractos, ordenes_por_tracto))
+    inicios_h = np.cumsum(ciclos, axis=1) - ciclos[:, :1] + rng.uniform(0, ciclo_medio, size=(n_tractos, 1))
+    duracion_h = ciclos * rng.uniform(0.35, 0.8, size=ciclos.shape)
+
+    inicio = pd.Timestamp(fecha_inicio) + pd.to_timedelta(inicios_h.ravel(), unit='h')
+    cierre = inicio + pd.to_timedelta(duracion_h.ravel(), unit='h')
+    duracion_h = duracion_h.ravel()
+
+    # --- Kms y combustible ---
+    kms = np.round(duracion_h * rng.uniform(40, 70, n), 1)
+    carga = rng.random(n) < np.clip(kms / 2000.0, 0.02, 1.0)
+    litros = np.where(carga, np.round(rng.uniform(350, 650, n), 1), 0.0)
+    costo_litro = np.where(carga, np.round(rng.uniform(22.5, 25.5, n), 2), np.nan)
+    costo_combustible = np.where(carga, np.round(litros * np.nan_to_num(costo_litro), 2), 0.0)
+
+    # --- Peajes y mantenimiento ---
+    costo_peajes = np.where(rng.random(n) < 0.55, np.round(kms * rng.uniform(1.0, 2.5, n), 2), 0.0)
+    costo_mant = np.where(rng.random(n) < 0.03, np.round(rng.lognormal(np.log(8000), 0.6, n), 2), 0.0)
+    costo_total = costo_combustible + costo_peajes + costo_mant
+
+    # --- Catálogos ---
+    tractos = np.repeat(np.arange(1000, 1000 + n_tractos), ordenes_por_tracto)
+    estados = np.array(ESTADOS, dtype=object)
+    ciudades = np.array([f'{e} Ciudad {i}' for e in ESTADOS for i in range(1, 3)], dtype=object)
+    idx_origen = rng.integers(0, len(ciudades), n)
+    idx_destino = rng.integers(0, len(ciudades), n)
+    edo_origen = estados[idx_origen // 2]
+    edo_destino = estados[idx_destino // 2]
+    cdad_origen = ciudades[idx_origen]
+    cdad_destino = ciudades[idx_destino]
+    proyectos = np.array([f'Proyecto {i}' for i in range(1, 21)], dtype=object)
+    clientes = np.array([f'Cliente {i}' for i in range(1, 16)], dtype=object)
+    conductores = np.array([f'Conductor {i}' for i in range(1, int(n_tractos * 1.3) + 2)], dtype=object)
+
+    # Periodo 'AAAA-MM' construido sobre los meses únicos en lugar de formatear cada fecha
+    anio_mes = inicio.year.to_numpy() * 12 + (inicio.month.to_numpy() - 1)
+    unicos, inverso = np.unique(anio_mes, return_inverse=True)
+    etiquetas = np.array([f'{am // 12}-{am % 12 + 1:02d}' for am in unicos], dtype=object)
+
+    df = pd.DataFrame({
+        'EC': rng.choice(np.array(['EC Norte', 'EC Centro', 'EC Sur'], dtype=object), n),
+        'Proyecto': rng.choice(proyectos, n),
+        'Cliente': rng.choice(clientes, n),
+        'Tracto': tractos,
+        'Inicio de la Orden': inicio,
+        'Cierre de la Orden': cierre,
+        'Duración Viaje (hrs)': np.round(duracion_h, 2),
+        'Edo. Origen': edo_origen,
+        'Edo. Destino': edo_destino,
+        'Cdad. Origen': cdad_origen,
+        'Cdad. Destino': cdad_destino,
+        'Ruta Estados': edo_origen + ' - ' + edo_destino,
+        'Ruta Ciudades': cdad_origen + ' - ' + cdad_destino,
+        'Conductor': rng.choice(conductores, n),
+        'kmstotales': kms,
+        'No. Remolques': rng.integers(1, 3, n),
+        'Litros': litros,
+        'Costo por litro': costo_litro,
+        'Costo Combustible': costo_combustible,
+        'Costo Peajes': costo_peajes,
+        'Costo Mantenimiento': costo_mant,
+        'Costo Total': costo_total,
+        'CPK Orden': np.where(kms > 0, costo_total / np.where(kms > 0, kms, 1), 0.0),
+        'Periodo': etiquetas[inverso],
+        'No. Viajes': np.ones(n, dtype=int),
+        'Orden con Costo de Combustible': carga,
+        'Orden con Costo de Peajes': costo_peajes > 0,
+        'Orden con Costo de Mantenimiento': costo_mant > 0,
+    })
+
+    df = df.sort_values('Inicio de la Orden', kind='mergesort').reset_index(drop=True)
+    df.insert(0, 'No. Orden', np.arange(1, n + 1))
+    return df
@@ -0,0 +1,219 @@
+# Este archivo mide cómo escalan las funciones de cálculo y visualización de la app con el tamaño de la flota.
+
+# Función: medir
+# - Ejecuta una función varias veces y registra el tiempo (mínimo y mediana) y, en una pasada aparte, el pico de memoria
+#   con tracemalloc, para que el rastreo de memoria no contamine los tiempos.
+
+# Función: casos_benchmark
+# - Define los casos a medir para un DataFrame de órdenes: historial_entre_cargas, agrupar_componentes_cpk,
+#   historial_entre_cargas por conductor, historial_entre_mantenimientos, df_completitud, show_info_columns, get_viz_figure (3 tipos), precalcular_acumulados_tracto, plot_acumulado_vs_kms,
+#   cubo_rutas, top_rutas, actualizar_anomalias y el índice de intervalos (construcción, ventana por tracto contra la máscara
+#   sobre toda la tabla y tractos en ruta en un momento).
+# - Las funciones con agregaciones se miden con cada motor pedido (pandas y, si están instalados, Polars o DuckDB), con el motor
+#   entre corchetes en el nombre del caso para compararlos lado a lado.
+
+# Función: ejecutar_suite
+# - Genera datos sintéticos para cada tamaño, corre todos los casos y devuelve un reporte en formato dict (JSON).
+
+# Uso:
+#   python -m benchmarks.suite --tamanos 10000 100000 1000000 5000000 --salida benchmark_report.json
+#   python -m benchmarks.suite --tamanos 100000 1000000 --motores pandas polars duckdb
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datos_sinteticos import generar_ordenes
+from nucleo.motor import MOTORES, polars_disponible
+from nucleo.consultas import duckdb_disponible
+
+# Filas máximas por función cuando su costo crece demasiado para medirla en todos los tamaños.
+# Se puede desactivar con --sin-limites. historial_entre_cargas ya no tiene límite: se calcula con el motor vectorizado de nucleo/segmentos.py.
+LIMITES_FILAS = {}
+
+def medir(funcion, repeticiones=3, medir_memoria=True):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+
+    memoria_pico_mb = None
+    if medir_memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        memoria_pico_mb = pico / 1024 ** 2
+
+    return {
+        'tiempo_min_s': min(tiempos),
+        'tiempo_mediana_s': statistics.median(tiempos),
+        'memoria_pico_mb': memoria_pico_mb,
+    }
+
+def casos_benchmark(df, historial_cargas, n_tractos_multi=20, motores=('pandas',)):
+    # Los imports van aquí para que la generación de datos no dependa de Streamlit/Plotly
+    from nucleo.historial import historial_entre_cargas, historial_entre_mantenimientos
+    from nucleo.cpk import agrupar_componentes_cpk
+    from nucleo.estadisticas import df_completitud
+    from nucleo.tractos import precalcular_acumulados_tracto
+    from nucleo.rutas import cubo_rutas, top_rutas
+    from nucleo.anomalias import iniciar_estado, actualizar_anomalias
+    from nucleo.intervalos import indice_intervalos, ordenes_en_ventana, tractos_en_ruta
+    from utils import show_info_columns
+    from graph_hist_utils import get_viz_figure
+    from tracto_utils import plot_acumulado_vs_kms
+
+    tractos = df['Tracto'].unique()
+    casos = {
+        'show_info_columns': lambda: show_info_columns(df),
+        'get_viz_figure (Barras)': lambda: get_viz_figure(df, 'kmstotales', 'Barras'),
+        'get_viz_figure (Boxplot)': lambda: get_viz_figure(df, 'kmstotales', 'Boxplot'),
+        'get_viz_figure (Pastel)': lambda: get_viz_figure(df, 'kmstotales', 'Pastel'),
+        'precalcular_acumulados_tracto': lambda: precalcular_acumulados_tracto(df),
+        'plot_acumulado_vs_kms (1 tracto)': lambda: plot_acumulado_vs_kms(df, list(tractos[:1])),
+    }
+    for motor in motores:
+        # Sin sufijo para pandas, para que los reportes anteriores sigan siendo comparables
+        sufijo = '' if motor == 'pandas' else f' [{motor}]'
+        casos[f'historial_entre_cargas{sufijo}'] = lambda motor=motor: historial_entre_cargas(df, motor=motor)
+        casos[f'historial_entre_cargas (Conductor){sufijo}'] = lambda motor=motor: historial_entre_cargas(df, motor=motor, clave='Conductor')
+        casos[f'historial_entre_mantenimientos{sufijo}'] = lambda motor=motor: historial_entre_mantenimientos(df, motor=motor)
+        casos[f'df_completitud{sufijo}'] = lambda motor=motor: df_completitud(df.copy(), motor=motor)
+        if historial_cargas is not None:
+            casos[f'agrupar_componentes_cpk{sufijo}'] = lambda motor=motor: agrupar_componentes_cpk(df, historial_cargas, motor=motor)
+
+    acumulados = precalcular_acumulados_tracto(df)
+    multi = list(tractos[:n_tractos_multi])
+    casos[f'plot_acumulado_vs_kms ({len(multi)} tractos, precalculado)'] = (
+        lambda: plot_acumulado_vs_kms(None, multi, acumulados=acumulados)
+    )
+
+    casos['cubo_rutas'] = lambda: cubo_rutas(df, 'Ruta Ciudades')
+    cubo = cubo_rutas(df, 'Ruta Ciudades')
+    casos['top_rutas (CPK, k=20)'] = lambda: top_rutas(cubo, 'CPK', k=20)
+    if historial_cargas is not None:
+        casos['actualizar_anomalias'] = lambda: actualizar_anomalias(iniciar_estado(), historial_cargas)
+
+    # Ventana de la mitad del periodo para un tracto: máscara sobre toda la tabla contra búsqueda en el índice
+    casos['indice_intervalos'] = lambda: indice_intervalos(df)
+    intervalos = indice_intervalos(df)
+    desde, hasta = df['Inicio de la Orden'].quantile([0.25, 0.75])
+    tracto = tractos[0]
+    casos['ventana por tracto (máscara)'] = lambda: df[
+        (df['Inicio de la Orden'] >= desde) & (df['Cierre de la Orden'] < hasta) & (df['Tracto'] == tracto)
+    ]
+    casos['ventana por tracto (intervalos)'] = lambda: df.take(ordenes_en_ventana(intervalos, tracto, desde, hasta))
+    casos['tractos_en_ruta'] = lambda: tractos_en_ruta(intervalos, desde)
+    return casos
+
+def ejecutar_suite(tamanos, ordenes_por_tracto=250, meses=12, repeticiones=3, medir_memoria=True, limites=LIMITES_FILAS, semilla=0,
+                  motores=('pandas',)):
+    """
+    Corre todos los casos para cada tamaño de datos.
+    Args:
+        tamanos: lista con el número de órdenes a generar en cada corrida.
+        ordenes_por_tracto: órdenes por tracto; el número de tractos se deriva del tamaño.
+        meses: meses que cubren las órdenes.
+        repeticiones: corridas de tiempo por caso.
+        medir_memoria: si se hace la pasada extra con tracemalloc.
+        limites: dict función -> filas máximas; los casos por encima se registran como omitidos.
+        motores: motores de agregación a comparar ('pandas', 'polars').
+    Returns:
+        reporte: dict con 'metadatos' y 'resultados' (una entrada por función y tamaño).
+    """
+    from nucleo.historial import historial_entre_cargas
+
+    # Se mide el cálculo, no la lectura del caché en disco (nucleo/cache_disco.py)
+    os.environ['PYTRACK_CACHE_DISCO'] = '0'
+
+    resultados = []
+    for tamano in tamanos:
+        n_tractos = max(1, tamano // ordenes_por_tracto)
+        t0 = time.perf_counter()
+        df = generar_ordenes(n_tractos=n_tractos, ordenes_por_tracto=ordenes_por_tracto, meses=meses, semilla=semilla)
+        tiempo_generacion = time.perf_counter() - t0
+        print(f"[{len(df):,} órdenes | {n_tractos:,} tractos] datos generados en {tiempo_generacion:.1f} s")
+
+        # agrupar_componentes_cpk necesita el historial; si el historial excede su límite, tampoco se mide
+        historial_cargas = None
+        if len(df) <= limites.get('historial_entre_cargas', np.inf):
+            historial_cargas, _ = historial_entre_cargas(df)
+
+        for nombre, funcion in casos_benchmark(df, historial_cargas, motores=motores).items():
+            base = nombre.split(' (')[0].split(' [')[0]
+            registro = {'funcion': nombre, 'filas': len(df), 'tractos': n_tractos}
+            if len(df) > limites.get(base, np.inf):
+                registro['estado'] = f'omitido (límite de {limites[base]:,} filas)'
+            else:
+                registro.update(medir(funcion, repeticiones=repeticiones, medir_memoria=medir_memoria))
+                registro['estado'] = 'ok'
+                print(f"  {nombre:<55} {registro['tiempo_min_s']:>9.4f} s")
+            resultados.append(registro)
+
+        if historial_cargas is None:
+            resultados.append({
+                'funcion': 'agrupar_componentes_cpk', 'filas': len(df), 'tractos': n_tractos,
+                'estado': 'omitido (depende de historial_entre_cargas)'
+            })
+
+    return {
+        'metadatos': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'ordenes_por_tracto': ordenes_por_tracto,
+            'meses': meses,
+            'repeticiones': repeticiones,
+            'motores': list(motores),
+        },
+        'resultados': resultados,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de escalamiento de PyTrack con datos sintéticos.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000],
+                        help="Número de órdenes por corrida.")
+    parser.add_argument('--ordenes-por-tracto', type=int, default=250)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-memoria', action='store_true', help="No hace la pasada con tracemalloc.")
+    parser.add_argument('--sin-limites', action='store_true', help="Mide todas las funciones en todos los tamaños.")
+    parser.add_argument('--motores', nargs='+', choices=MOTORES, default=['pandas'],
+                        help="Motores de agregación a comparar.")
+    parser.add_argument('--salida', default='benchmark_report.json')
+    args = parser.parse_args(argv)
+
+    if 'polars' in args.motores and not polars_disponible():
+        parser.error("Polars no está instalado; instala polars para compararlo con pandas.")
+    if 'duckdb' in args.motores and not duckdb_disponible():
+        parser.error("DuckDB no está instalado; instala duckdb para compararlo con pandas.")
+
+    reporte = ejecutar_suite(
+        args.tamanos,
+        ordenes_por_tracto=args.ordenes_por_tracto,
+        meses=args.meses,
+        repeticiones=args.repeticiones,
+        medir_memoria=not args.sin_memoria,
+        limites={} if args.sin_limites else LIMITES_FILAS,
+        motores=args.motores,
+    )
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"Reporte guardado en {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,6 @@
 
-# Este archivo contiene funciones para calcular y visualizar el Costo Por Kilómetro (CPK) desglosado por componentes.
-
-# Función: agrupar_componentes_cpk
-# - Agrupa y calcula el CPK de combustible, peajes y mantenimiento bajo diferentes criterios (todas las órdenes, solo con costo, solo con componente, entre cargas).
-# - Devuelve un DataFrame con todos los indicadores necesarios para el análisis comparativo.
+# Este archivo contiene funciones para visualizar el Costo Por Kilómetro (CPK) desglosado por componentes.
+# Los cálculos (agrupar_componentes_cpk) viven en nucleo/cpk.py.
 
 # Función: plot_cpk_barras_comparativo
 # - Genera un gráfico de barras apiladas con Plotly para comparar el CPK por periodo y por criterio de agrupación.
@@ -12,87 +9,17 @@
 
 # Función: cpk_desglosado
 # - Orquesta el cálculo y visualización del CPK desglosado.
-# - Llama a las funciones anteriores y muestra los resultados en la app Streamlit.
+# - Llama a los cálculos de nucleo/cpk.py y a las gráficas y muestra los resultados en la app Streamlit.
 # - Permite al usuario comparar visualmente los componentes de costo y su evolución.
+# - Muestra los indicadores por día, semana, mes o trimestre: las sumas diarias se calculan una vez por selección
+#   de órdenes y se reagrupan a la granularidad elegida.
+# - Con el mapeo orden -> segmento, el criterio Entre Cargas también respeta los filtros (segmentos que tocan las órdenes filtradas).
+# - Junto a cada comparación muestra la deriva (media móvil ± desviación estándar) de la variable en todos los periodos.
+# - La tabla de CPK por periodo y criterio se puede descargar en CSV, Parquet o Excel (exportar_utils.py).
 
-def agrupar_componentes_cpk(df,historial_cargas):
-
-    import pandas as pd
-
-    df_agg_all = df.groupby('Periodo').agg({'Costo Combustible':'sum', 'Costo Peajes':'sum', 'Costo Mantenimiento':'sum', 'kmstotales':'sum','Litros':'sum'}).sort_values('Periodo', ascending=True)
-    df_agg_all['CPK Combustible (Todas las Órdenes)'] = df_agg_all['Costo Combustible'] / df_agg_all['kmstotales']
-    df_agg_all['CPK Peajes (Todas las Órdenes)'] = df_agg_all['Costo Peajes'] / df_agg_all['kmstotales']
-    df_agg_all['CPK Mantenimiento (Todas las Órdenes)'] = df_agg_all['Costo Mantenimiento'] / df_agg_all['kmstotales']
-    df_agg_all['Rendimiento Kms/Litro (Todas las Órdenes)'] = df_agg_all['kmstotales'] / df_agg_all['Litros']
-    df_agg_all['No. Órdenes Consideradas (Todas las Órdenes)'] = df.groupby('Periodo').size()
-    df_agg_all['Costo por Litro (Todas las Órdenes)'] = df_agg_all['Costo Combustible'] / df_agg_all['Litros']
-
-
-
-    df_agg_all['Costo Combustible (Todas las Órdenes)'] = df_agg_all['Costo Combustible'].fillna(0)
-    df_agg_all['Litros (Todas las Órdenes)'] = df_agg_all['Litros'].fillna(0)
-
-    df_filtered = df[df['Costo Total'] > 0].copy()
-    df_agg_filtered = df_filtered.groupby('Periodo').agg({'Costo Combustible':'sum', 'Costo Peajes':'sum', 'Costo Mantenimiento':'sum', 'kmstotales':'sum','Litros':'sum'}).sort_values('Periodo', ascending=True)
-    df_agg_filtered['CPK Combustible (Órdenes con costo)'] = df_agg_filtered['Costo Combustible'] / df_agg_filtered['kmstotales']
-    df_agg_filtered['CPK Peajes (Órdenes con costo)'] = df_agg_filtered['Costo Peajes'] / df_agg_filtered['kmstotales']
-    df_agg_filtered['CPK Mantenimiento (Órdenes con costo)'] = df_agg_filtered['Costo Mantenimiento'] / df_agg_filtered['kmstotales']
-    df_agg_filtered['Rendimiento Kms/Litro (Órdenes con costo)'] = df_agg_filtered['kmstotales'] / df_agg_filtered['Litros']
-    df_agg_filtered['No. Órdenes Consideradas (Órdenes con costo)'] = df_filtered.groupby('Periodo').size()
-    df_agg_filtered['Costo por Litro (Órdenes con costo)'] = df_agg_filtered['Costo Combustible'] / df_agg_filtered['Litros']
-
-    df_componente_comb = df[df['Orden con Costo de Combustible'] == True].copy()
-    df_componente_peajes = df[df['Orden con Costo de Peajes'] == True].copy()
-    df_componente_mant = df[df['Orden con Costo de Mantenimiento'] == True].copy()
-
-    df_agg_componente_comb = df_componente_comb.groupby('Periodo').agg({'Costo Combustible':'sum', 'kmstotales':'sum','Litros':'sum'}).sort_values('Periodo', ascending=True)
-    df_agg_componente_comb['CPK Combustible (Órdenes con Componente)'] = df_agg_componente_comb['Costo Combustible'] / df_agg_componente_comb['kmstotales']
-    df_agg_componente_comb['Rendimiento Kms/Litro (Órdenes con Componente)'] = df_agg_componente_comb['kmstotales'] / df_agg_componente_comb['Litros']
-    df_agg_componente_comb['No. Órdenes Consideradas (Órdenes con Combustible)'] = df_componente_comb.groupby('Periodo').size()
-    df_agg_componente_comb['Costo por Litro (Órdenes con Componente)'] = df_agg_componente_comb['Costo Combustible'] / df_agg_componente_comb['Litros']
-
-    df_agg_componente_peajes = df_componente_peajes.groupby('Periodo')[['Costo Peajes', 'kmstotales']].sum().sort_values('Periodo', ascending=True)
-    df_agg_componente_peajes['CPK Peajes (Órdenes con Componente)'] = df_agg_componente_peajes['Costo Peajes'] / df_agg_componente_peajes['kmstotales']
-    df_agg_componente_peajes['No. Órdenes Consideradas (Órdenes con Peaje)'] = df_componente_peajes.groupby('Periodo').size()
-
-    df_agg_componente_mant = df_componente_mant.groupby('Periodo')[['Costo Mantenimiento', 'kmstotales']].sum().sort_values('Periodo', ascending=True)
-    df_agg_componente_mant['CPK Mantenimiento (Órdenes con Componente)'] = df_agg_componente_mant['Costo Mantenimiento'] / df_agg_componente_mant['kmstotales']
-    df_agg_componente_mant['No. Órdenes Consideradas (Órdenes con Mantenimiento)'] = df_componente_mant.groupby('Periodo').size()
-
-    hist_cargas = historial_cargas[historial_cargas['Periodo'].isin(df['Periodo'].unique())].copy()
-    df_cargaxcarga = hist_cargas.groupby('Periodo').agg({'Costo de Combustible': 'sum','KMs Recorridos desde Última Carga': 'sum','Litros Combustible Cargados': 'sum'})
-    df_cargaxcarga['CPK Combustible (Entre Cargas)'] = df_cargaxcarga['Costo de Combustible'] / df_cargaxcarga['KMs Recorridos desde Última Carga']
-    df_cargaxcarga['Rendimiento Kms/Litro (Entre Cargas)'] = df_cargaxcarga['KMs Recorridos desde Última Carga'] / df_cargaxcarga['Litros Combustible Cargados']
-    df_cargaxcarga['No. Cargas con Combustible'] = hist_cargas.groupby('Periodo').size()
-    df_cargaxcarga['Costo por Litro (Entre Cargas)'] = df_cargaxcarga['Costo de Combustible'] / df_cargaxcarga['Litros Combustible Cargados']
-
-    df_cargaxcarga['CPK Peajes (Entre Cargas)'] = hist_cargas.groupby('Periodo')['Costo de Peajes'].sum() / df_cargaxcarga['KMs Recorridos desde Última Carga']
-    df_cargaxcarga['No. Cargas con Peajes'] = hist_cargas.groupby('Periodo')['Costo de Peajes'].apply(lambda x: (x > 0).sum())
-
-    df_cargaxcarga['CPK Mantenimiento (Entre Cargas)'] = hist_cargas.groupby('Periodo')['Costo de Mantenimiento'].sum() / df_cargaxcarga['KMs Recorridos desde Última Carga']    
-    df_cargaxcarga['No. Cargas con Mantenimiento'] = hist_cargas.groupby('Periodo')['Costo de Mantenimiento'].apply(lambda x: (x > 0).sum())
-   
-
-    df_all = pd.concat([df_agg_all[['CPK Combustible (Todas las Órdenes)', 'CPK Peajes (Todas las Órdenes)', 'CPK Mantenimiento (Todas las Órdenes)',
-                        'Rendimiento Kms/Litro (Todas las Órdenes)', 'No. Órdenes Consideradas (Todas las Órdenes)','Costo por Litro (Todas las Órdenes)']],
-                        
-                        df_agg_filtered[['CPK Combustible (Órdenes con costo)', 'CPK Peajes (Órdenes con costo)', 'CPK Mantenimiento (Órdenes con costo)',
-                        'Rendimiento Kms/Litro (Órdenes con costo)', 'No. Órdenes Consideradas (Órdenes con costo)', 'Costo por Litro (Órdenes con costo)']],
-                        
-                        df_agg_componente_comb[['CPK Combustible (Órdenes con Componente)', 'Rendimiento Kms/Litro (Órdenes con Componente)',
-                         'No. Órdenes Consideradas (Órdenes con Combustible)', 'Costo por Litro (Órdenes con Componente)']],
-
-                        df_agg_componente_peajes[['CPK Peajes (Órdenes con Componente)', 'No. Órdenes Consideradas (Órdenes con Peaje)']],
-                        df_agg_componente_mant[['CPK Mantenimiento (Órdenes con Componente)', 'No. Órdenes Consideradas (Órdenes con Mantenimiento)']], 
-                        
-                        df_cargaxcarga[['CPK Combustible (Entre Cargas)', 'Rendimiento Kms/Litro (Entre Cargas)', 'No. Cargas con Combustible','Costo por Litro (Entre Cargas)',
-                        'CPK Peajes (Entre Cargas)', 'No. Cargas con Peajes', 'CPK Mantenimiento (Entre Cargas)', 'No. Cargas con Mantenimiento']]
-                        ], axis=1)
-
-    df_all.fillna(0, inplace=True)
-
-    return df_all
+from perfilado import instrumentar
 
+@instrumentar
 def plot_cpk_barras_comparativo(
     df_all, 
     componentes=['Combustible', 'Peajes', 'Mantenimiento'], 
@@ -119,11 +46,12 @@ def plot_cpk_barras_comparativo(
         ('Entre Cargas', 'Mantenimiento'): "#22223B",      # Gris oscuro (más oscuro)
     }
 
+    # Columnas (Métrica, Criterio) de df_all
     col_map = {
-        'Todas las Órdenes': lambda comp: f'CPK {comp} (Todas las Órdenes)',
-        'Órdenes con costo': lambda comp: f'CPK {comp} (Órdenes con costo)',
-        'Órdenes con Componente': lambda comp: f'CPK {comp} (Órdenes con Componente)',
-        'Entre Cargas': lambda comp: f'CPK {comp} (Entre Cargas)',
+        'Todas las Órdenes': lambda comp: (f'CPK {comp}', 'Todas las Órdenes'),
+        'Órdenes con costo': lambda comp: (f'CPK {comp}', 'Órdenes con costo'),
+        'Órdenes con Componente': lambda comp: (f'CPK {comp}', 'Órdenes con Componente'),
+        'Entre Cargas': lambda comp: (f'CPK {comp}', 'Entre Cargas'),
     }
     pos_map = {
         'Todas las Órdenes': -0.3,
@@ -139,21 +67,6 @@ def plot_cpk_barras_comparativo(
 
     fig = go.Figure()
 
-    ordenes_col_map = {
-        'Todas las Órdenes': 'No. Órdenes Consideradas (Todas las Órdenes)',
-        'Órdenes con costo': 'No. Órdenes Consideradas (Órdenes con costo)',
-        'Órdenes con Componente': {
-            'Combustible': 'No. Órdenes Consideradas (Órdenes con Combustible)',
-            'Peajes': 'No. Órdenes Consideradas (Órdenes con Peaje)',
-            'Mantenimiento': 'No. Órdenes Consideradas (Órdenes con Mantenimiento)'
-        },
-        'Entre Cargas': {
-            'Combustible': 'No. Cargas con Combustible',
-            'Peajes': 'No. Cargas con Peajes',
-            'Mantenimiento': 'No. Cargas con Mantenimiento'
-        }
-    }
-
     for grupo in grupos:
         comps_presentes = []
         custom_cols = []
@@ -166,16 +79,13 @@ def plot_cpk_barras_comparativo(
             col = col_map[grupo](comp)
             y_vals = df_all[col]
             base = 0
-            if comp == 'Peajes' and f'CPK Combustible ({grupo})' in df_all.columns:
+            if comp == 'Peajes' and col_map[grupo]('Combustible') in df_all.columns:
                 base = df_all[col_map[grupo]('Combustible')]
-            elif comp == 'Mantenimiento' and all(f'CPK {c} ({grupo})' in df_all.columns for c in ['Combustible', 'Peajes']):
+            elif comp == 'Mantenimiento' and all(col_map[grupo](c) in df_all.columns for c in ['Combustible', 'Peajes']):
                 base = df_all[col_map[grupo]('Combustible')] + df_all[col_map[grupo]('Peajes')]
 
             suma_total = np.sum(custom_cols, axis=0) if custom_cols else np.zeros_like(y_vals)
-            if isinstance(ordenes_col_map[grupo], dict):
-                ordenes_col_name = ordenes_col_map[grupo].get(comp)
-            else:
-                ordenes_col_name = ordenes_col_map[grupo]
+            ordenes_col_name = (f'No. Consideradas {comp}', grupo)
             n_ordenes_col = df_all[ordenes_col_name] if ordenes_col_name in df_all.columns else np.full_like(y_vals, np.nan)
             
             customdata = np.stack(
@@ -251,14 +161,27 @@ def plot_cpk_barras_comparativo(
     
     return fig
 
-def cpk_desglosado(df,historial_cargas):
+@instrumentar
+def cpk_desglosado(df,historial_cargas, ordenes_segmento=None, granularidad='mes', diario=None):
 
-    from calculos_cpk import agrupar_componentes_cpk, plot_cpk_barras_comparativo
-    from comparar_comp_utils import comparar_componentes_cpk, construir_df_cpk_periodo
+    from nucleo.cpk import calcular_sumas_diarias_cpk, agrupar_componentes_cpk, construir_df_cpk_periodo, ventanas_moviles_cpk
+    from comparar_comp_utils import comparar_componentes_cpk, plot_deriva_cpk
+    from exportar_utils import boton_exportar
+    from nucleo.exportar import aplanar_columnas
     import streamlit as st
     import pandas as pd
 
-    df_all = agrupar_componentes_cpk(df, historial_cargas)
+    # Las sumas diarias pueden venir precalculadas (precálculo o artefactos del modo batch) cuando no hay filtros activos;
+    # si no, se calculan una vez por selección de órdenes y cambiar de granularidad solo las reagrupa
+    if diario is None:
+        cache_diario = st.session_state.setdefault('cache_diario_cpk', {})
+        clave_diario = (len(df), int(pd.util.hash_pandas_object(df['No. Orden'], index=False).sum()))
+        if clave_diario not in cache_diario:
+            if len(cache_diario) >= 8:
+                cache_diario.pop(next(iter(cache_diario)))
+            cache_diario[clave_diario] = calcular_sumas_diarias_cpk(df, historial_cargas, ordenes_segmento=ordenes_segmento)
+        diario = cache_diario[clave_diario]
+    df_all = agrupar_componentes_cpk(df, historial_cargas, granularidad=granularidad, diario=diario)
     fig = plot_cpk_barras_comparativo(
         df_all,
         componentes=['Combustible', 'Peajes'],
@@ -267,6 +190,9 @@ def cpk_desglosado(df,historial_cargas):
         height=800
     )
     st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Exportar tabla de CPK", expanded=False):
+        boton_exportar(lambda: aplanar_columnas(df_all), f"cpk_{granularidad}", key="cpk")
     
     df_cpk_periodo = construir_df_cpk_periodo(df_all, grupos=['todas', 'costo', 'componente', 'cargas'])
 
@@ -274,13 +200,8 @@ def cpk_desglosado(df,historial_cargas):
 
     st.info(""" Selecciona un periodo para comparar los indicadores de rendimiento (CPK, Rendimiento Kms/Litro, Costo por Litro) entre los componentes (Combustible, Peajes).""")
 
-    df['Periodo'] = pd.PeriodIndex(df['Periodo'], freq='M')
-
-    # selecciona rango de periodos
-    periodo_inicio = df['Periodo'].min()
-    periodo_fin = df['Periodo'].max()
-
-    periodos_opciones = sorted(df['Periodo'].unique())
+    # Periodos de la granularidad elegida (etiquetas de texto, ya ordenadas); df no se modifica
+    periodos_opciones = df_cpk_periodo.index.tolist()
 
     col1, col2 = st.columns([2, 3])
 
@@ -289,10 +210,10 @@ def cpk_desglosado(df,historial_cargas):
             "Selecciona el periodo para comparar CPK",
             options=periodos_opciones,
             value=(periodos_opciones[0], periodos_opciones[-1]),
-            format_func=lambda x: x.strftime('%b %Y')
+            format_func=lambda x: pd.Period(x, freq='M').strftime('%b %Y') if granularidad == 'mes' else x
         )
 
-    periodo_strs = [str(p) for p in periodo_seleccionado]
+    periodo_strs = list(periodo_seleccionado)
 
     st.markdown(
         f"""
@@ -324,6 +245,26 @@ def cpk_desglosado(df,historial_cargas):
             max_selections=3  # Streamlit >= 1.27
         )
 
+    with col2:
+        ventana = st.number_input(
+            "Ventana móvil (periodos) para la deriva",
+            min_value=1,
+            max_value=max(1, len(df_cpk_periodo)),
+            value=min(3, max(1, len(df_cpk_periodo))),
+            step=1,
+            key="ventana_deriva_cpk"
+        )
+
+    # Indicadores móviles de todas las métricas y criterios: se calculan una vez por selección
+    # (datos filtrados + ventana) y se reutilizan en los reruns siguientes
+    cache_moviles = st.session_state.setdefault('cache_moviles_cpk', {})
+    clave_moviles = (int(ventana), tuple(df_cpk_periodo.index.astype(str)), hash(df_cpk_periodo.to_numpy().tobytes()))
+    if clave_moviles not in cache_moviles:
+        if len(cache_moviles) >= 8:
+            cache_moviles.pop(next(iter(cache_moviles)))
+        cache_moviles[clave_moviles] = ventanas_moviles_cpk(df_cpk_periodo, ventana=int(ventana))
+    moviles = cache_moviles[clave_moviles]
+
     if len(seleccionadas) == 0:
         st.info("Selecciona al menos una variable para mostrar los gráficos.")
     else:
@@ -340,4 +281,15 @@ def cpk_desglosado(df,historial_cargas):
  
                 )
                 st.plotly_chart(fig, use_container_width=True)
+
+                fig_deriva = plot_deriva_cpk(
+                    moviles,
+                    variable=variable,
+                    ventana=int(ventana),
+                    periodos=periodo_strs,
+                    width=600,
+                    height=600,
+                    es_dinero=variable in ['CPK Peajes', 'CPK Combustible', 'Costo por Litro']
+                )
+                st.plotly_chart(fig_deriva, use_container_width=True)
         
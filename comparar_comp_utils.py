@@ -1,9 +1,6 @@
 
-# Este archivo contiene funciones para comparar los componentes de CPK entre diferentes periodos y criterios.
-
-# Función: construir_df_cpk_periodo
-# - Construye un DataFrame con los valores de CPK y otros indicadores por periodo y grupo de análisis.
-# - Facilita la comparación entre diferentes métodos de cálculo.
+# Este archivo contiene funciones para graficar la comparación de los componentes de CPK entre periodos y criterios.
+# Los cálculos (construir_df_cpk_periodo, ventanas_moviles_cpk) viven en nucleo/cpk.py.
 
 # Función: construir_titulo
 # - Genera un título legible para los gráficos de comparación, basado en la variable y los periodos seleccionados.
@@ -16,79 +13,11 @@
 # - El formato de los labels respeta el parámetro es_dinero para mostrar o no el signo $.
 # - Es clave para el análisis visual comparativo de los indicadores de rendimiento.
 
-def construir_df_cpk_periodo(df_all, grupos=['todas', 'costo', 'componente', 'cargas']):
-    
-    """
-    Construye un DataFrame de CPK por periodo según los grupos seleccionados.
-    Args:
-        df_all: DataFrame fuente con columnas de CPK por grupo.
-        grupos: lista de grupos a incluir. Opciones:
-            'todas'      -> Todas las Órdenes
-            'costo'      -> Órdenes con costo
-            'componente' -> Órdenes con el Componente
-            'cargas'     -> Por Cargas
-    Returns:
-        df_cpk_periodo: DataFrame con los CPK seleccionados.
-    """
-    
-    import pandas as pd
+# Función: plot_deriva_cpk
+# - Grafica la media móvil ± desviación estándar de una variable por criterio, para ubicar cuándo se desvió el CPK.
+
+from perfilado import instrumentar
 
-    columnas = {}
-    if 'todas' in grupos:
-        columnas.update({
-            'CPK Combustible (Todas las Órdenes)': df_all['CPK Combustible (Todas las Órdenes)'],
-            'CPK Peajes (Todas las Órdenes)': df_all['CPK Peajes (Todas las Órdenes)'],
-            'Total CPK (Todas las Órdenes)': (
-                df_all['CPK Combustible (Todas las Órdenes)'] +
-                df_all['CPK Peajes (Todas las Órdenes)']
-            ),
-            'Rendimiento Kms/Litro (Todas las Órdenes)': df_all['Rendimiento Kms/Litro (Todas las Órdenes)'],
-            'Costo por Litro (Todas las Órdenes)': df_all['Costo por Litro (Todas las Órdenes)'],
-            'No. Órdenes Consideradas (Todas las Órdenes)': df_all['No. Órdenes Consideradas (Todas las Órdenes)'],
-        })
-    if 'costo' in grupos:
-        columnas.update({
-            'CPK Combustible (Órdenes con costo)': df_all['CPK Combustible (Órdenes con costo)'],
-            'CPK Peajes (Órdenes con costo)': df_all['CPK Peajes (Órdenes con costo)'],
-            'Total CPK (Órdenes con costo)': (
-                df_all['CPK Combustible (Órdenes con costo)'] +
-                df_all['CPK Peajes (Órdenes con costo)']
-            ),
-            'Rendimiento Kms/Litro (Órdenes con costo)': df_all['Rendimiento Kms/Litro (Órdenes con costo)'],
-            'Costo por Litro (Órdenes con costo)': df_all['Costo por Litro (Órdenes con costo)'],
-            'No. Órdenes Consideradas (Órdenes con costo)': df_all['No. Órdenes Consideradas (Órdenes con costo)'],
-        })
-    if 'componente' in grupos:
-        columnas.update({
-            'CPK Combustible (Órdenes con el Componente)': df_all['CPK Combustible (Órdenes con Componente)'],
-            'CPK Peajes (Órdenes con el Componente)': df_all['CPK Peajes (Órdenes con Componente)'],
-            'Total CPK (Órdenes con el Componente)': (
-                df_all['CPK Combustible (Órdenes con Componente)'] +
-                df_all['CPK Peajes (Órdenes con Componente)']
-            ),
-            'Rendimiento Kms/Litro (Órdenes con el Componente)': df_all['Rendimiento Kms/Litro (Órdenes con Componente)'],
-            'Costo por Litro (Órdenes con el Componente)': df_all['Costo por Litro (Órdenes con Componente)'],
-            'No. Órdenes Consideradas (Órdenes con Combustible)': df_all['No. Órdenes Consideradas (Órdenes con Combustible)'],
-        })
-    if 'cargas' in grupos:
-        columnas.update({
-            'CPK Combustible (Entre Cargas)': df_all['CPK Combustible (Entre Cargas)'],
-            'CPK Peajes (Entre Cargas)': df_all['CPK Peajes (Entre Cargas)'],
-            'Total CPK (Entre Cargas)': (
-                df_all['CPK Combustible (Entre Cargas)'] +
-                df_all['CPK Peajes (Entre Cargas)']
-            ),
-            'Rendimiento Kms/Litro (Entre Cargas)': df_all['Rendimiento Kms/Litro (Entre Cargas)'],
-            'Costo por Litro (Entre Cargas)': df_all['Costo por Litro (Entre Cargas)'],
-            'No. Cargas con Combustible': df_all['No. Cargas con Combustible'],
-            'No. Cargas con Peajes': df_all['No. Cargas con Peajes'],
-            'No. Cargas con Mantenimiento': df_all['No. Cargas con Mantenimiento'],
-        })
-    df_cpk_periodo = pd.DataFrame(columnas)
-    df_cpk_periodo.index.name = 'Periodo'
-    return df_cpk_periodo
-
-# --- Construcción automática del título ---
 def construir_titulo(variable, periodos):
     # Variable legible
     var_legible = variable.replace('CPK', 'CPK').replace('Total', 'Total').replace('(', '').replace(')', '')
@@ -103,6 +32,7 @@ def construir_titulo(variable, periodos):
 def labels_arriba(media, std, decimales=3, sep=1):
     return [m + s + sep*max(media+std) for m, s in zip(media, std)]
 
+@instrumentar
 def comparar_componentes_cpk(df_cpk_periodo, variable='CPK Combustible', periodos=None, width=800, height=900, es_dinero=False):
     import plotly.graph_objects as go
     import pandas as pd
@@ -112,10 +42,8 @@ def comparar_componentes_cpk(df_cpk_periodo, variable='CPK Combustible', periodo
         periodos = df_cpk_periodo.index.tolist()
 
 
-    cols = df_cpk_periodo.filter(like=variable).columns
-
     # Limpia NaN e inf antes de calcular media y std
-    datos = df_cpk_periodo.loc[periodos, cols].replace([np.inf, -np.inf], np.nan).dropna()
+    datos = df_cpk_periodo.xs(variable, axis=1, level='Métrica').loc[periodos].replace([np.inf, -np.inf], np.nan).dropna()
 
     if datos.empty:
         import streamlit as st
@@ -139,21 +67,15 @@ def comparar_componentes_cpk(df_cpk_periodo, variable='CPK Combustible', periodo
 
     PALETA = ['#4361EE', '#5086F2', '#F9C74F', '#222']
 
-    # Mapeo de nombres de columna a nombres cortos de grupo
+    # Nombre que se muestra para cada criterio
     grupo_map = {
         "Todas las Órdenes": "Todas las Órdenes",
         "Órdenes con costo": "Órdenes con costo",
-        "Órdenes con el Componente": "Órdenes con el Componente",
+        "Órdenes con Componente": "Órdenes con el Componente",
         "Entre Cargas": "Entre Cargas"
     }
-    # Busca el grupo en el nombre de la columna
-    def extraer_grupo(col):
-        for k in grupo_map:
-            if k in col:
-                return grupo_map[k]
-        return col  # fallback
 
-    labels_x = [extraer_grupo(col) for col in media.index]
+    labels_x = [grupo_map.get(criterio, criterio) for criterio in media.index]
 
     y_label_pos = labels_arriba(media.values, std.values, decimales=3, sep=0.08)
 
@@ -211,3 +133,68 @@ def comparar_componentes_cpk(df_cpk_periodo, variable='CPK Combustible', periodo
     )
 
     return fig
+
+@instrumentar
+def plot_deriva_cpk(moviles, variable='CPK Combustible', ventana=3, periodos=None, width=800, height=600, es_dinero=False):
+    import plotly.graph_objects as go
+    import numpy as np
+
+    PALETA = ['#4361EE', '#5086F2', '#F9C74F', '#222']
+
+    media = moviles['media'].xs(variable, axis=1, level='Métrica')
+    std = moviles['std'].xs(variable, axis=1, level='Métrica')
+    delta = moviles['delta'].xs(variable, axis=1, level='Métrica')
+    delta_pct = moviles['delta_pct'].xs(variable, axis=1, level='Métrica')
+    x = media.index.astype(str)
+    prefijo = "$" if es_dinero else ""
+
+    fig = go.Figure()
+    for i, criterio in enumerate(media.columns):
+        color = PALETA[i % len(PALETA)]
+        m = media[criterio].to_numpy()
+        s = std[criterio].fillna(0).to_numpy()
+        # Banda de ± desviación estándar
+        fig.add_trace(go.Scatter(
+            x=list(x) + list(x[::-1]),
+            y=list(m + s) + list((m - s)[::-1]),
+            fill='toself',
+            fillcolor=color,
+            opacity=0.15,
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False,
+            legendgroup=criterio
+        ))
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=m,
+            mode='lines+markers',
+            name=criterio,
+            line=dict(color=color, width=2.5),
+            legendgroup=criterio,
+            customdata=np.stack([s, delta[criterio].to_numpy(), delta_pct[criterio].to_numpy()], axis=-1),
+            hovertemplate=(
+                f"<b>{criterio}</b><br>"
+                "Periodo: %{x}<br>"
+                f"Media móvil ({ventana}): {prefijo}%{{y:,.2f}}<br>"
+                f"Desv. estándar: {prefijo}%{{customdata[0]:,.2f}}<br>"
+                f"Cambio vs periodo anterior: {prefijo}%{{customdata[1]:,.2f}} (%{{customdata[2]:.1f}}%)<extra></extra>"
+            )
+        ))
+
+    # Sombrea el rango elegido en el slider para ubicarlo dentro de la tendencia
+    if periodos is not None and len(periodos) > 0:
+        fig.add_vrect(x0=str(periodos[0]), x1=str(periodos[-1]), fillcolor="#F2CD5E", opacity=0.15, line_width=0)
+
+    fig.update_layout(
+        title=f"Deriva de {variable} | media móvil de {ventana} periodos",
+        xaxis_title='Periodo',
+        yaxis_title='Valor',
+        template='plotly_white',
+        width=width,
+        height=height,
+        legend=dict(orientation="h", y=1.08, x=0.01),
+        margin=dict(t=150, l=60, b=60, r=40),
+    )
+
+    return fig
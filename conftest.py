@@ -0,0 +1,6 @@
+# Configuración de pytest: la raíz del repositorio queda en sys.path (nucleo/, benchmarks/ y los módulos de la app)
+# y las pruebas no leen ni escriben el caché en disco (nucleo/cache_disco.py).
+
+import os
+
+os.environ['PYTRACK_CACHE_DISCO'] = '0'
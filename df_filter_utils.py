@@ -5,24 +5,59 @@
 # - Proporciona una interfaz para buscar y filtrar el DataFrame por columna, rango numérico, fechas o valores de texto.
 # - Usa AgGrid para mostrar los resultados filtrados de manera interactiva.
 # - Permite aplicar filtros complejos y ver los resultados en tiempo real.
+# - Usa el catálogo de columnas (nucleo/catalogo.py) para los rangos y las opciones; si no está listo, lo calcula para la columna elegida.
+# - Con la capa de consultas activa (motor 'duckdb' y artefactos en Parquet), el filtro corre como SQL en DuckDB.
+
+# Función: aplicar_filtro
+# - Aplica el filtro elegido sobre las órdenes sin copiarlas: sin filtro regresa el mismo DataFrame, así la selección
+#   de la sesión sigue apuntando a las columnas con memoria mapeada de los artefactos (ver nucleo/compartido.py).
 
 # Función: groupby_interface
 # - Permite al usuario agrupar y resumir los datos por una o más columnas y aplicar funciones de agregación (suma, media, etc.).
-# - Muestra el resultado en una tabla interactiva.
+# - Muestra el resultado en una tabla interactiva; la agregación corre en el motor seleccionado (ver nucleo/motor.py).
 # - Es útil para obtener resúmenes personalizados de los datos filtrados.
 
+from perfilado import instrumentar
+
+def aplicar_filtro(df, column, tipo, valor, tabla_sql=None, condicion=None):
+    """
+    Filtra las órdenes por una columna.
+    Args:
+        df: DataFrame de órdenes (no se modifica ni se copia).
+        column: columna del filtro.
+        tipo: 'num', 'fecha' o texto (ver nucleo/catalogo.py).
+        valor: (mínimo, máximo) para 'num' y 'fecha'; lista de valores para texto (vacía = sin filtro).
+        tabla_sql, condicion: vista DuckDB con las mismas filas que df y su condición SQL; si se dan, el filtro corre en SQL.
+    Returns:
+        filtro: las filas que cumplen el filtro, o df mismo si no hay filtro.
+    """
+    import pandas as pd
+
+    if condicion is not None:
+        from nucleo.consultas import posiciones
+        return df.iloc[posiciones(tabla_sql, condicion)]
+    if tipo == "num":
+        return df[(df[column] >= valor[0]) & (df[column] <= valor[1])]
+    if tipo == "fecha":
+        fechas = pd.to_datetime(df[column]).dt.date
+        return df[(fechas >= valor[0]) & (fechas <= valor[1])]
+    if valor:
+        return df[df[column].astype(str).isin(valor)]
+    return df
+
+@instrumentar
 def search_and_filter_interface(df_search, columnas_contables=[], columnas_forzar_fecha=[], columnas_forzar_str=[], columnas_forzar_num=[]
-                            , include_numeric=True):
+                            , include_numeric=True, tabla_sql=None, catalogo=None):
 
     import streamlit as st
     import pandas as pd
     from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
     import math
-    from turtle import width
     import plotly.graph_objects as go
     import colorsys
     import numpy as np  
     from df_filter_utils import groupby_interface
+    from nucleo.catalogo import tipo_columna, calcular_catalogo
 
     # --- formateador en JS -------
     currency_fmt = JsCode("""
@@ -35,7 +70,8 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
     }
     """)
 
-    df = df_search.copy()
+    # Sin copia: las columnas de los artefactos son vistas de solo lectura sobre la memoria mapeada y aquí solo se leen
+    df = df_search
 
     col1, col2, col3, space = st.columns([2, 5, 2, 3])
     with col1:
@@ -50,27 +86,16 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
         column = st.selectbox("", columnas_disponibles, key="col_select", label_visibility="collapsed")
         
     with col2:
-        # Determinar tipo de columna (forzado o automático)
-        if column in columnas_forzar_fecha:
-            tipo = "fecha"
-        elif column in columnas_forzar_num:
-            tipo = "num"
-        elif column in columnas_forzar_str:
-            tipo = "str"
-        else:
-            if pd.api.types.is_numeric_dtype(df[column]):
-                tipo = "num"
-            elif pd.api.types.is_datetime64_any_dtype(df[column]):
-                tipo = "fecha"
-            elif pd.api.types.is_timedelta64_dtype(df[column]):
-                tipo = "num"
-            else:
-                tipo = "str"
+        # Determinar tipo de columna (forzado o automático); con catálogo precalculado no se recorre la columna
+        entrada = (catalogo or {}).get(column)
+        if entrada is None:
+            entrada = calcular_catalogo(df[[column]], columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num).get(column)
+        tipo = entrada['tipo'] if entrada is not None else tipo_columna(df[column], columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num)
 
         if tipo == "num":
             st.markdown("Selecciona rango numérico:")
-            min_val = math.floor(df[column].min())
-            max_val = math.ceil(df[column].max())
+            min_val = math.floor(entrada['min'] if entrada is not None else df[column].min())
+            max_val = math.ceil(entrada['max'] if entrada is not None else df[column].max())
             # Evitar error de rango inválido
             if min_val == max_val:
                 valor = (min_val, max_val)
@@ -92,8 +117,8 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
                     f"{horas_a_dhm(valor[0])} → {horas_a_dhm(valor[1])}"
                 )
         elif tipo == "fecha":
-            min_date = pd.to_datetime(df[column]).min().date()
-            max_date = pd.to_datetime(df[column]).max().date()
+            min_date = (entrada['min'] if entrada is not None else pd.to_datetime(df[column]).min()).date()
+            max_date = (entrada['max'] if entrada is not None else pd.to_datetime(df[column]).max()).date()
             st.markdown("Selecciona rango de fechas:")
             col_fecha1, col_fecha2 = st.columns(2)
             with col_fecha1:
@@ -111,7 +136,7 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
             valor = (fecha1, fecha2)
         else:
             st.markdown("Valor a buscar:")
-            unique_options = sorted(df[column].dropna().astype(str).unique().tolist())
+            unique_options = entrada['opciones'] if entrada is not None else sorted(df[column].dropna().astype(str).unique().tolist())
             valor = st.multiselect(
                 "",
                 options=unique_options,
@@ -128,20 +153,16 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
         st.markdown("Confirmar:")
         aplicar = st.button("Aplicar Filtro", key="aplicar_btn")
 
+    # Con la capa de consultas (tabla_sql = vista DuckDB sobre el Parquet con las mismas filas y en el mismo orden
+    # que df_search) el filtro corre como SQL y solo se traen los números de fila
+    condicion = None
+    if tabla_sql is not None and ('filtro' not in st.session_state or aplicar):
+        from nucleo.consultas import condicion_filtro, tipos_columnas
+        condicion = condicion_filtro(column, tipo, valor, tipos_columnas(tabla_sql))
+
     # Solo filtra al presionar el botón
     if 'filtro' not in st.session_state or aplicar:
-        if tipo == "num":
-            filtro = df[(df[column] >= valor[0]) & (df[column] <= valor[1])]
-        elif tipo == "fecha":
-            filtro = df[
-                (pd.to_datetime(df[column]).dt.date >= valor[0])
-                & (pd.to_datetime(df[column]).dt.date <= valor[1])
-            ]
-        else:
-            if valor:
-                filtro = df[df[column].astype(str).isin(valor)]
-            else:
-                filtro = df
+        filtro = aplicar_filtro(df, column, tipo, valor, tabla_sql=tabla_sql, condicion=condicion)
         st.session_state.filtro = filtro
     else:
         filtro = st.session_state.filtro
@@ -175,14 +196,15 @@ def search_and_filter_interface(df_search, columnas_contables=[], columnas_forza
 
     return df_filtrado_en_aggrid
         
+@instrumentar
 def groupby_interface(df):
     
     import streamlit as st
     import pandas as pd
     import numpy as np
     from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
-    from turtle import width
     import math
+    from nucleo.motor import agregar_por_grupo
 
     with st.expander("Agrupar y resumir información (opcional)", expanded=False):
 
@@ -235,7 +257,7 @@ def groupby_interface(df):
                 else:
                     funciones_validas[col] = func
             if funciones_validas:
-                resultado = df.groupby(agrupado).agg(funciones_validas).reset_index()
+                resultado = agregar_por_grupo(df, agrupado, funciones_validas).reset_index()
                 st.dataframe(resultado)
             else:
                 st.warning("No hay columnas numéricas seleccionadas para las funciones de agregación numérica.")
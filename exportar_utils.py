@@ -0,0 +1,131 @@
+# Este archivo contiene los botones de descarga de la app Streamlit.
+# La escritura por bloques (CSV, Parquet o Excel) vive en nucleo/exportar.py.
+
+# Función: boton_exportar
+# - Elige el formato y, al presionar "Preparar descarga", escribe la tabla en un archivo temporal en un hilo aparte:
+#   la app sigue respondiendo mientras tanto y la sección muestra el avance.
+# - La tabla se pide a la función obtener solo al preparar la descarga, y se escribe por bloques sin copiarla completa.
+# - Al terminar aparece el botón de descarga: el archivo se lee una sola vez, en el rerun en que termina la exportación,
+#   y se borra en ese momento. Los reruns siguientes de la sección ya no lo vuelven a leer ni a registrar en Streamlit;
+#   para descargarlo otra vez se prepara de nuevo. Una exportación nueva de la misma sección reemplaza a la anterior.
+# - Los archivos viven en una carpeta propia dentro del directorio temporal; los de sesiones que terminaron antes de
+#   mostrar su descarga se borran por antigüedad (EDAD_MAXIMA) cada vez que se prepara una exportación.
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from perfilado import instrumentar
+from nucleo.exportar import FORMATOS, exportar_tabla
+
+# Compartido por todas las sesiones; las exportaciones se encolan si hay más de dos a la vez
+_ejecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='exportar')
+
+NOMBRES_FORMATOS = {'csv': 'CSV', 'parquet': 'Parquet', 'excel': 'Excel'}
+
+DIRECTORIO_EXPORTACIONES = os.path.join(tempfile.gettempdir(), 'pytrack_exportaciones')
+
+# Segundos sin modificarse a partir de los cuales un archivo de exportación se considera abandonado
+EDAD_MAXIMA = 3600
+
+def _barrer(directorio=DIRECTORIO_EXPORTACIONES, edad_maxima=EDAD_MAXIMA):
+    # Archivos de sesiones que se cerraron antes de mostrar su descarga
+    limite = time.time() - edad_maxima
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            # Otra sesión o proceso ya lo borró
+            continue
+
+def _borrar(trabajo):
+    if trabajo is None:
+        return
+    def borrar_archivo(_):
+        if os.path.exists(trabajo['ruta']):
+            os.remove(trabajo['ruta'])
+        trabajo['entregado'] = True
+
+    # Si la exportación anterior sigue corriendo, su archivo se borra al terminar
+    trabajo['futuro'].add_done_callback(borrar_archivo)
+
+@instrumentar
+def boton_exportar(obtener, nombre, key):
+    """
+    Muestra la exportación de una tabla.
+    Args:
+        obtener: función sin argumentos que regresa el DataFrame a exportar (se llama solo al preparar la descarga).
+        nombre: nombre del archivo descargado, sin extensión.
+        key: clave única de la sección para los widgets y el estado de la exportación.
+    """
+    import streamlit as st
+
+    estado = f"exportacion_{key}"
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        formato = st.selectbox("Formato", options=list(FORMATOS), format_func=NOMBRES_FORMATOS.get, key=f"formato_{key}")
+    with col2:
+        st.markdown("Exportar:")
+        preparar = st.button("Preparar descarga", key=f"preparar_{key}")
+
+    if preparar:
+        _borrar(st.session_state.get(estado))
+        tabla = obtener()
+        extension, _ = FORMATOS[formato]
+        os.makedirs(DIRECTORIO_EXPORTACIONES, exist_ok=True)
+        _barrer()
+        descriptor, ruta = tempfile.mkstemp(prefix='pytrack_', suffix=extension, dir=DIRECTORIO_EXPORTACIONES)
+        os.close(descriptor)
+        avance = {'filas': 0, 'total': len(tabla)}
+        st.session_state[estado] = {
+            'futuro': _ejecutor.submit(exportar_tabla, tabla, ruta, formato,
+                                       progreso=lambda filas, total: avance.__setitem__('filas', filas)),
+            'avance': avance,
+            'ruta': ruta,
+            'formato': formato,
+            'nombre': nombre,
+            'entregado': False,
+        }
+
+    trabajo = st.session_state.get(estado)
+    if trabajo is None:
+        return
+
+    if not trabajo['futuro'].done():
+        @st.fragment(run_every=0.5)
+        def _revisar():
+            # En Streamlit 1.37 el fragmento que corre solo reutiliza sus variables de la primera vez; el trabajo se lee de la sesión
+            actual = st.session_state[estado]
+            if actual['futuro'].done():
+                st.rerun()
+            avance = actual['avance']
+            st.progress(avance['filas'] / max(avance['total'], 1),
+                        text=f"Escribiendo {avance['filas']:,} de {avance['total']:,} filas...")
+        _revisar()
+        return
+
+    error = trabajo['futuro'].exception()
+    if error is not None:
+        _borrar(trabajo)
+        st.error(f"No se pudo exportar: {error}")
+        return
+
+    if trabajo['entregado']:
+        st.caption("La descarga ya se mostró; presiona \"Preparar descarga\" para generarla de nuevo.")
+        return
+
+    # Se lee una sola vez: Streamlit guarda los bytes del botón y el archivo temporal ya no hace falta
+    extension, mime = FORMATOS[trabajo['formato']]
+    with open(trabajo['ruta'], 'rb') as archivo:
+        datos = archivo.read()
+    _borrar(trabajo)
+    st.download_button(
+        f"Descargar {NOMBRES_FORMATOS[trabajo['formato']]} ({trabajo['avance']['total']:,} filas)",
+        data=datos,
+        file_name=f"{trabajo['nombre']}{extension}",
+        mime=mime,
+        key=f"descargar_{key}",
+    )
@@ -10,13 +10,13 @@
 # - Calcula y muestra estadísticas descriptivas (media, mediana, cuartiles, etc.) en el gráfico.
 # - Facilita la exploración visual de la distribución de los datos.
 
-import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+from perfilado import instrumentar
 
+@instrumentar
 def streamlit_viz_selector(df,idx = 0, key=""):
+    import streamlit as st
+
     # Detecta columnas numéricas completas (sin strings ni NaN), omite 'Tracto'
     num_cols = [
         col for col in df.columns
@@ -49,6 +49,7 @@ def streamlit_viz_selector(df,idx = 0, key=""):
 
     return seleccionada,tipo_grafico
 
+@instrumentar
 def get_viz_figure(df, seleccionada, tipo_grafico, width=600, height=500, bar_width=0.25):
     import numpy as np
     import plotly.graph_objects as go
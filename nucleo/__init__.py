@@ -0,0 +1,40 @@
+# Núcleo de cálculo de PyTrack. Solo depende de NumPy y pandas (Polars y DuckDB son opcionales, ver motor y consultas);
+# las gráficas y los widgets de Streamlit viven en los módulos *_utils.py de la raíz.
+# El modo batch (artefactos.py), los benchmarks y cualquier proceso sin interfaz importan solo este paquete.
+# - perfilado: estado por rerun, medir e instrumentar (perfilado.py de la raíz los reexporta).
+# - huellas: versión de la base y huellas de su contenido por columna y por tracto.
+# - cache_disco: caché en disco de las funciones costosas, con tamaño máximo.
+# - motor: motor de agregación (pandas, Polars o DuckDB).
+# - consultas: filtro del buscador y agrupaciones en SQL sobre DuckDB embebido.
+# - catalogo: catálogo de columnas del buscador.
+# - periodos: agregados por día y su reagrupación a semana, mes o trimestre.
+# - carga: carga de Base_viz.xlsx o de extractos mensuales en paralelo.
+# - segmentos: segmentación vectorizada entre eventos.
+# - historial: historial entre cargas y entre mantenimientos.
+# - anomalias: cargas atípicas por tracto.
+# - exportar: exportación por bloques a CSV, Parquet o Excel.
+# - compartido: tablas Arrow compartidas entre procesos por memoria mapeada.
+# - cpk: CPK desglosado por componentes y ventanas móviles.
+# - estadisticas: completitud e indicadores estadísticos.
+# - tractos: orden por tracto, offsets y acumulados.
+# - intervalos: índice de inicio a cierre de las órdenes por tracto.
+# - ranking: ranking de la flota.
+# - rutas: cubo de rutas.
+
+from nucleo.huellas import huella_df, huellas_columnas, huellas_por_grupo, metadatos_dataset, cambios
+from nucleo.motor import MOTORES, agregar_por_grupo, polars_disponible, resolver_motor
+from nucleo.consultas import duckdb_disponible, registrar_artefactos, condicion_filtro, posiciones
+from nucleo.catalogo import tipo_columna, calcular_catalogo, catalogo_columnas
+from nucleo.periodos import GRANULARIDADES, sumas_diarias, reagrupar
+from nucleo.carga import cargar_base, cargar_extractos, leer_extracto, archivos_extractos, preparar_base
+from nucleo.segmentos import planear_segmentos, segmentar
+from nucleo.historial import historial_entre_cargas, historial_entre_mantenimientos, segmentos_de_ordenes
+from nucleo.anomalias import METRICAS_ANOMALIAS, iniciar_estado, actualizar_anomalias, conservar_anomalias, cargas_atipicas
+from nucleo.exportar import FORMATOS, exportar_tabla, aplanar_columnas
+from nucleo.compartido import escribir_compartido, leer_compartido, columnas_compartidas
+from nucleo.cpk import CRITERIOS_CPK, METRICAS_CPK, calcular_sumas_diarias_cpk, sumas_diarias_cpk, agrupar_componentes_cpk, construir_df_cpk_periodo, ventanas_moviles_cpk
+from nucleo.estadisticas import calcular_completitud_diaria, completitud_diaria, df_completitud, indicadores_generales, estadisticas_por_orden
+from nucleo.tractos import COLUMNAS_ACUMULADAS, indexar_por_tracto, acumular_por_tracto, precalcular_acumulados_tracto, serie_acumulada_tracto
+from nucleo.intervalos import indice_intervalos, ordenes_en_ventana, ordenes_traslapadas, ordenes_en_momento, tractos_en_ruta
+from nucleo.ranking import METRICAS_RANKING, ranking_tractos, seleccionar_extremos, paginar
+from nucleo.rutas import DIMENSIONES_RUTA, METRICAS_RUTAS, construir_cubo_rutas, cubo_rutas, totales_rutas, top_rutas
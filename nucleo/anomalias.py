@@ -0,0 +1,314 @@
+# Este archivo contiene la detección de cargas atípicas de combustible por tracto (o por otra clave del historial).
+# Cada tracto guarda estadísticas móviles de su rendimiento, CPK de combustible y kms por día; cada carga nueva se compara
+# contra el estado anterior y después lo actualiza, así el estado se puede guardar y continuar con las cargas que lleguen después.
+
+# Función: iniciar_estado
+# - Crea el estado vacío: por clave y métrica, media y varianza exponenciales (EWMA) y una ventana con las últimas cargas.
+
+# Función: actualizar_anomalias
+# - Procesa solo las cargas posteriores a la última carga registrada de cada clave, en orden de fecha.
+# - Cada carga se califica contra el estado previo (puntaje z con la EWMA, y puntaje robusto con la mediana y la MAD de la ventana)
+#   y actualiza el estado en O(1) por carga: los tractos avanzan juntos, una carga por tracto en cada paso vectorizado.
+# - Regresa los puntajes de las cargas procesadas; los de cargas anteriores no se recalculan.
+# - Las cargas con fecha igual o anterior a la última registrada de su clave no se califican; el estado guarda
+#   cuántas fueron en 'omitidas' para que quien llama lo reporte.
+
+# Función: conservar_anomalias
+# - Prepara la continuación sobre un historial nuevo con las huellas por tracto (nucleo/huellas.py): los tractos sin cambios
+#   conservan su estado y sus puntajes sin volver a calificarse.
+# - Un tracto que cambió continúa desde su estado solo si sus cargas ya calificadas siguen iguales al inicio de su historial
+#   nuevo y la primera carga nueva es posterior a la última calificada; así no se omite ninguna.
+#   Si no (cargas corregidas, quitadas, intercaladas o con la misma fecha), pierde su estado y se califica desde cero.
+
+# Función: cargas_atipicas
+# - Filtra los puntajes con umbrales configurables y regresa una fila por carga y métrica fuera de rango.
+# - Cada métrica se marca solo en la dirección que indica un problema (rendimiento bajo, CPK alto); los kms por día, en ambas.
+
+# Función: tabla_estado / estado_desde_tabla
+# - Convierten el estado a una tabla (una fila por clave) y de regreso, para guardarlo como artefacto (ver artefactos.py).
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from nucleo.perfilado import instrumentar
+
+METRICAS_ANOMALIAS = ('Rendimiento Kms/Litro', 'CPK Combustible', 'Kms Recorridos por Día')
+
+# Lado de la desviación que se considera anomalía: -1 valores bajos, 1 valores altos, 0 ambos
+DIRECCIONES = {
+    'Rendimiento Kms/Litro': -1,
+    'CPK Combustible': 1,
+    'Kms Recorridos por Día': 0,
+}
+
+ALFA_EWMA = 0.1
+VENTANA_MAD = 20
+# Cargas previas con valor que necesita una métrica antes de calificar la siguiente
+MINIMO_CARGAS = 5
+UMBRAL_Z = 3.0
+# Puntaje robusto 0.6745 * (x - mediana) / MAD; 3.5 es el umbral usual
+UMBRAL_MAD = 3.5
+
+def iniciar_estado(clave='Tracto', metricas=METRICAS_ANOMALIAS, alfa=ALFA_EWMA, ventana=VENTANA_MAD, minimo=MINIMO_CARGAS):
+    """
+    Crea el estado vacío de la detección de anomalías.
+    Args:
+        clave: columna del historial que agrupa las cargas.
+        metricas: columnas del historial que se vigilan.
+        alfa: peso de la carga nueva en la media y varianza exponenciales.
+        ventana: número de cargas para la mediana y la MAD.
+        minimo: cargas previas necesarias para calificar.
+    Returns:
+        estado: dict con los parámetros y un arreglo por estadística (una fila por clave).
+    """
+    m = len(metricas)
+    return {
+        'clave': clave,
+        'metricas': tuple(metricas),
+        'alfa': float(alfa),
+        'ventana': int(ventana),
+        'minimo': int(minimo),
+        'claves': np.array([], dtype=object),
+        'n': np.zeros((0, m), dtype=np.int64),
+        'media': np.zeros((0, m)),
+        'varianza': np.zeros((0, m)),
+        'valores': np.full((0, int(ventana), m), np.nan),
+        'posicion': np.zeros(0, dtype=np.int64),
+        'ultima': np.array([], dtype='datetime64[ns]'),
+        'omitidas': 0,
+    }
+
+def _registrar_claves(estado, claves):
+    nuevas = pd.Index(pd.unique(claves)).difference(pd.Index(estado['claves']), sort=False)
+    if len(nuevas):
+        k, m, v = len(nuevas), len(estado['metricas']), estado['ventana']
+        estado['claves'] = np.concatenate([estado['claves'], nuevas.to_numpy(dtype=object)])
+        estado['n'] = np.concatenate([estado['n'], np.zeros((k, m), dtype=np.int64)])
+        estado['media'] = np.concatenate([estado['media'], np.zeros((k, m))])
+        estado['varianza'] = np.concatenate([estado['varianza'], np.zeros((k, m))])
+        estado['valores'] = np.concatenate([estado['valores'], np.full((k, v, m), np.nan)])
+        estado['posicion'] = np.concatenate([estado['posicion'], np.zeros(k, dtype=np.int64)])
+        estado['ultima'] = np.concatenate([estado['ultima'], np.full(k, np.datetime64('NaT'), dtype='datetime64[ns]')])
+    return pd.Index(estado['claves']).get_indexer(claves)
+
+def _paso(estado, filas, x):
+    # Califica una carga por clave (filas distintas) contra el estado previo y después lo actualiza
+    alfa, minimo = estado['alfa'], estado['minimo']
+    n, media, varianza = estado['n'][filas], estado['media'][filas], estado['varianza'][filas]
+    ventana = estado['valores'][filas]
+
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        # nanmedian avisa cuando una ventana todavía no tiene valores
+        warnings.simplefilter('ignore', RuntimeWarning)
+        z = np.where((n >= minimo) & (varianza > 0), (x - media) / np.sqrt(varianza), np.nan)
+        mediana = np.nanmedian(ventana, axis=1)
+        mad = np.nanmedian(np.abs(ventana - mediana[:, None, :]), axis=1)
+        suficientes = (~np.isnan(ventana)).sum(axis=1) >= minimo
+        robusto = np.where(suficientes & (mad > 0), 0.6745 * (x - mediana) / mad, np.nan)
+
+    # Media y varianza exponenciales (forma incremental de Welford); las cargas sin valor no mueven el estado
+    valido = ~np.isnan(x)
+    diferencia = x - media
+    incremento = alfa * diferencia
+    primera = n == 0
+    estado['media'][filas] = np.where(valido, np.where(primera, x, media + incremento), media)
+    estado['varianza'][filas] = np.where(valido, np.where(primera, 0.0, (1 - alfa) * (varianza + diferencia * incremento)), varianza)
+    estado['n'][filas] = n + valido
+
+    posicion = estado['posicion'][filas]
+    estado['valores'][filas, posicion, :] = x
+    estado['posicion'][filas] = (posicion + 1) % estado['ventana']
+
+    esperado = np.where(n > 0, media, np.nan)
+    return esperado, mediana, z, robusto
+
+@instrumentar
+def actualizar_anomalias(estado, historial_cargas):
+    """
+    Califica las cargas nuevas del historial y actualiza el estado.
+    Args:
+        estado: resultado de iniciar_estado o de una llamada anterior (se modifica en su lugar).
+        historial_cargas: historial de historial_entre_cargas; puede ser el historial completo, solo se procesan
+            las cargas con 'Fecha Orden de Carga' posterior a la última registrada de su clave.
+    Returns:
+        estado: el estado actualizado; 'omitidas' cuenta las cargas de esta llamada que no se procesaron por tener
+            fecha igual o anterior a la última registrada (ya calificadas, o llegadas fuera de orden).
+        puntajes: una fila por carga procesada con la clave, 'Segmento', 'Fecha Orden de Carga' y, por métrica,
+            su valor, 'Esperado', 'Mediana', 'Puntaje z' y 'Puntaje MAD' (NaN mientras no hay cargas suficientes).
+    """
+    clave, metricas = estado['clave'], list(estado['metricas'])
+    historial = historial_cargas[historial_cargas[clave].notna() & historial_cargas['Fecha Orden de Carga'].notna()]
+
+    filas = _registrar_claves(estado, historial[clave].to_numpy())
+    fechas = historial['Fecha Orden de Carga'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    # NaT es el entero más pequeño: una clave sin cargas registradas acepta todas
+    nuevas = fechas > estado['ultima'].view(np.int64)[filas]
+    estado['omitidas'] = int((~nuevas).sum())
+
+    filas, fechas = filas[nuevas], fechas[nuevas]
+    orden = np.lexsort((fechas, filas))
+    filas, fechas = filas[orden], fechas[orden]
+    posiciones = np.flatnonzero(nuevas)[orden]
+    x = historial[metricas].to_numpy(dtype=float)[posiciones]
+
+    # Cargas agrupadas por clave; el paso p toma la carga p de cada clave que la tenga
+    inicios = np.flatnonzero(np.r_[True, filas[1:] != filas[:-1]]) if len(filas) else np.array([], dtype=np.intp)
+    cuentas = np.diff(np.r_[inicios, len(filas)])
+    resultados = np.full((4, len(filas), len(metricas)), np.nan)
+    for p in range(int(cuentas.max()) if len(cuentas) else 0):
+        idx = inicios[cuentas > p] + p
+        resultados[:, idx, :] = _paso(estado, filas[idx], x[idx])
+        estado['ultima'].view(np.int64)[filas[idx]] = fechas[idx]
+
+    puntajes = historial[[clave, 'Segmento', 'Fecha Orden de Carga']].iloc[posiciones].reset_index(drop=True)
+    for j, metrica in enumerate(metricas):
+        puntajes[metrica] = x[:, j]
+        for i, nombre in enumerate(('Esperado', 'Mediana', 'Puntaje z', 'Puntaje MAD')):
+            puntajes[f'{nombre} {metrica}'] = resultados[i, :, j]
+    return estado, puntajes
+
+def _quitar_claves(estado, conservar):
+    for nombre in ('claves', 'n', 'media', 'varianza', 'valores', 'posicion', 'ultima'):
+        estado[nombre] = estado[nombre][conservar]
+
+def _posicion_en_clave(tabla, clave):
+    # Número de la carga dentro de su clave, en orden de fecha (los empates quedan en el orden de la tabla)
+    ordenada = tabla.sort_values([clave, 'Fecha Orden de Carga'], kind='stable')
+    return ordenada.groupby(clave, sort=False).cumcount().reindex(tabla.index)
+
+@instrumentar
+def conservar_anomalias(estado, puntajes, historial_cargas, cambiadas):
+    """
+    Separa lo que se puede conservar del estado guardado de lo que se debe calificar.
+    Args:
+        estado: estado guardado con los puntajes (se modifica en su lugar).
+        puntajes: puntajes de las llamadas anteriores a actualizar_anomalias.
+        historial_cargas: historial nuevo completo.
+        cambiadas: claves (como texto) cuyas órdenes cambiaron, se agregaron o se quitaron (el 'grupos' de nucleo.huellas.cambios).
+    Returns:
+        estado: solo con las claves sin cambios y las que continúan.
+        puntajes: los de esas claves, con el 'Segmento' del historial nuevo (los números de segmento son globales).
+        pendientes: filas del historial por calificar: las cargas nuevas de las claves que continúan
+            y todas las de las claves nuevas o que vuelven a empezar, para pasarlas a actualizar_anomalias.
+    """
+    clave, metricas = estado['clave'], list(estado['metricas'])
+    fecha = 'Fecha Orden de Carga'
+    historial = historial_cargas[historial_cargas[clave].notna() & historial_cargas[fecha].notna()]
+    textos = historial[clave].astype(str).to_numpy()
+    numeros = _posicion_en_clave(historial, clave).to_numpy()
+
+    guardadas = pd.Index(estado['claves']).astype(str)
+    puntajes = puntajes[puntajes[clave].astype(str).isin(set(textos) & set(guardadas))].reset_index(drop=True)
+
+    # Cada carga calificada se empareja con la carga del mismo número de su clave en el historial nuevo
+    nuevas = pd.DataFrame({'_texto': textos, '_n': numeros, 'Segmento': historial['Segmento'].to_numpy(),
+                           fecha: historial[fecha].to_numpy()})
+    for metrica in metricas:
+        nuevas[metrica] = historial[metrica].to_numpy(dtype=float)
+    calificadas = pd.DataFrame({'_texto': puntajes[clave].astype(str).to_numpy(),
+                                '_n': _posicion_en_clave(puntajes, clave).to_numpy()})
+    pares = calificadas.merge(nuevas, on=['_texto', '_n'], how='left')
+
+    # Las claves sin cambios tienen las mismas cargas; en las demás se comparan la fecha y los valores
+    iguales = (pares[fecha].to_numpy() == puntajes[fecha].to_numpy())
+    for metrica in metricas:
+        a, b = pares[metrica].to_numpy(), puntajes[metrica].to_numpy(dtype=float)
+        iguales &= (a == b) | (np.isnan(a) & np.isnan(b))
+    iguales |= ~calificadas['_texto'].isin(set(cambiadas)).to_numpy()
+    por_clave = pd.Series(iguales).groupby(calificadas['_texto'].to_numpy())
+    prefijo = por_clave.all()
+    cuentas = por_clave.size()
+
+    # La primera carga nueva debe ser posterior a la última calificada: actualizar_anomalias omitiría una con la misma fecha
+    ultima = pd.Series(estado['ultima'], index=guardadas)
+    siguiente = nuevas[nuevas['_n'].to_numpy() == cuentas.reindex(nuevas['_texto']).fillna(-1).to_numpy()]
+    empatadas = siguiente.loc[siguiente[fecha].to_numpy() <= ultima.reindex(siguiente['_texto']).to_numpy(), '_texto']
+    continuan = set(prefijo.index[prefijo.to_numpy()]) - set(empatadas)
+
+    _quitar_claves(estado, guardadas.isin(continuan))
+    conservar = calificadas['_texto'].isin(continuan).to_numpy()
+    puntajes = puntajes[conservar].reset_index(drop=True)
+    puntajes['Segmento'] = pares.loc[conservar, 'Segmento'].to_numpy()
+
+    # Las claves que continúan solo califican sus cargas posteriores a las ya calificadas
+    desde = cuentas.reindex(textos).fillna(0).to_numpy()
+    desde[~pd.Index(textos).isin(continuan)] = 0
+    pendientes = historial[numeros >= desde]
+    return estado, puntajes, pendientes
+
+def cargas_atipicas(puntajes, umbral_z=UMBRAL_Z, umbral_mad=UMBRAL_MAD, direcciones=DIRECCIONES):
+    """
+    Regresa las cargas con alguna métrica fuera de los umbrales.
+    Args:
+        puntajes: resultado de actualizar_anomalias (o la concatenación de varias llamadas).
+        umbral_z: puntaje z a partir del cual se marca la carga (None para no usarlo).
+        umbral_mad: puntaje robusto a partir del cual se marca la carga (None para no usarlo).
+        direcciones: dict métrica -> -1, 1 o 0 (ver DIRECCIONES).
+    Returns:
+        atipicas: una fila por carga y métrica marcada, ordenada por fecha.
+    """
+    clave = puntajes.columns[0]
+    partes = []
+    for metrica in METRICAS_ANOMALIAS:
+        if metrica not in puntajes.columns:
+            continue
+        signo = direcciones.get(metrica, 0)
+        z = puntajes[f'Puntaje z {metrica}'].to_numpy()
+        robusto = puntajes[f'Puntaje MAD {metrica}'].to_numpy()
+        z, robusto = (z * signo, robusto * signo) if signo else (np.abs(z), np.abs(robusto))
+        fuera = np.zeros(len(puntajes), dtype=bool)
+        if umbral_z is not None:
+            fuera |= z > umbral_z
+        if umbral_mad is not None:
+            fuera |= robusto > umbral_mad
+        if not fuera.any():
+            continue
+        parte = puntajes.loc[fuera, [clave, 'Segmento', 'Fecha Orden de Carga']]
+        parte.insert(3, 'Métrica', metrica)
+        parte['Valor'] = puntajes.loc[fuera, metrica]
+        for nombre in ('Esperado', 'Mediana', 'Puntaje z', 'Puntaje MAD'):
+            parte[nombre] = puntajes.loc[fuera, f'{nombre} {metrica}']
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=[clave, 'Segmento', 'Fecha Orden de Carga', 'Métrica', 'Valor',
+                                     'Esperado', 'Mediana', 'Puntaje z', 'Puntaje MAD'])
+    return pd.concat(partes).sort_values('Fecha Orden de Carga', kind='stable').reset_index(drop=True)
+
+def tabla_estado(estado):
+    # Una fila por clave; los parámetros se repiten en cada fila para que la tabla se pueda leer sola
+    metricas, v = estado['metricas'], estado['ventana']
+    tabla = pd.DataFrame({
+        estado['clave']: estado['claves'],
+        'Última Carga': estado['ultima'],
+        'Posición': estado['posicion'],
+        'Alfa': estado['alfa'],
+        'Mínimo': estado['minimo'],
+    })
+    for j, metrica in enumerate(metricas):
+        tabla[f'Cargas {metrica}'] = estado['n'][:, j]
+        tabla[f'Media {metrica}'] = estado['media'][:, j]
+        tabla[f'Varianza {metrica}'] = estado['varianza'][:, j]
+        for i in range(v):
+            tabla[f'{metrica} [{i}]'] = estado['valores'][:, i, j]
+    return tabla
+
+def estado_desde_tabla(tabla):
+    clave = tabla.columns[0]
+    metricas = tuple(c[len('Cargas '):] for c in tabla.columns if c.startswith('Cargas '))
+    ventana = sum(1 for c in tabla.columns if c.startswith(f'{metricas[0]} ['))
+    estado = iniciar_estado(clave, metricas, ventana=ventana)
+    if len(tabla):
+        estado['alfa'] = float(tabla['Alfa'].iloc[0])
+        estado['minimo'] = int(tabla['Mínimo'].iloc[0])
+    estado['claves'] = tabla[clave].to_numpy(dtype=object)
+    estado['ultima'] = tabla['Última Carga'].to_numpy(dtype='datetime64[ns]')
+    estado['posicion'] = tabla['Posición'].to_numpy(dtype=np.int64)
+    estado['n'] = np.ascontiguousarray(tabla[[f'Cargas {m}' for m in metricas]].to_numpy(dtype=np.int64))
+    estado['media'] = np.ascontiguousarray(tabla[[f'Media {m}' for m in metricas]].to_numpy(dtype=float))
+    estado['varianza'] = np.ascontiguousarray(tabla[[f'Varianza {m}' for m in metricas]].to_numpy(dtype=float))
+    valores = np.stack([tabla[[f'{m} [{i}]' for i in range(ventana)]].to_numpy(dtype=float) for m in metricas], axis=2)
+    estado['valores'] = np.ascontiguousarray(valores.reshape(len(tabla), ventana, len(metricas)))
+    return estado
@@ -0,0 +1,258 @@
+# Este archivo contiene el caché en disco de las funciones de cálculo costosas (carga, historial, CPK, completitud, cubos).
+# Sobrevive a los reinicios de `streamlit run app.py`: el primer usuario después de un reinicio lee los resultados del disco
+# en lugar de volver a calcularlos.
+
+# Función: cache_disco
+# - Decorador para funciones puras: la clave combina el nombre de la función, la versión del código de nucleo/,
+#   la huella de los datos de entrada y los demás argumentos. Los archivos indicados en `archivos` entran a la clave
+#   con su tamaño y fecha de modificación.
+# - Cada resultado se guarda con pickle (protocolo 5): los DataFrame, arreglos y dicts que regresan las funciones
+#   vuelven con sus tipos exactos (Period, columnas MultiIndex, texto mixto), que Parquet no conserva en todos los casos.
+# - Con `columnas`, un DataFrame entra a la clave solo con las columnas que la función lee (más su número de filas
+#   y su índice): una corrección en otra columna no invalida la entrada. Las huellas son las de nucleo/huellas.py.
+# - Si un argumento no tiene huella (por ejemplo, una función), la llamada se calcula sin caché.
+# - funcion.consultar(...) busca el resultado de una llamada en el caché sin calcularlo.
+# - Se desactiva con PYTRACK_CACHE_DISCO=0; la carpeta se elige con PYTRACK_CACHE y el tamaño máximo con PYTRACK_CACHE_MB.
+
+# Función: podar
+# - Desaloja las entradas usadas hace más tiempo (LRU por fecha de último uso) hasta que el caché cabe en el límite.
+
+# Función: entradas / limpiar
+# - Listan y borran entradas; el comando de administración es admin_cache.py.
+
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from nucleo.huellas import huella_columna, huella_df
+
+DIRECTORIO_CACHE = os.environ.get('PYTRACK_CACHE', 'cache_pytrack')
+
+LIMITE_CACHE_MB = float(os.environ.get('PYTRACK_CACHE_MB', '2048'))
+
+def cache_activo():
+    return os.environ.get('PYTRACK_CACHE_DISCO', '1') != '0'
+
+@functools.lru_cache(maxsize=1)
+def version_codigo():
+    # Cualquier cambio en el código de nucleo/ invalida todo el caché
+    digest = hashlib.blake2b(digest_size=8)
+    for ruta in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(ruta, 'rb') as f:
+            digest.update(os.path.basename(ruta).encode())
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def _huella_argumento(valor, columnas=None):
+    if isinstance(valor, pd.DataFrame):
+        if columnas is None:
+            return ('DataFrame', huella_df(valor))
+        return ('DataFrame', tuple(c for c in columnas if c in valor.columns), huella_df(valor, columnas))
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return (type(valor).__name__, str(valor.name), str(valor.dtype), len(valor), huella_columna(pd.Series(valor)))
+    if isinstance(valor, np.ndarray):
+        return ('ndarray', str(valor.dtype), valor.shape, huella_columna(pd.Series(valor.ravel())))
+    if valor is None or isinstance(valor, (str, bytes, int, float, bool, np.generic, pd.Timestamp)):
+        return repr(valor)
+    if isinstance(valor, (tuple, list)):
+        return (type(valor).__name__, tuple(_huella_argumento(v) for v in valor))
+    if isinstance(valor, dict):
+        return ('dict', tuple(sorted((repr(k), _huella_argumento(v)) for k, v in valor.items())))
+    raise TypeError(f"Argumento sin huella para el caché: {type(valor).__name__}")
+
+def _huella_archivo(ruta):
+    if not ruta or not os.path.exists(ruta):
+        return None
+    info = os.stat(ruta)
+    return (os.path.abspath(ruta), info.st_size, info.st_mtime_ns)
+
+def _nombre(funcion):
+    return f"{funcion.__module__}.{funcion.__qualname__}"
+
+def clave_cache(funcion, args, kwargs, archivos=(), columnas=None):
+    argumentos = inspect.signature(funcion).bind(*args, **kwargs)
+    argumentos.apply_defaults()
+    partes = [_nombre(funcion), version_codigo()]
+    for nombre, valor in argumentos.arguments.items():
+        usadas = (columnas or {}).get(nombre)
+        if callable(usadas):
+            usadas = usadas(argumentos.arguments)
+        partes.append((nombre, _huella_argumento(valor, usadas)))
+        if nombre in archivos:
+            partes.append((f'{nombre}:archivo', _huella_archivo(valor)))
+    return hashlib.blake2b(repr(partes).encode(), digest_size=20).hexdigest()
+
+def _rutas(directorio, funcion, clave):
+    carpeta = os.path.join(directorio, _nombre(funcion))
+    return os.path.join(carpeta, f'{clave}.pkl'), os.path.join(carpeta, f'{clave}.json')
+
+def _escribir_atomico(ruta, escribir):
+    # Se escribe en un archivo temporal propio del hilo: una escritura interrumpida nunca queda como entrada válida
+    temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporal, 'wb') as f:
+        escribir(f)
+    os.replace(temporal, ruta)
+
+def _leer(ruta):
+    try:
+        with open(ruta, 'rb') as f:
+            valor = pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception:
+        # Entrada dañada o de una versión incompatible de pandas: se descarta y se vuelve a calcular
+        for archivo in (ruta, ruta[:-len('.pkl')] + '.json'):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        return False, None
+    # La fecha de modificación es la de último uso (orden LRU de podar)
+    try:
+        os.utime(ruta)
+    except FileNotFoundError:
+        pass
+    return True, valor
+
+def _guardar(directorio, funcion, clave, valor, segundos):
+    ruta, ruta_meta = _rutas(directorio, funcion, clave)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    _escribir_atomico(ruta, lambda f: pickle.dump(valor, f, protocol=5))
+    meta = {
+        'funcion': _nombre(funcion),
+        'clave': clave,
+        'version_codigo': version_codigo(),
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'segundos_calculo': round(segundos, 3),
+        'bytes': os.path.getsize(ruta),
+    }
+    _escribir_atomico(ruta_meta, lambda f: f.write(json.dumps(meta, ensure_ascii=False, indent=2).encode('utf-8')))
+
+def cache_disco(archivos=(), directorio=None, columnas=None):
+    """
+    Decorador que guarda en disco el resultado de una función pura.
+    Args:
+        archivos: nombres de los argumentos que son rutas de archivo; su tamaño y fecha de modificación entran a la clave.
+        directorio: carpeta del caché; None usa PYTRACK_CACHE.
+        columnas: dict nombre de argumento DataFrame -> columnas que lee la función (lista, o función que recibe
+            los argumentos de la llamada como dict y regresa la lista). Debe incluir todas las que lee: una columna
+            que falte no invalida la entrada cuando cambia. Los argumentos sin entrada usan todas sus columnas.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not cache_activo():
+                return funcion(*args, **kwargs)
+            try:
+                clave = clave_cache(funcion, args, kwargs, archivos, columnas)
+            except TypeError:
+                return funcion(*args, **kwargs)
+
+            carpeta = directorio or DIRECTORIO_CACHE
+            ruta, _ = _rutas(carpeta, funcion, clave)
+            encontrado, valor = _leer(ruta)
+            if encontrado:
+                return valor
+
+            t0 = time.perf_counter()
+            valor = funcion(*args, **kwargs)
+            try:
+                _guardar(carpeta, funcion, clave, valor, time.perf_counter() - t0)
+                podar(carpeta)
+            except OSError:
+                # Sin espacio o sin permisos: el resultado se regresa igual, solo no queda en caché
+                pass
+            return valor
+
+        def consultar(*args, **kwargs):
+            # Regresa (encontrado, valor) sin calcular: permite repartir solo los faltantes (ver nucleo/carga.py)
+            if not cache_activo():
+                return False, None
+            try:
+                clave = clave_cache(funcion, args, kwargs, archivos, columnas)
+            except TypeError:
+                return False, None
+            return _leer(_rutas(directorio or DIRECTORIO_CACHE, funcion, clave)[0])
+
+        envoltura.consultar = consultar
+        return envoltura
+    return decorador
+
+def entradas(directorio=None):
+    """
+    Lista las entradas del caché.
+    Args:
+        directorio: carpeta del caché; None usa PYTRACK_CACHE.
+    Returns:
+        entradas: DataFrame con una fila por entrada ('funcion', 'clave', 'bytes', 'ultimo_uso', 'creado',
+            'segundos_calculo', 'ruta'), de la usada más recientemente a la más antigua.
+    """
+    directorio = directorio or DIRECTORIO_CACHE
+    filas = []
+    for ruta in glob.glob(os.path.join(directorio, '*', '*.pkl')):
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        meta = {}
+        try:
+            with open(ruta[:-len('.pkl')] + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        filas.append({
+            'funcion': os.path.basename(os.path.dirname(ruta)),
+            'clave': os.path.basename(ruta)[:-len('.pkl')],
+            'bytes': info.st_size,
+            'ultimo_uso': datetime.fromtimestamp(info.st_mtime),
+            'creado': meta.get('creado'),
+            'segundos_calculo': meta.get('segundos_calculo'),
+            'ruta': ruta,
+        })
+    columnas = ['funcion', 'clave', 'bytes', 'ultimo_uso', 'creado', 'segundos_calculo', 'ruta']
+    return pd.DataFrame(filas, columns=columnas).sort_values('ultimo_uso', ascending=False, ignore_index=True)
+
+def _borrar(ruta):
+    for archivo in (ruta, ruta[:-len('.pkl')] + '.json'):
+        try:
+            os.remove(archivo)
+        except FileNotFoundError:
+            pass
+
+def podar(directorio=None, limite_mb=None):
+    """
+    Desaloja las entradas usadas hace más tiempo hasta que el caché cabe en el límite.
+    Args:
+        directorio: carpeta del caché; None usa PYTRACK_CACHE.
+        limite_mb: tamaño máximo en MB; None usa PYTRACK_CACHE_MB.
+    Returns:
+        borradas: número de entradas desalojadas.
+    """
+    limite = (LIMITE_CACHE_MB if limite_mb is None else limite_mb) * 1024 ** 2
+    tabla = entradas(directorio)
+    sobrante = tabla['bytes'].sum() - limite
+    borradas = 0
+    # De la menos reciente a la más reciente
+    for ruta, tamano in zip(tabla['ruta'][::-1], tabla['bytes'][::-1]):
+        if sobrante <= 0:
+            break
+        _borrar(ruta)
+        sobrante -= tamano
+        borradas += 1
+    return borradas
+
+def limpiar(directorio=None, funcion=None):
+    tabla = entradas(directorio)
+    if funcion is not None:
+        tabla = tabla[tabla['funcion'] == funcion]
+    for ruta in tabla['ruta']:
+        _borrar(ruta)
+    return len(tabla)
@@ -0,0 +1,154 @@
+# Este archivo contiene la carga y preparación de la base de órdenes.
+# No depende de Streamlit, para que la app y el modo batch (artefactos.py) preparen los datos exactamente igual.
+
+# Función: preparar_base
+# - Calcula la duración de cada viaje, selecciona y renombra las columnas que usa la app y numera las órdenes.
+
+# Función: cargar_base
+# - Lee Base_viz.xlsx (o la ruta de PYTRACK_BASE) y devuelve la base ya preparada.
+# - Si la ruta es una carpeta, un patrón glob o una lista de archivos, lee los extractos mensuales con cargar_extractos.
+
+# Función: leer_extracto
+# - Lee un libro de Excel o un CSV exportado del TMS, valida que traiga las columnas de COLUMNAS_BASE y lo prepara.
+# - Su resultado queda en el caché en disco con el tamaño y la fecha de modificación del archivo: un extracto
+#   que no cambió no se vuelve a leer.
+
+# Función: cargar_extractos
+# - Reparte entre procesos los extractos que no están en el caché, concatena todos en el orden de sus nombres
+#   y quita las órdenes repetidas (se queda la del extracto más reciente).
+
+import glob
+import os
+
+import pandas as pd
+
+from nucleo.cache_disco import cache_disco
+
+RUTA_BASE = os.environ.get('PYTRACK_BASE', 'Base_viz.xlsx')
+
+EXTENSIONES_EXTRACTO = ('.xlsx', '.xlsm', '.xls', '.csv')
+
+# Arrancar un proceso cuesta cerca de un segundo (importa pandas de nuevo): con menos bytes por leer se leen en este proceso
+BYTES_MINIMOS_PROCESOS = 8 * 1024 ** 2
+
+COLUMNAS_BASE = [
+    'EC', 'Proyecto', 'Cliente', 'Tracto', 'Inicio de la Orden', 'Cierre de la Orden', 'Duración Viaje (hrs)', 'Edo. Origen', 'Edo. Destino', 'Cdad. Origen', 'Cdad. Destino', 'Ruta Estados', 'Ruta Ciudades',
+    'Conductor', 'kmstotales', 'No. Remolques','Litros','Costo por litro', 'Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento','Costo Total','CPK Orden', 'Periodo', 'Conteo',
+    'lat_origen', 'lon_origen', 'lat_destino', 'lon_destino','Orden con Costo de Combustible','Orden con Costo de Peajes', 'Orden con Costo de Mantenimiento'
+]
+
+# preparar_base calcula la duración del viaje cuando el extracto no la trae
+COLUMNAS_CALCULADAS = ['Duración Viaje (hrs)']
+
+def preparar_base(df):
+    """
+    Prepara la base cruda de órdenes para el análisis.
+    Args:
+        df: DataFrame leído de Base_viz.xlsx, indexado por número de orden.
+    Returns:
+        df: DataFrame con las columnas de la app y 'No. Orden' como columna.
+    """
+    df = df.copy()
+    df['Duración Viaje'] = df['Cierre de la Orden'] - df['Inicio de la Orden']
+
+    if 'Duración Viaje (hrs)' not in df.columns and pd.api.types.is_timedelta64_dtype(df['Duración Viaje']):
+        df['Duración Viaje (hrs)'] = (df['Duración Viaje'].dt.total_seconds() / 3600).round(2)
+
+    df = df[COLUMNAS_BASE].rename({'Conteo':'No. Viajes'}, axis = 1).copy()
+
+    df.index.name = 'No. Orden'
+
+    df.drop(['lat_origen', 'lon_origen', 'lat_destino', 'lon_destino'], axis=1, inplace=True, errors='ignore')
+
+    df.reset_index(inplace=True)
+    return df
+
+def archivos_extractos(fuente):
+    """
+    Resuelve los extractos de una fuente.
+    Args:
+        fuente: carpeta, patrón glob ('extractos/*.xlsx'), lista de rutas o un solo archivo.
+    Returns:
+        archivos: rutas ordenadas por nombre (los extractos mensuales quedan en orden cronológico si su nombre
+            empieza con el año y el mes). Los temporales de Excel ('~$...') se ignoran.
+    """
+    if isinstance(fuente, (list, tuple)):
+        return [str(ruta) for ruta in fuente]
+    fuente = str(fuente)
+    if os.path.isdir(fuente):
+        candidatos = glob.glob(os.path.join(fuente, '*'))
+    elif glob.has_magic(fuente):
+        candidatos = glob.glob(fuente)
+    else:
+        return [fuente]
+    return sorted(
+        ruta for ruta in candidatos
+        if os.path.isfile(ruta) and ruta.lower().endswith(EXTENSIONES_EXTRACTO)
+        and not os.path.basename(ruta).startswith('~$')
+    )
+
+def es_coleccion(fuente):
+    return isinstance(fuente, (list, tuple)) or os.path.isdir(str(fuente)) or glob.has_magic(str(fuente))
+
+@cache_disco(archivos=('ruta',))
+def leer_extracto(ruta):
+    """
+    Lee y prepara un extracto de órdenes.
+    Args:
+        ruta: libro de Excel o CSV con el número de orden en la primera columna.
+    Returns:
+        df: extracto preparado (ver preparar_base).
+    """
+    if ruta.lower().endswith('.csv'):
+        crudo = pd.read_csv(
+            ruta, index_col=0, parse_dates=['Inicio de la Orden', 'Cierre de la Orden'], float_precision='round_trip'
+        )
+    else:
+        crudo = pd.read_excel(ruta, index_col=0)
+
+    faltantes = [c for c in COLUMNAS_BASE if c not in crudo.columns and c not in COLUMNAS_CALCULADAS]
+    if faltantes:
+        raise ValueError(f"{ruta}: faltan las columnas {', '.join(faltantes)}")
+    return preparar_base(crudo)
+
+def cargar_extractos(fuente, procesos=None):
+    """
+    Carga y une los extractos de órdenes de una carpeta o patrón.
+    Args:
+        fuente: carpeta, patrón glob o lista de rutas (ver archivos_extractos).
+        procesos: procesos para leer los extractos que no están en el caché; None usa los núcleos disponibles.
+            Si los extractos por leer suman menos de BYTES_MINIMOS_PROCESOS se leen en este proceso.
+    Returns:
+        df: base preparada con las órdenes de todos los extractos, sin 'No. Orden' repetidos
+            (cuenta la versión del último extracto en orden de nombre).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    archivos = archivos_extractos(fuente)
+    if not archivos:
+        raise FileNotFoundError(f"No hay extractos de órdenes en {fuente}")
+
+    # Los extractos sin cambios salen del caché; solo los nuevos o modificados se leen
+    partes = {}
+    for ruta in archivos:
+        encontrado, valor = leer_extracto.consultar(ruta)
+        if encontrado:
+            partes[ruta] = valor
+    faltan = [ruta for ruta in archivos if ruta not in partes]
+
+    procesos = min(procesos or os.cpu_count() or 1, len(faltan))
+    if procesos > 1 and sum(os.path.getsize(ruta) for ruta in faltan) >= BYTES_MINIMOS_PROCESOS:
+        # 'spawn' en todos los sistemas: la app corre hilos y hacer fork de un proceso con hilos no es seguro
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn')) as ejecutor:
+            partes.update(zip(faltan, ejecutor.map(leer_extracto, faltan)))
+    else:
+        partes.update((ruta, leer_extracto(ruta)) for ruta in faltan)
+
+    df = pd.concat([partes[ruta] for ruta in archivos], ignore_index=True)
+    return df.drop_duplicates('No. Orden', keep='last', ignore_index=True)
+
+def cargar_base(ruta=RUTA_BASE):
+    if es_coleccion(ruta):
+        return cargar_extractos(ruta)
+    return leer_extracto(ruta)
@@ -0,0 +1,70 @@
+
+# Este archivo contiene el catálogo de columnas que usa el buscador de órdenes (search_and_filter_interface).
+
+# Función: tipo_columna
+# - Decide si una columna se filtra como rango numérico, rango de fechas o valores de texto (forzado o automático).
+
+# Función: calcular_catalogo / catalogo_columnas
+# - Calculan de una sola vez, para todas las columnas, su tipo de filtro, su mínimo y máximo y las opciones de texto.
+# - Así el buscador no recorre la columna completa en cada rerun; la app lo calcula en segundo plano al iniciar.
+# - catalogo_columnas es la versión con caché en disco, para la base completa; el buscador usa calcular_catalogo
+#   para la columna elegida mientras el catálogo completo no está listo.
+
+import pandas as pd
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+def tipo_columna(serie, columnas_forzar_fecha=(), columnas_forzar_str=(), columnas_forzar_num=()):
+    if serie.name in columnas_forzar_fecha:
+        return "fecha"
+    if serie.name in columnas_forzar_num:
+        return "num"
+    if serie.name in columnas_forzar_str:
+        return "str"
+    if pd.api.types.is_numeric_dtype(serie):
+        return "num"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "fecha"
+    if pd.api.types.is_timedelta64_dtype(serie):
+        return "num"
+    return "str"
+
+@instrumentar
+def calcular_catalogo(df, columnas_forzar_fecha=(), columnas_forzar_str=(), columnas_forzar_num=()):
+    """
+    Calcula el catálogo de filtros de todas las columnas.
+    Args:
+        df: DataFrame de órdenes.
+        columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num: columnas con tipo de filtro forzado.
+    Returns:
+        catalogo: dict columna -> {'tipo', 'min', 'max'} para 'num' y 'fecha' (valores sin redondear)
+            o {'tipo', 'opciones'} para 'str' (valores únicos como texto, ordenados).
+            Las columnas que no se pueden resumir no aparecen.
+    """
+    catalogo = {}
+    for col in df.columns:
+        tipo = tipo_columna(df[col], columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num)
+        try:
+            if tipo == "num":
+                catalogo[col] = {'tipo': tipo, 'min': df[col].min(), 'max': df[col].max()}
+            elif tipo == "fecha":
+                fechas = pd.to_datetime(df[col])
+                catalogo[col] = {'tipo': tipo, 'min': fechas.min(), 'max': fechas.max()}
+            else:
+                catalogo[col] = {'tipo': tipo, 'opciones': sorted(df[col].dropna().astype(str).unique().tolist())}
+        except (TypeError, ValueError):
+            # Columna forzada a un tipo que sus valores no admiten: el buscador la resuelve por su cuenta
+            continue
+    return catalogo
+
+@instrumentar
+@cache_disco()
+def catalogo_columnas(df, columnas_forzar_fecha=(), columnas_forzar_str=(), columnas_forzar_num=()):
+    """
+    Calcula el catálogo de filtros de todas las columnas, con caché en disco.
+    Args:
+        df, columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num: como en calcular_catalogo (df es la base completa).
+    Returns:
+        catalogo: el mismo dict que calcular_catalogo.
+    """
+    return calcular_catalogo(df, columnas_forzar_fecha, columnas_forzar_str, columnas_forzar_num)
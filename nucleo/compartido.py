@@ -0,0 +1,78 @@
+# Este archivo contiene las tablas compartidas entre procesos: archivos Arrow IPC (Feather v2) sin compresión
+# que cada proceso del servidor abre con memoria mapeada. El caché de páginas del sistema operativo guarda una sola copia
+# física y los DataFrame de cada proceso apuntan a esas páginas en lugar de tener su propia copia.
+
+# Función: escribir_compartido
+# - Escribe el DataFrame en un solo bloque (record batch), para que cada columna quede contigua en el archivo.
+# - Los números se guardan tal cual (NaN como valor, no como nulo) y las fechas como int64 (NaT incluido),
+#   así ninguna de esas columnas necesita máscara de nulos y se pueden leer sin copiar.
+
+# Función: leer_compartido
+# - Abre el archivo con memoria mapeada y arma el DataFrame sin copiar las columnas numéricas y de fechas:
+#   sus arreglos de NumPy son vistas de solo lectura sobre el archivo. El texto y los booleanos (bits en Arrow)
+#   sí se convierten en cada proceso.
+
+# Función: columnas_compartidas
+# - Lista las columnas de un DataFrame que siguen apuntando a la memoria mapeada (para el panel de depuración).
+
+import numpy as np
+import pandas as pd
+
+# Metadato de campo para las fechas guardadas como int64
+TIPO_FECHA = b'datetime64[ns]'
+
+def _campo(pa, nombre, serie):
+    valores = serie.to_numpy()
+    if valores.dtype.kind in 'iuf':
+        return pa.field(nombre, pa.from_numpy_dtype(valores.dtype)), pa.array(valores)
+    if valores.dtype.kind == 'M' and not getattr(serie.dtype, 'tz', None):
+        enteros = valores.astype('datetime64[ns]').view(np.int64)
+        return pa.field(nombre, pa.int64(), metadata={b'pytrack': TIPO_FECHA}), pa.array(enteros)
+    arreglo = pa.array(serie, from_pandas=True)
+    return pa.field(nombre, arreglo.type), arreglo
+
+def escribir_compartido(df, ruta):
+    """
+    Escribe un DataFrame como Arrow IPC sin compresión, listo para abrirse con memoria mapeada.
+    Args:
+        df: DataFrame con nombres de columna de texto (el índice no se guarda).
+        ruta: archivo de salida (.arrow).
+    """
+    import pyarrow as pa
+
+    campos, arreglos = zip(*(_campo(pa, str(c), df[c]) for c in df.columns)) if df.shape[1] else ((), ())
+    tabla = pa.Table.from_arrays(list(arreglos), schema=pa.schema(list(campos)))
+    with pa.OSFile(ruta, 'wb') as salida, pa.ipc.new_file(salida, tabla.schema) as escritor:
+        # Un solo record batch: cada columna queda en un buffer contiguo
+        escritor.write_table(tabla, max_chunksize=max(len(df), 1))
+
+def leer_compartido(ruta):
+    """
+    Abre un archivo de escribir_compartido con memoria mapeada.
+    Args:
+        ruta: archivo .arrow.
+    Returns:
+        df: DataFrame con índice 0..n-1; las columnas numéricas y de fechas son vistas de solo lectura sobre el archivo.
+    """
+    import pyarrow as pa
+
+    tabla = pa.ipc.open_file(pa.memory_map(ruta, 'r')).read_all()
+    columnas = {}
+    for campo, columna in zip(tabla.schema, tabla.columns):
+        arreglo = columna.chunk(0) if columna.num_chunks == 1 else pa.concat_arrays(columna.chunks)
+        es_fecha = (campo.metadata or {}).get(b'pytrack') == TIPO_FECHA
+        if (pa.types.is_integer(campo.type) or pa.types.is_floating(campo.type)) and arreglo.null_count == 0:
+            valores = arreglo.to_numpy(zero_copy_only=True)
+            columnas[campo.name] = valores.view('datetime64[ns]') if es_fecha else valores
+        else:
+            columnas[campo.name] = arreglo.to_pandas()
+    # copy=False: pandas no consolida las columnas en bloques nuevos y conserva las vistas
+    return pd.DataFrame(columnas, copy=False)
+
+def columnas_compartidas(df):
+    compartidas = []
+    for c in df.columns:
+        valores = df[c].to_numpy()
+        if isinstance(valores, np.ndarray) and valores.dtype.kind in 'iufM' and not valores.flags.writeable and valores.base is not None:
+            compartidas.append(c)
+    return compartidas
@@ -0,0 +1,166 @@
+# Este archivo contiene la capa de consultas opcional sobre DuckDB embebido.
+# Las órdenes se consultan como una vista sobre el Parquet de los artefactos (ver artefactos.py): el filtro del buscador
+# corre como SQL y solo regresa los números de fila que cumplen. Las agregaciones del motor 'duckdb' (nucleo/motor.py)
+# usan agrupar sobre el DataFrame en memoria registrado en la conexión.
+
+# Función: conexion
+# - Una sola conexión DuckDB en memoria por proceso, creada al primer uso; cada hilo (sesión de Streamlit) usa su propio cursor.
+
+# Función: registrar_artefactos
+# - Crea la vista 'ordenes' sobre el Parquet de una versión de artefactos.
+
+# Función: condicion_filtro
+# - Traduce el filtro de search_and_filter_interface (rango numérico, rango de fechas o valores de texto) a SQL con parámetros.
+# - Regresa None cuando el filtro no se puede reproducir igual en SQL; en ese caso se filtra con pandas.
+
+# Función: posiciones
+# - Regresa solo los números de fila (en el orden del Parquet) que cumplen la condición, para tomarlos con iloc
+#   del DataFrame que ya está en memoria sin traer columnas de DuckDB.
+
+# Función: agrupar
+# - Ejecuta un GROUP BY con las mismas agregaciones que nucleo/motor.py ('sum', 'mean', 'median', ...), ordenado por las claves.
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columna con el número de fila dentro del Parquet (read_parquet(..., file_row_number = true))
+COLUMNA_FILA = 'file_row_number'
+
+_TIPOS_ENTEROS = ('BIGINT', 'INTEGER', 'SMALLINT', 'TINYINT', 'UBIGINT', 'UINTEGER', 'USMALLINT', 'UTINYINT')
+_TIPOS_NUMERICOS = _TIPOS_ENTEROS + ('DOUBLE', 'FLOAT', 'HUGEINT')
+_TIPOS_FECHA = ('DATE', 'TIMESTAMP', 'TIMESTAMP_NS', 'TIMESTAMP_US', 'TIMESTAMP_MS', 'TIMESTAMP_S', 'TIMESTAMP WITH TIME ZONE')
+
+_conexion = None
+_candado = threading.Lock()
+_cursores = threading.local()
+
+# Agregaciones de pandas -> SQL; las sumas de grupos sin datos valen 0, como en pandas
+_FUNCIONES_SQL = {
+    'sum': 'COALESCE(SUM({col}), 0)',
+    'mean': 'AVG({col})',
+    'median': 'MEDIAN({col})',
+    'min': 'MIN({col})',
+    'max': 'MAX({col})',
+    'count': 'COUNT({col})',
+    'nunique': 'COUNT(DISTINCT {col})',
+    'std': 'STDDEV_SAMP({col})',
+}
+
+def duckdb_disponible():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def conexion():
+    global _conexion
+    import duckdb
+
+    if _conexion is None:
+        with _candado:
+            if _conexion is None:
+                _conexion = duckdb.connect(database=':memory:')
+    # Una conexión DuckDB no se debe usar desde varios hilos a la vez; cada hilo trabaja con un cursor propio
+    cursor = getattr(_cursores, 'cursor', None)
+    if cursor is None:
+        cursor = _conexion.cursor()
+        _cursores.cursor = cursor
+    return cursor
+
+def identificador(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+def registrar_parquet(nombre, ruta):
+    ruta_sql = os.path.abspath(ruta).replace("'", "''")
+    conexion().execute(
+        f"CREATE OR REPLACE VIEW {identificador(nombre)} AS "
+        f"SELECT * FROM read_parquet('{ruta_sql}', file_row_number = true)"
+    )
+
+def registrar_artefactos(ruta_version):
+    registrar_parquet('ordenes', os.path.join(ruta_version, 'ordenes.parquet'))
+
+def tipos_columnas(tabla):
+    tipos = dict(conexion().execute(f"SELECT column_name, column_type FROM (DESCRIBE {identificador(tabla)})").fetchall())
+    tipos.pop(COLUMNA_FILA, None)
+    return tipos
+
+def condicion_filtro(columna, tipo, valor, tipos=None):
+    """
+    Traduce un filtro de search_and_filter_interface a SQL.
+    Args:
+        columna: columna filtrada.
+        tipo: 'num', 'fecha' o 'str', como lo determina search_and_filter_interface.
+        valor: (mínimo, máximo) para 'num' y 'fecha'; lista de valores para 'str'.
+        tipos: dict columna -> tipo DuckDB (tipos_columnas); el filtro solo se traduce si el tipo de la columna
+            da el mismo resultado que la comparación de pandas.
+    Returns:
+        (sql, parametros) o None si el filtro no aplica o no se reproduce igual en SQL.
+    """
+    col = identificador(columna)
+    tipo_sql = (tipos or {}).get(columna)
+    if tipo == 'num':
+        if tipo_sql not in _TIPOS_NUMERICOS:
+            return None
+        return f"{col} >= ? AND {col} <= ?", [valor[0], valor[1]]
+    if tipo == 'fecha':
+        # Las columnas de texto forzadas a fecha se interpretan con pd.to_datetime; eso se deja a pandas
+        if tipo_sql not in _TIPOS_FECHA:
+            return None
+        return f"CAST({col} AS DATE) >= ? AND CAST({col} AS DATE) <= ?", [valor[0], valor[1]]
+    if not valor:
+        return None
+    # astype(str) de pandas coincide con CAST AS VARCHAR en texto y enteros; en otros tipos (flotantes, booleanos, fechas) no
+    if tipo_sql != 'VARCHAR' and tipo_sql not in _TIPOS_ENTEROS:
+        return None
+    marcadores = ', '.join('?' for _ in valor)
+    return f"CAST({col} AS VARCHAR) IN ({marcadores})", list(valor)
+
+def _donde(condicion):
+    if condicion is None:
+        return '', []
+    return f" WHERE {condicion[0]}", condicion[1]
+
+def posiciones(tabla, condicion=None):
+    donde, parametros = _donde(condicion)
+    sql = f"SELECT {COLUMNA_FILA} FROM {identificador(tabla)}{donde} ORDER BY {COLUMNA_FILA}"
+    return conexion().execute(sql, parametros).fetchnumpy()[COLUMNA_FILA].astype(np.int64)
+
+def agrupar(tabla, claves, agregaciones, condicion=None, tamano=None, codificadas=()):
+    """
+    Agrupa y agrega en SQL.
+    Args:
+        tabla: vista o DataFrame registrado en la conexión.
+        claves: lista de columnas por las que se agrupa (las filas con clave nula se descartan, como en pandas).
+        agregaciones: dict columna -> función ('sum', 'mean', 'median', 'min', 'max', 'count', 'nunique', 'std').
+        condicion: (sql, parametros) opcional para filtrar antes de agrupar.
+        tamano: nombre de la columna con el número de filas por grupo; None para no agregarla.
+        codificadas: columnas con códigos de pd.factorize, donde -1 significa valor faltante.
+    Returns:
+        resultado: DataFrame con las claves como columnas, ordenado por las claves.
+    """
+    expresiones = [identificador(c) for c in claves]
+    for col, func in agregaciones.items():
+        valor = identificador(col)
+        if col in codificadas:
+            valor = f"CASE WHEN {valor} >= 0 THEN {valor} END"
+        expresiones.append(f"{_FUNCIONES_SQL[func].format(col=valor)} AS {identificador(col)}")
+    if tamano:
+        expresiones.append(f"COUNT(*) AS {identificador(tamano)}")
+
+    filtros = [f"{identificador(c)} IS NOT NULL" for c in claves]
+    parametros = []
+    if condicion is not None:
+        filtros.append(f"({condicion[0]})")
+        parametros = condicion[1]
+
+    lista_claves = ', '.join(identificador(c) for c in claves)
+    sql = (
+        f"SELECT {', '.join(expresiones)} FROM {identificador(tabla)} "
+        f"WHERE {' AND '.join(filtros)} GROUP BY {lista_claves} ORDER BY {lista_claves}"
+    )
+    return conexion().execute(sql, parametros).df()
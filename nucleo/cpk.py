@@ -0,0 +1,298 @@
+# Este archivo contiene los cálculos de Costo Por Kilómetro (CPK) desglosado por componentes, sin dependencias de interfaz.
+
+# Función: calcular_sumas_diarias_cpk / sumas_diarias_cpk
+# - Calculan por día (fecha de inicio de la orden, dentro del mes de su columna Periodo) las sumas de costos, kms y litros y los conteos de cada criterio
+#   (todas las órdenes, solo con costo, solo con componente, entre cargas), en el motor de agregación seleccionado.
+# - Con ordenes_segmento (mapeo de historial_entre_cargas), el criterio Entre Cargas toma los segmentos completos
+#   que tocan las órdenes filtradas; sin él, toma todas las cargas.
+# - Todo es aditivo: cualquier granularidad (día, semana, mes, trimestre) sale de sumar días (ver nucleo/periodos.py).
+# - sumas_diarias_cpk es la versión con caché en disco, para la base completa (precálculo y artefactos);
+#   las selecciones filtradas de la interfaz usan calcular_sumas_diarias_cpk y no escriben una entrada del caché cada vez.
+
+# Función: agrupar_componentes_cpk
+# - Agrupa y calcula el CPK de combustible, peajes y mantenimiento bajo diferentes criterios (todas las órdenes, solo con costo, solo con componente, entre cargas).
+# - Devuelve un DataFrame con todos los indicadores necesarios para el análisis comparativo, por periodo de la granularidad pedida.
+# - Las columnas son un índice de dos niveles (Métrica, Criterio) sobre un solo bloque float contiguo;
+#   se selecciona con df_all.xs(métrica, axis=1, level='Métrica') o df_all[(métrica, criterio)].
+# - Si recibe las sumas diarias ya calculadas, solo las reagrupa: cambiar de granularidad no vuelve a recorrer las órdenes.
+
+# Función: construir_df_cpk_periodo
+# - Construye un DataFrame con los valores de CPK y otros indicadores por periodo y grupo de análisis.
+# - Devuelve una vista sobre las columnas (Métrica, Criterio) de df_all en lugar de copiar cada serie.
+
+# Función: ventanas_moviles_cpk
+# - Calcula en una sola pasada vectorizada la media y desviación estándar móviles y los cambios periodo a periodo
+#   de todas las métricas y criterios de df_cpk_periodo, con sumas acumuladas y sumas de cuadrados.
+# - Acepta cualquier largo de ventana.
+
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+CRITERIOS_CPK = ['Todas las Órdenes', 'Órdenes con costo', 'Órdenes con Componente', 'Entre Cargas']
+
+METRICAS_CPK = [
+    'CPK Combustible', 'CPK Peajes', 'CPK Mantenimiento', 'Total CPK',
+    'Rendimiento Kms/Litro', 'Costo por Litro',
+    'No. Consideradas Combustible', 'No. Consideradas Peajes', 'No. Consideradas Mantenimiento',
+]
+
+@instrumentar
+def calcular_sumas_diarias_cpk(df, historial_cargas, motor=None, ordenes_segmento=None):
+    """
+    Calcula las sumas y conteos diarios de todos los criterios de CPK.
+    Args:
+        df: DataFrame de órdenes (con o sin filtros).
+        historial_cargas: historial de historial_entre_cargas, calculado sobre la base completa.
+        motor: motor de agregación; None usa PYTRACK_MOTOR.
+        ordenes_segmento: mapeo orden -> segmento de historial_entre_cargas(..., mapeo=True), opcional.
+    Returns:
+        diario: DataFrame indexado por día (días desde 1970-01-01) con columnas (parte, columna);
+            los días sin filas en una parte valen 0.
+    """
+    import pandas as pd
+    from nucleo.periodos import sumas_diarias
+    from nucleo.historial import segmentos_de_ordenes
+
+    # Los filtros de cada criterio se pasan como máscara para no copiar los DataFrames filtrados.
+    # Los días respetan la columna Periodo: por mes, el resultado es el mismo que agrupar por Periodo
+    sumas = ['Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento', 'kmstotales', 'Litros']
+    ordenes = dict(columna_fecha='Inicio de la Orden', columna_periodo='Periodo', tamano='No. Órdenes', motor=motor)
+    partes = {
+        'Todas las Órdenes': sumas_diarias(df, sumas=sumas, **ordenes),
+        'Órdenes con costo': sumas_diarias(df, sumas=sumas, mascara=df['Costo Total'] > 0, **ordenes),
+        'Combustible': sumas_diarias(
+            df, sumas=['Costo Combustible', 'kmstotales', 'Litros'], mascara=df['Orden con Costo de Combustible'] == True, **ordenes
+        ),
+        'Peajes': sumas_diarias(
+            df, sumas=['Costo Peajes', 'kmstotales'], mascara=df['Orden con Costo de Peajes'] == True, **ordenes
+        ),
+        'Mantenimiento': sumas_diarias(
+            df, sumas=['Costo Mantenimiento', 'kmstotales'], mascara=df['Orden con Costo de Mantenimiento'] == True, **ordenes
+        ),
+    }
+
+    hist_cargas = historial_cargas[['Inicio Orden de Carga', 'Periodo', 'Costo de Combustible', 'KMs Recorridos desde Última Carga', 'Litros Combustible Cargados', 'Costo de Peajes', 'Costo de Mantenimiento']].assign(**{
+        'Carga con Peajes': historial_cargas['Costo de Peajes'] > 0,
+        'Carga con Mantenimiento': historial_cargas['Costo de Mantenimiento'] > 0,
+    })
+    # Los totales de cada segmento ya están en el historial: filtrar es elegir segmentos, no repetir el historial.
+    # Sin mapeo se toman todas las cargas; agrupar_componentes_cpk deja solo los periodos con órdenes
+    mascara_cargas = None
+    if ordenes_segmento is not None:
+        mascara_cargas = historial_cargas['Segmento'].isin(segmentos_de_ordenes(ordenes_segmento, df['No. Orden']))
+    partes['Entre Cargas'] = sumas_diarias(
+        hist_cargas, 'Inicio Orden de Carga',
+        ['Costo de Combustible', 'KMs Recorridos desde Última Carga', 'Litros Combustible Cargados',
+         'Costo de Peajes', 'Costo de Mantenimiento', 'Carga con Peajes', 'Carga con Mantenimiento'],
+        mascara=mascara_cargas, tamano='No. Cargas con Combustible', motor=motor, columna_periodo='Periodo'
+    )
+
+    return pd.concat(partes, axis=1).fillna(0)
+
+@instrumentar
+@cache_disco(columnas={
+    'df': ['Inicio de la Orden', 'Periodo', 'No. Orden', 'Costo Total', 'Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento',
+           'kmstotales', 'Litros', 'Orden con Costo de Combustible', 'Orden con Costo de Peajes', 'Orden con Costo de Mantenimiento'],
+    'historial_cargas': ['Inicio Orden de Carga', 'Periodo', 'Segmento', 'Costo de Combustible', 'KMs Recorridos desde Última Carga',
+                         'Litros Combustible Cargados', 'Costo de Peajes', 'Costo de Mantenimiento'],
+})
+def sumas_diarias_cpk(df, historial_cargas, motor=None, ordenes_segmento=None):
+    """
+    Calcula las sumas y conteos diarios de todos los criterios de CPK, con caché en disco.
+    Args:
+        df, historial_cargas, motor, ordenes_segmento: como en calcular_sumas_diarias_cpk (df es la base completa).
+    Returns:
+        diario: el mismo DataFrame que calcular_sumas_diarias_cpk.
+    """
+    return calcular_sumas_diarias_cpk(df, historial_cargas, motor=motor, ordenes_segmento=ordenes_segmento)
+
+@instrumentar
+def agrupar_componentes_cpk(df,historial_cargas, motor=None, ordenes_segmento=None, granularidad='mes', diario=None):
+    """
+    Calcula los indicadores de CPK de todos los criterios por periodo.
+    Args:
+        df: DataFrame de órdenes (con o sin filtros).
+        historial_cargas: historial de historial_entre_cargas, calculado sobre la base completa.
+        motor: motor de agregación; None usa PYTRACK_MOTOR.
+        ordenes_segmento: mapeo orden -> segmento para que Entre Cargas respete los filtros, opcional.
+        granularidad: 'dia', 'semana', 'mes' o 'trimestre'.
+        diario: resultado de calcular_sumas_diarias_cpk para df; si se pasa, df e historial_cargas no se recorren.
+    Returns:
+        df_all: DataFrame indexado por 'Periodo' (etiquetas de la granularidad) con columnas (Métrica, Criterio).
+    """
+    import pandas as pd
+    import numpy as np
+    from nucleo.periodos import reagrupar
+
+    if diario is None:
+        diario = calcular_sumas_diarias_cpk(df, historial_cargas, motor=motor, ordenes_segmento=ordenes_segmento)
+    agregado = reagrupar(diario, granularidad)
+    # Solo los periodos con órdenes; las cargas de otros periodos no se muestran
+    agregado = agregado[agregado[('Todas las Órdenes', 'No. Órdenes')] > 0]
+
+    def razon(parte, numerador, denominador):
+        return agregado[(parte, numerador)] / agregado[(parte, denominador)]
+
+    # Origen de cada celda (métrica, criterio) del bloque de resultados
+    n_todas = agregado[('Todas las Órdenes', 'No. Órdenes')]
+    n_costo = agregado[('Órdenes con costo', 'No. Órdenes')]
+    origen = {
+        'Todas las Órdenes': {
+            'CPK Combustible': razon('Todas las Órdenes', 'Costo Combustible', 'kmstotales'),
+            'CPK Peajes': razon('Todas las Órdenes', 'Costo Peajes', 'kmstotales'),
+            'CPK Mantenimiento': razon('Todas las Órdenes', 'Costo Mantenimiento', 'kmstotales'),
+            'Rendimiento Kms/Litro': razon('Todas las Órdenes', 'kmstotales', 'Litros'),
+            'Costo por Litro': razon('Todas las Órdenes', 'Costo Combustible', 'Litros'),
+            'No. Consideradas Combustible': n_todas,
+            'No. Consideradas Peajes': n_todas,
+            'No. Consideradas Mantenimiento': n_todas,
+        },
+        'Órdenes con costo': {
+            'CPK Combustible': razon('Órdenes con costo', 'Costo Combustible', 'kmstotales'),
+            'CPK Peajes': razon('Órdenes con costo', 'Costo Peajes', 'kmstotales'),
+            'CPK Mantenimiento': razon('Órdenes con costo', 'Costo Mantenimiento', 'kmstotales'),
+            'Rendimiento Kms/Litro': razon('Órdenes con costo', 'kmstotales', 'Litros'),
+            'Costo por Litro': razon('Órdenes con costo', 'Costo Combustible', 'Litros'),
+            'No. Consideradas Combustible': n_costo,
+            'No. Consideradas Peajes': n_costo,
+            'No. Consideradas Mantenimiento': n_costo,
+        },
+        'Órdenes con Componente': {
+            'CPK Combustible': razon('Combustible', 'Costo Combustible', 'kmstotales'),
+            'CPK Peajes': razon('Peajes', 'Costo Peajes', 'kmstotales'),
+            'CPK Mantenimiento': razon('Mantenimiento', 'Costo Mantenimiento', 'kmstotales'),
+            'Rendimiento Kms/Litro': razon('Combustible', 'kmstotales', 'Litros'),
+            'Costo por Litro': razon('Combustible', 'Costo Combustible', 'Litros'),
+            'No. Consideradas Combustible': agregado[('Combustible', 'No. Órdenes')],
+            'No. Consideradas Peajes': agregado[('Peajes', 'No. Órdenes')],
+            'No. Consideradas Mantenimiento': agregado[('Mantenimiento', 'No. Órdenes')],
+        },
+        'Entre Cargas': {
+            'CPK Combustible': razon('Entre Cargas', 'Costo de Combustible', 'KMs Recorridos desde Última Carga'),
+            'CPK Peajes': razon('Entre Cargas', 'Costo de Peajes', 'KMs Recorridos desde Última Carga'),
+            'CPK Mantenimiento': razon('Entre Cargas', 'Costo de Mantenimiento', 'KMs Recorridos desde Última Carga'),
+            'Rendimiento Kms/Litro': razon('Entre Cargas', 'KMs Recorridos desde Última Carga', 'Litros Combustible Cargados'),
+            'Costo por Litro': razon('Entre Cargas', 'Costo de Combustible', 'Litros Combustible Cargados'),
+            'No. Consideradas Combustible': agregado[('Entre Cargas', 'No. Cargas con Combustible')],
+            'No. Consideradas Peajes': agregado[('Entre Cargas', 'Carga con Peajes')],
+            'No. Consideradas Mantenimiento': agregado[('Entre Cargas', 'Carga con Mantenimiento')],
+        },
+    }
+
+    # Un solo bloque float contiguo con columnas (Métrica, Criterio), agrupadas por criterio
+    # para que construir_df_cpk_periodo pueda devolver rebanadas sin copiar.
+    periodos = agregado.index
+    n_metricas = len(METRICAS_CPK)
+    bloque = np.zeros((len(periodos), n_metricas * len(CRITERIOS_CPK)), dtype=float)
+    for c, criterio in enumerate(CRITERIOS_CPK):
+        for m, metrica in enumerate(METRICAS_CPK):
+            if metrica in origen[criterio]:
+                bloque[:, c * n_metricas + m] = origen[criterio][metrica].reindex(periodos).to_numpy(dtype=float)
+    bloque[np.isnan(bloque)] = 0
+
+    # Total CPK = Combustible + Peajes, como se compara en las gráficas de componentes
+    for c in range(len(CRITERIOS_CPK)):
+        bloque[:, c * n_metricas + METRICAS_CPK.index('Total CPK')] = (
+            bloque[:, c * n_metricas + METRICAS_CPK.index('CPK Combustible')]
+            + bloque[:, c * n_metricas + METRICAS_CPK.index('CPK Peajes')]
+        )
+
+    columnas = pd.MultiIndex.from_arrays(
+        [np.tile(METRICAS_CPK, len(CRITERIOS_CPK)), np.repeat(CRITERIOS_CPK, n_metricas)],
+        names=['Métrica', 'Criterio']
+    )
+    df_all = pd.DataFrame(bloque, index=pd.Index(periodos, name='Periodo'), columns=columnas)
+
+    return df_all
+
+@instrumentar
+def construir_df_cpk_periodo(df_all, grupos=['todas', 'costo', 'componente', 'cargas']):
+    
+    """
+    Construye un DataFrame de CPK por periodo según los grupos seleccionados.
+    Args:
+        df_all: DataFrame de agrupar_componentes_cpk con columnas (Métrica, Criterio).
+        grupos: lista de grupos a incluir. Opciones:
+            'todas'      -> Todas las Órdenes
+            'costo'      -> Órdenes con costo
+            'componente' -> Órdenes con el Componente
+            'cargas'     -> Por Cargas
+    Returns:
+        df_cpk_periodo: DataFrame con los CPK seleccionados. Si los grupos son consecutivos
+            (por ejemplo, los cuatro) es una vista sobre df_all, sin copiar datos.
+    """
+
+
+    grupo_a_criterio = {
+        'todas': 'Todas las Órdenes',
+        'costo': 'Órdenes con costo',
+        'componente': 'Órdenes con Componente',
+        'cargas': 'Entre Cargas',
+    }
+    posiciones = sorted(CRITERIOS_CPK.index(grupo_a_criterio[g]) for g in grupos)
+
+    # df_all guarda las columnas agrupadas por criterio: grupos consecutivos son una rebanada (vista)
+    if posiciones == list(range(posiciones[0], posiciones[-1] + 1)):
+        n_metricas = len(METRICAS_CPK)
+        return df_all.iloc[:, posiciones[0] * n_metricas:(posiciones[-1] + 1) * n_metricas]
+
+    criterios = [CRITERIOS_CPK[p] for p in posiciones]
+    return df_all.loc[:, df_all.columns.get_level_values('Criterio').isin(criterios)]
+
+@instrumentar
+def ventanas_moviles_cpk(df_cpk_periodo, ventana=3):
+    """
+    Calcula indicadores móviles de todas las columnas (Métrica, Criterio) en una sola pasada.
+    Args:
+        df_cpk_periodo: DataFrame por periodo con columnas (Métrica, Criterio), ordenado por periodo.
+        ventana: número de periodos de cada ventana (>= 1).
+    Returns:
+        dict de DataFrames con el mismo índice y columnas que df_cpk_periodo:
+            'media'     -> media móvil de la ventana
+            'std'       -> desviación estándar móvil (muestral) de la ventana
+            'delta'     -> cambio contra el periodo anterior
+            'delta_pct' -> cambio porcentual contra el periodo anterior
+        Los valores NaN o inf no cuentan en la ventana; las ventanas incompletas quedan en NaN.
+    """
+    import numpy as np
+    import pandas as pd
+
+    valores = df_cpk_periodo.to_numpy(dtype=float)
+    ventana = min(max(1, int(ventana)), len(valores) + 1)
+    validos = np.isfinite(valores)
+    limpios = np.where(validos, valores, 0.0)
+
+    # Sumas acumuladas con una fila de ceros al inicio: la suma de la ventana que termina en i es C[i+1] - C[i+1-ventana]
+    ceros = np.zeros((1, valores.shape[1]))
+    suma = np.vstack([ceros, np.cumsum(limpios, axis=0)])
+    suma_cuadrados = np.vstack([ceros, np.cumsum(limpios ** 2, axis=0)])
+    conteo = np.vstack([ceros, np.cumsum(validos, axis=0)])
+
+    s = suma[ventana:] - suma[:len(suma) - ventana]
+    q = suma_cuadrados[ventana:] - suma_cuadrados[:len(suma) - ventana]
+    n = conteo[ventana:] - conteo[:len(suma) - ventana]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.where(n > 0, s / n, np.nan)
+        varianza = np.where(n > 1, (q - s * media) / (n - 1), np.nan)
+    std = np.sqrt(np.clip(varianza, 0, None))
+
+    # Las primeras ventana-1 filas no tienen ventana completa
+    relleno = np.full((len(valores) - len(media), valores.shape[1]), np.nan)
+    media = np.vstack([relleno, media])
+    std = np.vstack([relleno, std])
+
+    anterior = np.vstack([np.full((1, valores.shape[1]), np.nan), valores[:-1]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = valores - anterior
+        delta_pct = np.where(np.abs(anterior) > 0, delta / np.abs(anterior) * 100, np.nan)
+
+    def como_df(datos):
+        return pd.DataFrame(datos, index=df_cpk_periodo.index, columns=df_cpk_periodo.columns)
+
+    return {
+        'media': como_df(media),
+        'std': como_df(std),
+        'delta': como_df(delta),
+        'delta_pct': como_df(delta_pct),
+    }
@@ -0,0 +1,123 @@
+# Este archivo contiene los cálculos de completitud e indicadores estadísticos de las órdenes, sin dependencias de interfaz.
+
+# Función: calcular_completitud_diaria / completitud_diaria
+# - Cuentan por día (fecha de inicio de la orden, dentro del mes de su columna Periodo) los viajes y las órdenes con costo de combustible, peajes y mantenimiento.
+# - completitud_diaria es la versión con caché en disco, para la base completa (precálculo y artefactos);
+#   df_completitud sobre una selección filtrada usa calcular_completitud_diaria.
+
+# Función: df_completitud
+# - Calcula el porcentaje de órdenes que tienen costos de combustible, peajes y mantenimiento por periodo.
+# - Devuelve un DataFrame agrupado por periodo (día, semana, mes o trimestre) con estos indicadores.
+# - Reagrupa los conteos diarios (ver nucleo/periodos.py); si los recibe ya calculados no recorre las órdenes.
+# - Útil para evaluar la calidad y completitud de los datos.
+
+# Función: indicadores_generales
+# - Cuenta EC, proyectos, clientes, unidades, conductores, rutas, órdenes y periodos distintos, y suma costos y kms.
+
+# Función: estadisticas_por_orden
+# - Calcula promedio, desviación estándar, cuartiles, mínimo y máximo por orden de los costos y kms,
+#   en una sola pasada sobre las columnas necesarias.
+
+import pandas as pd
+import numpy as np
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+COLUMNAS_ESTADISTICAS = ['Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento', 'kmstotales']
+
+@instrumentar
+def calcular_completitud_diaria(df, motor=None):
+    from nucleo.periodos import sumas_diarias
+
+    # Las banderas se calculan en un DataFrame aparte; df no se modifica
+    banderas = pd.DataFrame({
+        'Inicio de la Orden': df['Inicio de la Orden'],
+        'Periodo': df['Periodo'],
+        'No. Viajes': df['No. Viajes'],
+        'Orden con Costo de Combustible': df['Costo Combustible'] > 0,
+        'Orden con Costo de Peajes': df['Costo Peajes'] > 0,
+        'Orden con Costo de Mantenimiento': df['Costo Mantenimiento'] > 0,
+    })
+    return sumas_diarias(banderas, 'Inicio de la Orden', [
+        'No. Viajes',
+        'Orden con Costo de Combustible',
+        'Orden con Costo de Peajes',
+        'Orden con Costo de Mantenimiento'], motor=motor, columna_periodo='Periodo')
+
+@instrumentar
+@cache_disco(columnas={'df': ['Inicio de la Orden', 'Periodo', 'No. Viajes', 'Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento']})
+def completitud_diaria(df, motor=None):
+    return calcular_completitud_diaria(df, motor=motor)
+
+@instrumentar
+def df_completitud(df, motor=None, granularidad='mes', diario=None):
+    """
+    Calcula la completitud de costos por periodo.
+    Args:
+        df: DataFrame de órdenes (no se modifica).
+        motor: motor de agregación; None usa PYTRACK_MOTOR.
+        granularidad: 'dia', 'semana', 'mes' o 'trimestre'.
+        diario: resultado de calcular_completitud_diaria (o completitud_diaria) para df; si se pasa, df no se recorre.
+    Returns:
+        completitud_groupby: DataFrame indexado por 'Periodo' con los conteos y los porcentajes por componente.
+    """
+    from nucleo.periodos import reagrupar
+
+    if diario is None:
+        diario = calcular_completitud_diaria(df, motor=motor)
+    completitud_groupby = reagrupar(diario, granularidad)
+
+    completitud_groupby['% Órdenes con Costo Combustible'] = (completitud_groupby['Orden con Costo de Combustible'] / completitud_groupby['No. Viajes']) * 100
+    completitud_groupby['% Órdenes con Costo Peajes'] = (completitud_groupby['Orden con Costo de Peajes'] / completitud_groupby['No. Viajes']) * 100
+    completitud_groupby['% Órdenes con Costo Mantenimiento'] = (completitud_groupby['Orden con Costo de Mantenimiento'] / completitud_groupby['No. Viajes']) * 100
+
+    return completitud_groupby
+
+@instrumentar
+def indicadores_generales(df):
+    info_df = {}
+
+    # Generales
+    info_df['EC'] = df['EC'].nunique(dropna=False)
+    info_df['Proyectos'] = df['Proyecto'].nunique(dropna=False)
+    info_df['Clientes'] = df['Cliente'].nunique(dropna=False)
+    info_df['Unidades'] = df['Tracto'].nunique(dropna=False)
+    info_df['Conductores'] = df['Conductor'].nunique(dropna=False)
+    info_df['No. Rutas'] = df['Ruta Ciudades'].nunique(dropna=False)
+    info_df['No. de Órdenes'] = len(df)
+    info_df['Periodo'] = df['Periodo'].nunique(dropna=False)
+
+    # Costos, CPK y Kms Recorridos
+    info_df['Costo Combustible'] = df['Costo Combustible'].sum()
+    info_df['Costo Peajes'] = df['Costo Peajes'].sum()
+    info_df['Costo Mantenimiento'] = df['Costo Mantenimiento'].sum()
+    info_df['Costo Total'] = info_df['Costo Combustible'] + info_df['Costo Peajes'] + info_df['Costo Mantenimiento']
+    info_df['kms Totales Recorridos'] = df['kmstotales'].sum()
+    info_df['Costo Por Km (CPK)'] = info_df['Costo Total'] / info_df['kms Totales Recorridos'] if info_df['kms Totales Recorridos'] > 0 else 0
+    info_df['Costo por Litro'] = df['Costo por litro'].fillna(0).mean() if not df['Costo por litro'].empty else 0
+
+    return info_df
+
+@instrumentar
+def estadisticas_por_orden(df, columnas=COLUMNAS_ESTADISTICAS):
+    """
+    Calcula los estadísticos por orden de las columnas indicadas.
+    Args:
+        df: DataFrame de órdenes.
+        columnas: columnas numéricas a describir.
+    Returns:
+        estadisticas: DataFrame indexado por columna con 'Promedio', 'Desviación Estándar', 'Q1', 'Mediana', 'Q3', 'Mínimo' y 'Máximo'.
+    """
+    # Solo se copian las columnas descritas; los infinitos se tratan como faltantes
+    datos = df[columnas].replace([np.inf, -np.inf], np.nan)
+    cuantiles = datos.quantile([0.25, 0.5, 0.75])
+
+    return pd.DataFrame({
+        'Promedio': datos.mean(),
+        'Desviación Estándar': datos.std(),
+        'Q1': cuantiles.loc[0.25],
+        'Mediana': cuantiles.loc[0.5],
+        'Q3': cuantiles.loc[0.75],
+        'Mínimo': datos.min(),
+        'Máximo': datos.max(),
+    })
@@ -0,0 +1,149 @@
+# Este archivo contiene la exportación por bloques de tablas a CSV, Parquet o Excel.
+# No depende de Streamlit: la app la corre en un hilo aparte (exportar_utils.py) y cualquier proceso sin interfaz la puede usar.
+
+# Función: exportar_tabla
+# - Escribe el DataFrame en bloques de filas: cada bloque se convierte y se escribe antes de tomar el siguiente,
+#   así nunca se arma una segunda copia completa de la tabla en memoria.
+# - CSV: un bloque a la vez sobre el mismo archivo. Parquet: un row group por bloque con pyarrow.ParquetWriter.
+#   Excel: xlsxwriter con constant_memory si está instalado (opcional); si no, openpyxl en modo write_only.
+#   En ambos casos cada fila se escribe al archivo en cuanto se completa.
+# - Informa el avance con un callback (filas escritas, filas totales).
+
+# Función: aplanar_columnas
+# - Convierte una tabla con índice con nombre y columnas MultiIndex (como la de agrupar_componentes_cpk) en columnas simples.
+
+import numpy as np
+import pandas as pd
+
+# formato -> (extensión, tipo MIME)
+FORMATOS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/octet-stream'),
+    'excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+TAMANO_BLOQUE = 50_000
+
+# Filas de datos que caben en una hoja de Excel (más el encabezado)
+MAX_FILAS_EXCEL = 1_048_575
+
+def aplanar_columnas(tabla, separador=' | '):
+    tabla = tabla.reset_index() if any(nombre is not None for nombre in tabla.index.names) else tabla
+    if isinstance(tabla.columns, pd.MultiIndex):
+        tabla = tabla.set_axis(
+            [separador.join(str(nivel) for nivel in col if nivel != '') for col in tabla.columns], axis=1
+        )
+    return tabla
+
+def _bloques(df, tamano_bloque):
+    for inicio in range(0, len(df), tamano_bloque):
+        yield df.iloc[inicio:inicio + tamano_bloque]
+
+def _esquema_parquet(df):
+    import pyarrow as pa
+
+    # El esquema se infiere de una muestra repartida en toda la tabla; una columna sin valores en la muestra se escribe como texto
+    muestra = df.iloc[np.unique(np.linspace(0, len(df) - 1, num=min(len(df), 10_000)).astype(np.intp))] if len(df) else df
+    esquema = pa.Schema.from_pandas(muestra, preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            esquema = esquema.set(i, pa.field(campo.name, pa.string()))
+    return esquema
+
+def _escribir_csv(df, ruta, tamano_bloque, avance):
+    with open(ruta, 'w', encoding='utf-8-sig', newline='') as f:
+        for i, bloque in enumerate(_bloques(df, tamano_bloque)):
+            bloque.to_csv(f, header=(i == 0), index=False)
+            avance(len(bloque))
+        if not len(df):
+            df.to_csv(f, index=False)
+
+def _escribir_parquet(df, ruta, tamano_bloque, avance):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = _esquema_parquet(df)
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for bloque in _bloques(df, tamano_bloque):
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            avance(len(bloque))
+
+def xlsxwriter_disponible():
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _filas_excel(bloque):
+    # Valores de Python nativos: los faltantes van vacíos y los tipos sin equivalente en Excel (Period, Timedelta...) como texto
+    valores = bloque.astype(object).where(bloque.notna(), None)
+    for fila in valores.itertuples(index=False, name=None):
+        yield [
+            v.item() if isinstance(v, np.generic) else
+            v if v is None or isinstance(v, (str, int, float, bool, pd.Timestamp)) else str(v)
+            for v in fila
+        ]
+
+def _escribir_excel(df, ruta, tamano_bloque, avance):
+    if len(df) > MAX_FILAS_EXCEL:
+        raise ValueError(f"Excel admite hasta {MAX_FILAS_EXCEL:,} filas por hoja; la tabla tiene {len(df):,}. Exporta a CSV o Parquet.")
+
+    encabezado = [str(c) for c in df.columns]
+    if xlsxwriter_disponible():
+        import xlsxwriter
+
+        # constant_memory: cada fila se escribe al archivo temporal en cuanto se completa
+        libro = xlsxwriter.Workbook(ruta, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+        hoja = libro.add_worksheet('Datos')
+        hoja.write_row(0, 0, encabezado)
+        fila_excel = 1
+        for bloque in _bloques(df, tamano_bloque):
+            for fila in _filas_excel(bloque):
+                hoja.write_row(fila_excel, 0, fila)
+                fila_excel += 1
+            avance(len(bloque))
+        libro.close()
+        return
+
+    # Sin xlsxwriter, openpyxl en modo write_only (más lento, también con memoria constante)
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+    hoja.append(encabezado)
+    for bloque in _bloques(df, tamano_bloque):
+        for fila in _filas_excel(bloque):
+            hoja.append(fila)
+        avance(len(bloque))
+    libro.save(ruta)
+
+_ESCRITORES = {
+    'csv': _escribir_csv,
+    'parquet': _escribir_parquet,
+    'excel': _escribir_excel,
+}
+
+def exportar_tabla(df, ruta, formato, tamano_bloque=TAMANO_BLOQUE, progreso=None):
+    """
+    Escribe el DataFrame en el archivo, por bloques de filas.
+    Args:
+        df: tabla a exportar (solo se lee).
+        ruta: archivo de salida.
+        formato: 'csv', 'parquet' o 'excel'.
+        tamano_bloque: filas por bloque (y por row group en Parquet).
+        progreso: función opcional progreso(filas_escritas, filas_totales), llamada después de cada bloque.
+    Returns:
+        ruta: el archivo escrito.
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+
+    escritas = [0]
+    def avance(filas):
+        escritas[0] += filas
+        if progreso is not None:
+            progreso(escritas[0], len(df))
+
+    _ESCRITORES[formato](df, ruta, tamano_bloque, avance)
+    return ruta
@@ -0,0 +1,241 @@
+# Este archivo define funciones para analizar el historial de cargas de combustible entre eventos para cada tracto.
+# Permite calcular métricas operativas entre recargas de combustible y entre mantenimientos.
+# Los segmentos entre eventos se calculan con el motor vectorizado de nucleo/segmentos.py; cada historial es una configuración
+# (clave, columna de orden, evento y reducciones) más las métricas derivadas de sus columnas.
+# En el caché en disco cada historial depende solo de las columnas que lee, y la segmentación (planear_segmentos)
+# solo de la clave, la fecha y el evento: corregir peajes recalcula las sumas, no vuelve a segmentar las cargas.
+
+# Función: historial_entre_cargas
+# - Segmenta las órdenes de cada tracto (o de otra clave, como 'Conductor') entre cargas de combustible.
+# - Calcula métricas como kms recorridos, costos, rendimiento, CPK y otros indicadores entre cargas.
+# - Devuelve dos DataFrames: uno detallado por evento de carga y otro agrupado por la clave (con el motor de nucleo/motor.py).
+# - Es fundamental para analizar el desempeño operativo y los costos entre recargas.
+# - Con mapeo=True también devuelve el mapeo orden -> segmento (columna 'Segmento' del historial) con lo que aporta
+#   cada orden a su segmento; así los indicadores entre cargas se recalculan con filtros sin volver a segmentar.
+
+# Función: historial_entre_mantenimientos
+# - Segmenta las órdenes de cada tracto (u otra clave) entre órdenes con costo de mantenimiento:
+#   días, kms, órdenes y costos entre un mantenimiento y el siguiente.
+
+# Función: segmentos_de_ordenes
+# - Regresa los segmentos (filas del historial) que tocan alguna de las órdenes dadas, usando el mapeo de historial_entre_cargas.
+
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+# Configuración del historial entre cargas: columna de salida -> (columna de órdenes, reducción de nucleo/segmentos.py)
+REDUCCIONES_CARGAS = {
+    'Periodo': ('Periodo', 'evento'),
+    'No. de Carga Combustible': (None, 'no_evento'),
+    'Fecha Orden de Ant. Carga': ('Cierre de la Orden', 'evento_anterior'),
+    'Fecha Orden de Carga': ('Cierre de la Orden', 'evento'),
+    'Inicio Orden de Carga': ('Inicio de la Orden', 'evento'),
+    'Litros Combustible Cargados': ('Litros', 'evento'),
+    'Costo por Litro': ('Costo por litro', 'evento'),
+    'Costo de Combustible': ('Costo Combustible', 'evento'),
+    'Costo de Peajes': ('Costo Peajes', 'sum'),
+    'Costo de Mantenimiento': ('Costo Mantenimiento', 'sum'),
+    'KMs Recorridos desde Última Carga': ('kmstotales', 'sum'),
+    'Viajes entre Cargas': (None, 'size'),
+    'Rutas Distintas': ('Ruta Ciudades', 'nunique'),
+    'Proyectos Distintos': ('Proyecto', 'nunique'),
+    'Promedio Kms por Viaje': ('kmstotales', 'mean'),
+}
+
+# Configuración del historial entre mantenimientos
+REDUCCIONES_MANTENIMIENTOS = {
+    'Periodo': ('Periodo', 'evento'),
+    'No. de Mantenimiento': (None, 'no_evento'),
+    'Fecha Mantenimiento Anterior': ('Cierre de la Orden', 'evento_anterior'),
+    'Fecha Mantenimiento': ('Cierre de la Orden', 'evento'),
+    'Costo de Mantenimiento': ('Costo Mantenimiento', 'evento'),
+    'KMs desde Último Mantenimiento': ('kmstotales', 'sum'),
+    'Órdenes entre Mantenimientos': (None, 'size'),
+    'Costo de Combustible': ('Costo Combustible', 'sum'),
+    'Costo de Peajes': ('Costo Peajes', 'sum'),
+}
+
+# Aportaciones por orden del mapeo orden -> segmento
+COLUMNAS_MAPEO = ['kmstotales', 'Costo Peajes', 'Costo Mantenimiento', 'Costo Combustible', 'Litros']
+
+def _columnas_usadas(evento, reducciones, extra=()):
+    # Columnas de df que lee cada historial: las que entran a la huella del caché en disco (ver nucleo/cache_disco.py)
+    def columnas(argumentos):
+        usadas = [argumentos['clave'], 'Inicio de la Orden', evento, *extra]
+        return usadas + [c for c, _ in reducciones.values() if c is not None and c not in usadas]
+    return columnas
+
+def _dividir(numerador, denominador):
+    import numpy as np
+
+    # Sin denominador el indicador queda en NaN (no en inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominador != 0, numerador / denominador, np.nan)
+
+def _sin_evento_anterior(historial, inicio, fin, columna_dias):
+    import numpy as np
+
+    # El primer evento de cada clave no tiene evento anterior: su tiempo entre eventos es NaN y se descarta
+    historial[columna_dias] = (historial[fin] - historial[inicio]).dt.total_seconds() / (24 * 3600)
+    return historial[
+        ~historial[columna_dias].isin([np.inf, -np.inf]) &
+        ~historial[columna_dias].isna()
+    ].copy()
+
+@instrumentar
+@cache_disco(columnas={'df': _columnas_usadas('Orden con Costo de Combustible', REDUCCIONES_CARGAS, ['No. Orden', *COLUMNAS_MAPEO])})
+def historial_entre_cargas(df, motor=None, mapeo=False, clave='Tracto'):
+    """
+    Calcula el historial entre cargas de combustible de todos los tractos (o de otra clave).
+    Args:
+        df: DataFrame de órdenes.
+        motor: motor de agregación del resumen por clave; None usa PYTRACK_MOTOR.
+        mapeo: si es True, también regresa ordenes_segmento.
+        clave: columna que agrupa las órdenes ('Tracto' o, por ejemplo, 'Conductor').
+    Returns:
+        historial_cargas: una fila por carga (segmento), con su id en la columna 'Segmento'.
+        hist_cargas_grouped: resumen por clave.
+        ordenes_segmento (solo con mapeo=True): una fila por orden que cierra en una carga del historial, con
+            'No. Orden', 'Segmento' y lo que aporta la orden al segmento ('kmstotales', 'Costo Peajes',
+            'Costo Mantenimiento', y 'Costo Combustible' y 'Litros' solo en la orden de la carga).
+            Las aportaciones de cada segmento suman sus totales en historial_cargas.
+    """
+
+    import pandas as pd
+    import numpy as np
+    from nucleo.motor import agregar_por_grupo
+    from nucleo.segmentos import segmentar
+
+    resultado = segmentar(df, clave, 'Inicio de la Orden', 'Orden con Costo de Combustible', REDUCCIONES_CARGAS, mapeo=mapeo)
+    historial_cargas, filas = resultado if mapeo else (resultado, None)
+
+    kms = historial_cargas['KMs Recorridos desde Última Carga']
+    historial_cargas['Rendimiento Kms/Litro'] = _dividir(kms, historial_cargas['Litros Combustible Cargados'])
+    historial_cargas['Costo Total'] = (
+        historial_cargas['Costo de Combustible'] + historial_cargas['Costo de Peajes'] + historial_cargas['Costo de Mantenimiento']
+    )
+    historial_cargas['CPK Combustible'] = _dividir(historial_cargas['Costo de Combustible'], kms)
+    historial_cargas['CPK Peajes'] = _dividir(historial_cargas['Costo de Peajes'], kms)
+    historial_cargas['CPK Mantenimiento'] = _dividir(historial_cargas['Costo de Mantenimiento'], kms)
+
+    # Kms por día entre la carga anterior y esta (en días completos); 0 si no hay carga anterior o fue el mismo día
+    dias = (historial_cargas['Fecha Orden de Carga'] - historial_cargas['Fecha Orden de Ant. Carga']).dt.days
+    historial_cargas['Kms Recorridos por Día'] = np.where(
+        historial_cargas['Fecha Orden de Ant. Carga'].notna() & (dias != 0), kms / dias, 0
+    )
+
+    historial_cargas = historial_cargas[[
+        'Periodo',
+        clave,
+        'No. de Carga Combustible',
+        'Fecha Orden de Ant. Carga',
+        'Fecha Orden de Carga',
+        'Inicio Orden de Carga',
+        'Litros Combustible Cargados',
+        'Costo por Litro',
+        'Rendimiento Kms/Litro',
+        'Costo de Combustible',
+        'Costo de Peajes',
+        'Costo de Mantenimiento',
+        'Costo Total',
+        'CPK Combustible',
+        'CPK Peajes',
+        'CPK Mantenimiento',
+        'KMs Recorridos desde Última Carga',
+        'Viajes entre Cargas',
+        'Rutas Distintas',
+        'Proyectos Distintos',
+        'Promedio Kms por Viaje',
+        'Kms Recorridos por Día',
+        # El id de cada segmento es su posición antes de limpiar; se conserva aunque el historial se reordene
+        'Segmento',
+    ]].copy()
+
+    historial_cargas = _sin_evento_anterior(historial_cargas, 'Fecha Orden de Ant. Carga', 'Fecha Orden de Carga', 'Tiempo entre Cargas')
+
+    historial_cargas['Kms Totales'] = historial_cargas['KMs Recorridos desde Última Carga'].fillna(0)
+    historial_cargas['No. Viajes'] = historial_cargas['Viajes entre Cargas'].fillna(0)
+
+    # Resumen por clave con el motor de agregación seleccionado (ver nucleo/motor.py)
+    hist_cargas_grouped = agregar_por_grupo(historial_cargas, [clave], {
+        'No. de Carga Combustible': 'median',
+        'Tiempo entre Cargas': 'mean',
+        'KMs Recorridos desde Última Carga': 'mean',
+        'Litros Combustible Cargados': 'mean',
+        'Costo por Litro': 'mean',
+        'Rendimiento Kms/Litro': 'mean',
+        'Costo de Combustible': 'mean',
+        'Costo de Peajes': 'mean',
+        'Costo de Mantenimiento': 'mean',
+        'Costo Total': 'mean',
+        'CPK Combustible': 'mean',
+        'CPK Peajes': 'mean',
+        'CPK Mantenimiento': 'mean',
+        'Viajes entre Cargas': 'median',
+        'Rutas Distintas': 'median',
+        'Proyectos Distintos': 'median',
+        'Promedio Kms por Viaje': 'mean',
+        'Kms Recorridos por Día': 'mean',
+        'Kms Totales': 'sum',
+        'No. Viajes': 'sum'
+    }, motor=motor)
+
+    if not mapeo:
+        return historial_cargas, hist_cargas_grouped
+
+    ordenes_segmento = df[['No. Orden'] + COLUMNAS_MAPEO].iloc[filas['Posición'].to_numpy()].reset_index(drop=True)
+    ordenes_segmento.insert(1, 'Segmento', filas['Segmento'].to_numpy())
+    # El combustible y los litros de un segmento son los de la orden que lo cierra
+    for c in ('Costo Combustible', 'Litros'):
+        ordenes_segmento[c] = np.where(filas['Evento'].to_numpy(), ordenes_segmento[c].to_numpy(dtype=float), 0.0)
+    # Solo los segmentos que quedaron en el historial (la primera carga de cada clave no tiene carga anterior)
+    ordenes_segmento = ordenes_segmento[ordenes_segmento['Segmento'].isin(historial_cargas['Segmento'])].reset_index(drop=True)
+
+    return historial_cargas, hist_cargas_grouped, ordenes_segmento
+
+@instrumentar
+@cache_disco(columnas={'df': _columnas_usadas('Orden con Costo de Mantenimiento', REDUCCIONES_MANTENIMIENTOS)})
+def historial_entre_mantenimientos(df, motor=None, clave='Tracto'):
+    """
+    Calcula el historial entre mantenimientos de todos los tractos (o de otra clave).
+    Args:
+        df: DataFrame de órdenes.
+        motor: motor de agregación del resumen por clave; None usa PYTRACK_MOTOR.
+        clave: columna que agrupa las órdenes.
+    Returns:
+        historial_mant: una fila por mantenimiento con su mantenimiento anterior, los días, kms, órdenes y costos entre ambos.
+        hist_mant_grouped: resumen por clave.
+    """
+    from nucleo.motor import agregar_por_grupo
+    from nucleo.segmentos import segmentar
+
+    historial_mant = segmentar(df, clave, 'Inicio de la Orden', 'Orden con Costo de Mantenimiento', REDUCCIONES_MANTENIMIENTOS)
+    historial_mant['CPK Mantenimiento'] = _dividir(
+        historial_mant['Costo de Mantenimiento'], historial_mant['KMs desde Último Mantenimiento']
+    )
+    historial_mant = _sin_evento_anterior(historial_mant, 'Fecha Mantenimiento Anterior', 'Fecha Mantenimiento', 'Días entre Mantenimientos')
+
+    hist_mant_grouped = agregar_por_grupo(historial_mant, [clave], {
+        'No. de Mantenimiento': 'max',
+        'Días entre Mantenimientos': 'mean',
+        'KMs desde Último Mantenimiento': 'mean',
+        'Órdenes entre Mantenimientos': 'median',
+        'Costo de Mantenimiento': 'mean',
+        'CPK Mantenimiento': 'mean',
+    }, motor=motor)
+
+    return historial_mant, hist_mant_grouped
+
+def segmentos_de_ordenes(ordenes_segmento, ordenes):
+    """
+    Regresa los segmentos del historial que tocan alguna de las órdenes.
+    Args:
+        ordenes_segmento: mapeo orden -> segmento de historial_entre_cargas(..., mapeo=True).
+        ordenes: valores de 'No. Orden' (por ejemplo, las órdenes que quedan después de los filtros).
+    Returns:
+        segmentos: arreglo con los ids de 'Segmento', sin repetir.
+    """
+    import pandas as pd
+
+    tocados = ordenes_segmento['No. Orden'].isin(pd.unique(pd.Series(ordenes)))
+    return pd.unique(ordenes_segmento['Segmento'].to_numpy()[tocados.to_numpy()])
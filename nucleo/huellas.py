@@ -0,0 +1,154 @@
+# Este archivo contiene la versión de la base de órdenes y las huellas de su contenido, por columna y por tracto.
+# El caché en disco (nucleo/cache_disco.py) arma sus claves con las huellas de las columnas que usa cada función:
+# una corrección que solo toca los peajes no invalida la segmentación entre cargas ni la completitud, por ejemplo.
+
+# Función: huella_columna / huellas_columnas / huella_df
+# - Huella de una columna: hash de su buffer (columnas numéricas, booleanas y fechas) o de los hashes por valor
+#   de pandas (texto y otros tipos). Con xxhash instalado (opcional) se usa XXH3; si no, BLAKE2b.
+# - Las huellas se calculan en cada llamada, sin memorizarlas por objeto: un DataFrame modificado en su lugar
+#   (df.loc[...] = ...) cambia su huella y el caché en disco no regresa un resultado viejo.
+# - huella_df combina la forma, los nombres, los tipos, el índice y las huellas de las columnas pedidas (todas por defecto).
+
+# Función: huellas_por_grupo
+# - Huella de las filas de cada tracto (u otra clave), sensible al orden de sus filas y a todas las columnas pedidas.
+# - El modo batch (artefactos.py) las compara con las de la versión anterior: los tractos sin cambios conservan
+#   sus puntajes de cargas atípicas y solo se vuelven a calificar los que cambiaron (ver nucleo/anomalias.py).
+
+# Función: metadatos_dataset / cambios
+# - metadatos_dataset regresa la versión de la base (huella de todas sus columnas), y las huellas por columna y por tracto.
+# - cambios compara dos metadatos y lista las columnas y los tractos que cambiaron, aparecieron o desaparecieron.
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+def xxhash_disponible():
+    try:
+        import xxhash  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+ALGORITMO = 'xxh3_128' if xxhash_disponible() else 'blake2b'
+
+def _digest(buffer):
+    if ALGORITMO == 'xxh3_128':
+        import xxhash
+        return xxhash.xxh3_128_hexdigest(buffer)
+    return hashlib.blake2b(buffer, digest_size=16).hexdigest()
+
+def hashes_filas(serie):
+    # Un uint64 por valor; dos columnas con los mismos valores dan los mismos hashes
+    if isinstance(serie.dtype, np.dtype):
+        return pd.util.hash_array(serie.to_numpy())
+    return pd.util.hash_pandas_object(serie, index=False).to_numpy()
+
+def huella_columna(serie):
+    if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufcmM':
+        return _digest(np.ascontiguousarray(serie.to_numpy()).view(np.uint8))
+    return _digest(hashes_filas(serie).view(np.uint8))
+
+def huellas_columnas(df, columnas=None):
+    """
+    Regresa la huella de cada columna.
+    Args:
+        df: DataFrame (no se modifica).
+        columnas: columnas a considerar; None para todas.
+    Returns:
+        huellas: dict columna -> huella (texto hexadecimal).
+    """
+    columnas = list(df.columns) if columnas is None else list(columnas)
+    return {columna: huella_columna(df[columna]) for columna in columnas}
+
+def huella_df(df, columnas=None):
+    """
+    Calcula la huella del contenido de un DataFrame.
+    Args:
+        df: DataFrame (no se modifica).
+        columnas: columnas que entran a la huella; None para todas. El número de filas y el índice siempre entran.
+    Returns:
+        huella: texto hexadecimal.
+    """
+    columnas = list(df.columns) if columnas is None else [c for c in columnas if c in df.columns]
+    indice = df.index
+    partes = [
+        repr(len(df)),
+        repr((indice.start, indice.stop, indice.step)) if isinstance(indice, pd.RangeIndex) else huella_columna(indice.to_series()),
+    ]
+    huellas = huellas_columnas(df, columnas)
+    partes += [f'{c}:{df[c].dtype}:{huellas[c]}' for c in columnas]
+    return _digest('|'.join(partes).encode())
+
+def huellas_por_grupo(df, clave='Tracto', columnas=None):
+    """
+    Calcula la huella de las filas de cada grupo.
+    Args:
+        df: DataFrame (no se modifica).
+        clave: columna que define los grupos.
+        columnas: columnas que entran a la huella; None para todas.
+    Returns:
+        huellas: dict valor de la clave (como texto) -> huella. Cambia si cambia, se agrega, se quita
+            o se reordena alguna fila del grupo.
+    """
+    columnas = list(df.columns) if columnas is None else list(columnas)
+    codigos, grupos = pd.factorize(df[clave])
+    # Hash por fila que combina todas las columnas
+    filas = np.zeros(len(df), dtype=np.uint64)
+    for i, columna in enumerate(columnas):
+        filas = filas * np.uint64(0x100000001B3) ^ hashes_filas(df[columna]) ^ np.uint64(i + 1)
+
+    orden = np.argsort(codigos, kind='stable')
+    orden = orden[codigos[orden] >= 0]
+    codigos_ordenados = codigos[orden]
+    inicios = np.flatnonzero(np.r_[True, codigos_ordenados[1:] != codigos_ordenados[:-1]]) if len(orden) else np.array([], dtype=np.intp)
+    # La posición de la fila dentro de su grupo entra al hash: reordenar filas cambia la huella
+    posicion = (np.arange(len(orden)) - np.repeat(inicios, np.diff(np.r_[inicios, len(orden)]))).astype(np.uint64)
+    mezcla = (filas[orden] ^ (posicion * np.uint64(0x9E3779B97F4A7C15))) * np.uint64(0xBF58476D1CE4E5B9)
+    sumas = np.add.reduceat(mezcla, inicios) if len(orden) else np.array([], dtype=np.uint64)
+    tamanos = np.diff(np.r_[inicios, len(orden)])
+    return {
+        str(grupos[codigos_ordenados[inicio]]): f'{int(suma):016x}{int(tamano):08x}'
+        for inicio, suma, tamano in zip(inicios, sumas, tamanos)
+    }
+
+def metadatos_dataset(df, clave='Tracto'):
+    """
+    Calcula la versión y las huellas de la base de órdenes.
+    Args:
+        df: base de órdenes (no se modifica).
+        clave: columna para las huellas por grupo.
+    Returns:
+        metadatos: dict con 'version' (huella de toda la base), 'filas', 'algoritmo',
+            'columnas' (columna -> huella) y 'grupos' (valor de la clave -> huella). Se puede guardar como JSON.
+    """
+    return {
+        'version': huella_df(df)[:16],
+        'filas': int(len(df)),
+        'algoritmo': ALGORITMO,
+        'clave': clave,
+        'columnas': {str(c): h for c, h in huellas_columnas(df).items()},
+        'grupos': huellas_por_grupo(df, clave) if clave in df.columns else {},
+    }
+
+def _diferencias(anterior, actual):
+    return sorted(
+        [k for k in actual if anterior.get(k) != actual[k]] + [k for k in anterior if k not in actual]
+    )
+
+def cambios(anterior, actual):
+    """
+    Compara dos metadatos de metadatos_dataset.
+    Args:
+        anterior, actual: metadatos a comparar (anterior puede ser None).
+    Returns:
+        cambios: dict con 'igual' (misma versión), 'columnas' y 'grupos' (listas de lo que cambió, se agregó o se quitó).
+            Si los metadatos usan otro algoritmo o no hay anteriores, todo cuenta como cambiado.
+    """
+    if anterior is None or anterior.get('algoritmo') != actual['algoritmo']:
+        return {'igual': False, 'columnas': sorted(actual['columnas']), 'grupos': sorted(actual['grupos'])}
+    return {
+        'igual': anterior['version'] == actual['version'],
+        'columnas': _diferencias(anterior['columnas'], actual['columnas']),
+        'grupos': _diferencias(anterior['grupos'], actual['grupos']),
+    }
@@ -0,0 +1,135 @@
+# Este archivo contiene el índice de intervalos de las órdenes (de su inicio a su cierre) por tracto, sin dependencias de interfaz.
+# Responde consultas por ventana de fechas, por momento y por traslape con búsquedas binarias dentro de la rebanada
+# de cada tracto, en lugar de recorrer toda la tabla con máscaras.
+
+# Función: indice_intervalos
+# - Ordena los intervalos por tracto e inicio y guarda, por tracto, el máximo acumulado de los cierres (de izquierda a derecha)
+#   y el mínimo acumulado de los cierres (de derecha a izquierda). Los dos son monótonos: con searchsorted acotan las filas
+#   candidatas de cada consulta y solo esas se revisan.
+# - Las órdenes sin inicio o sin cierre no entran al índice (ninguna comparación de fechas las incluye).
+
+# Función: ordenes_en_ventana
+# - Órdenes que empiezan y terminan dentro de una ventana: inicio >= desde y cierre < hasta (el criterio de las gráficas por tracto).
+
+# Función: ordenes_traslapadas / ordenes_en_momento
+# - Órdenes que se traslapan con una ventana (inicio < hasta y cierre > desde) o que estaban en curso en un momento
+#   (inicio <= momento < cierre).
+
+# Función: tractos_en_ruta
+# - Tractos con al menos una orden en curso en un momento dado.
+
+import numpy as np
+import pandas as pd
+
+from nucleo.cache_disco import cache_disco
+
+NAT = np.iinfo(np.int64).min
+
+def _nanosegundos(serie):
+    return pd.to_datetime(serie).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def _momento(valor):
+    return np.int64(pd.Timestamp(valor).value)
+
+@cache_disco(columnas={'df': lambda a: [a['clave'], a['inicio'], a['cierre']]})
+def indice_intervalos(df, clave='Tracto', inicio='Inicio de la Orden', cierre='Cierre de la Orden'):
+    """
+    Construye el índice de intervalos por tracto.
+    Args:
+        df: DataFrame de órdenes (no se modifica).
+        clave: columna que agrupa los intervalos.
+        inicio, cierre: columnas de fecha que delimitan cada intervalo.
+    Returns:
+        indice: dict con
+            'filas'      -> posición en df de cada intervalo, ordenados por tracto e inicio
+            'inicios'    -> inicios (int64 en ns) en ese orden
+            'cierres'    -> cierres (int64 en ns) en ese orden
+            'cierre_max' -> máximo de los cierres desde el primer intervalo del tracto hasta cada fila
+            'cierre_min' -> mínimo de los cierres desde cada fila hasta el último intervalo del tracto
+            'offsets'    -> dict tracto -> (inicio, fin) con la rebanada de cada tracto
+    """
+    codigos, tractos = pd.factorize(df[clave], sort=True)
+    inicios = _nanosegundos(df[inicio])
+    cierres = _nanosegundos(df[cierre])
+
+    filas = np.flatnonzero((codigos >= 0) & (inicios != NAT) & (cierres != NAT))
+    filas = filas[np.lexsort((inicios[filas], codigos[filas]))]
+    codigos, inicios, cierres = codigos[filas], inicios[filas], cierres[filas]
+
+    limites = np.searchsorted(codigos, np.arange(len(tractos) + 1))
+    cierre_max = pd.Series(cierres).groupby(codigos, sort=False).cummax().to_numpy()
+    cierre_min = pd.Series(cierres[::-1]).groupby(codigos[::-1], sort=False).cummin().to_numpy()[::-1]
+    return {
+        'filas': filas,
+        'inicios': inicios,
+        'cierres': cierres,
+        'cierre_max': np.ascontiguousarray(cierre_max),
+        'cierre_min': np.ascontiguousarray(cierre_min),
+        'offsets': {tracto: (int(limites[i]), int(limites[i + 1])) for i, tracto in enumerate(tractos)},
+    }
+
+def ordenes_en_ventana(indice, tracto, desde=None, hasta=None):
+    """
+    Busca las órdenes de un tracto contenidas en una ventana.
+    Args:
+        indice: resultado de indice_intervalos.
+        tracto: tracto a consultar.
+        desde, hasta: límites de la ventana (cualquier valor que acepte pd.Timestamp); None deja ese lado abierto.
+    Returns:
+        filas: posiciones en el df del índice (para df.take), ordenadas por inicio.
+    """
+    a, b = indice['offsets'].get(tracto, (0, 0))
+    if desde is not None:
+        a += int(np.searchsorted(indice['inicios'][a:b], _momento(desde), side='left'))
+    if hasta is None:
+        return indice['filas'][a:b]
+    hasta = _momento(hasta)
+    # Desde la primera fila cuyo mínimo de cierres restantes llega a 'hasta', ningún cierre queda dentro
+    b = a + int(np.searchsorted(indice['cierre_min'][a:b], hasta, side='left'))
+    return indice['filas'][a:b][indice['cierres'][a:b] < hasta]
+
+def _en_curso(indice, tracto, desde, hasta, lado):
+    # Filas con inicio antes de 'hasta' (o igual, con lado='right') y cierre después de 'desde'
+    a, b = indice['offsets'].get(tracto, (0, 0))
+    fin = a + int(np.searchsorted(indice['inicios'][a:b], hasta, side=lado))
+    # Antes de la primera fila cuyo máximo de cierres pasa 'desde', ninguna orden sigue en curso
+    a += int(np.searchsorted(indice['cierre_max'][a:b], desde, side='right'))
+    if a >= fin:
+        return indice['filas'][:0]
+    return indice['filas'][a:fin][indice['cierres'][a:fin] > desde]
+
+def ordenes_traslapadas(indice, tracto, desde, hasta):
+    """
+    Busca las órdenes de un tracto que se traslapan con una ventana.
+    Args:
+        indice: resultado de indice_intervalos.
+        tracto: tracto a consultar.
+        desde, hasta: límites de la ventana.
+    Returns:
+        filas: posiciones en el df del índice de las órdenes con inicio < hasta y cierre > desde.
+    """
+    return _en_curso(indice, tracto, _momento(desde), _momento(hasta), 'left')
+
+def ordenes_en_momento(indice, tracto, momento):
+    """
+    Busca las órdenes de un tracto en curso en un momento.
+    Args:
+        indice: resultado de indice_intervalos.
+        tracto: tracto a consultar.
+        momento: fecha y hora a consultar.
+    Returns:
+        filas: posiciones en el df del índice de las órdenes con inicio <= momento < cierre.
+    """
+    momento = _momento(momento)
+    return _en_curso(indice, tracto, momento, momento, 'right')
+
+def tractos_en_ruta(indice, momento):
+    """
+    Lista los tractos que estaban en ruta en un momento.
+    Args:
+        indice: resultado de indice_intervalos.
+        momento: fecha y hora a consultar.
+    Returns:
+        tractos: lista de tractos con al menos una orden en curso, en el orden del índice.
+    """
+    return [tracto for tracto in indice['offsets'] if len(ordenes_en_momento(indice, tracto, momento))]
@@ -0,0 +1,196 @@
+# Este archivo contiene el motor de agregación de los cálculos: pandas (referencia), Polars o DuckDB (opcionales, multihilo).
+
+# Función: resolver_motor
+# - Decide qué motor usar: el indicado en la llamada o, si no se indica, el de la variable de entorno PYTRACK_MOTOR.
+# - Si se pide Polars o DuckDB y no está instalado, avisa y regresa a pandas.
+
+# Función: agregar_por_grupo
+# - Equivale a df[mascara].groupby(claves).agg(agregaciones), más una columna opcional con el número de filas por grupo.
+# - Con Polars o DuckDB, las claves se factorizan en pandas (así se conservan tipos como Period) y la agregación corre
+#   en el motor externo sobre todos los núcleos (en DuckDB como SQL, ver nucleo/consultas.py); el resultado se regresa
+#   a pandas con el mismo índice, columnas y tipos que la referencia.
+# - Las combinaciones que los motores externos no reproducen igual (por ejemplo, sumar texto) se calculan con pandas.
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+MOTORES = ('pandas', 'polars', 'duckdb')
+
+MOTOR_POR_DEFECTO = os.environ.get('PYTRACK_MOTOR', 'pandas')
+
+# Agregaciones que Polars y DuckDB calculan igual que pandas, por tipo de columna (kind de NumPy)
+_AGREGACIONES_EXTERNAS = {
+    'f': {'sum', 'mean', 'median', 'min', 'max', 'count', 'nunique', 'std'},
+    'i': {'sum', 'mean', 'median', 'min', 'max', 'count', 'nunique', 'std'},
+    'u': {'sum', 'mean', 'median', 'min', 'max', 'count', 'nunique', 'std'},
+    'b': {'sum', 'mean', 'min', 'max', 'count', 'nunique'},
+    'M': {'min', 'max', 'count', 'nunique'},
+    # Texto y otros tipos se factorizan (códigos ordenados), así que el mínimo y el máximo de los códigos son los de los valores
+    'O': {'min', 'max', 'count', 'nunique'},
+}
+
+def polars_disponible():
+    try:
+        import polars  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def resolver_motor(motor=None):
+    from nucleo.consultas import duckdb_disponible
+
+    motor = motor or MOTOR_POR_DEFECTO
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor}. Opciones: {', '.join(MOTORES)}")
+    if (motor == 'polars' and not polars_disponible()) or (motor == 'duckdb' and not duckdb_disponible()):
+        warnings.warn(f"{motor} no está instalado; se usa pandas como motor de agregación.")
+        return 'pandas'
+    return motor
+
+def _kind(serie):
+    # Tipos de pandas sin equivalente directo en NumPy (Period, Categorical, nullable) se tratan como texto
+    return serie.dtype.kind if isinstance(serie.dtype, np.dtype) else 'O'
+
+def _soporta_motor_externo(df, agregaciones):
+    return all(
+        func in _AGREGACIONES_EXTERNAS.get(_kind(df[col]), set())
+        for col, func in agregaciones.items()
+    )
+
+def _agregar_pandas(df, claves, agregaciones, tamano):
+    grupos = df.groupby(claves)
+    resultado = grupos.agg(agregaciones) if agregaciones else pd.DataFrame(index=grupos.size().index)
+    if tamano:
+        resultado[tamano] = grupos.size()
+    return resultado
+
+def _expresion_polars(pl, col, func):
+    expr = pl.col(col)
+    if func == 'nunique':
+        return expr.drop_nulls().n_unique().alias(col)
+    if func == 'std':
+        return expr.std(ddof=1).alias(col)
+    if func == 'count':
+        return expr.count().alias(col)
+    return getattr(expr, func)().alias(col)
+
+def _dtype_resultado(dtype, func):
+    # Tipo que devuelve pandas para cada agregación
+    if func in ('count', 'nunique'):
+        return np.dtype('int64')
+    if func in ('mean', 'median', 'std'):
+        return np.dtype('float64')
+    if func == 'sum':
+        return {'b': np.dtype('int64'), 'i': np.dtype('int64'), 'u': np.dtype('uint64')}.get(dtype.kind, np.dtype('float64'))
+    return dtype
+
+def _codificar(df, claves, agregaciones):
+    # Claves y columnas de texto como códigos de pd.factorize ordenados (-1 = faltante): el orden de los códigos
+    # es el orden de los grupos en pandas y el mínimo/máximo de los códigos es el de los valores
+    columnas = {}
+    niveles = []
+    for i, clave in enumerate(claves):
+        codigos, unicos = pd.factorize(df[clave], sort=True)
+        columnas[f'__clave_{i}'] = codigos
+        niveles.append(unicos)
+
+    decodificar = {}
+    for col in agregaciones:
+        serie = df[col]
+        if _kind(serie) == 'O':
+            codigos, unicos = pd.factorize(serie, sort=True)
+            columnas[col] = codigos
+            decodificar[col] = unicos
+        else:
+            columnas[col] = serie.to_numpy()
+    return columnas, [f'__clave_{i}' for i in range(len(claves))], niveles, decodificar
+
+def _decodificar(resultado, df, claves, nombres_claves, niveles, agregaciones, decodificar, tamano):
+    # resultado: dict columna -> arreglo NumPy con una fila por grupo, en el orden de los códigos de las claves
+    arrays_claves = [unicos.take(resultado[n]) for n, unicos in zip(nombres_claves, niveles)]
+    if len(claves) == 1:
+        indice = pd.Index(arrays_claves[0], name=claves[0])
+    else:
+        indice = pd.MultiIndex.from_arrays(arrays_claves, names=claves)
+
+    salida = {}
+    for col, func in agregaciones.items():
+        if col in decodificar and func in ('min', 'max'):
+            codigos = np.nan_to_num(resultado[col].astype(float), nan=-1).astype(np.int64)
+            salida[col] = pd.Series(pd.Index(decodificar[col]).take(codigos, allow_fill=True, fill_value=np.nan), index=indice)
+        else:
+            dtype = _dtype_resultado(df[col].dtype, func)
+            salida[col] = pd.Series(resultado[col], index=indice).astype(dtype)
+    if tamano:
+        salida[tamano] = pd.Series(resultado[tamano], index=indice).astype('int64')
+
+    return pd.DataFrame(salida, index=indice)
+
+def _agregar_polars(df, claves, agregaciones, tamano):
+    import polars as pl
+
+    columnas, nombres_claves, niveles, decodificar = _codificar(df, claves, agregaciones)
+    expresiones = [_expresion_polars(pl, col, func) for col, func in agregaciones.items()]
+    if tamano:
+        expresiones.append(pl.len().alias(tamano))
+
+    resultado = (
+        pl.DataFrame({n: pl.Series(a, nan_to_null=a.dtype.kind == 'f') for n, a in columnas.items()})
+        # Los valores faltantes de las columnas codificadas (código -1) pasan a nulos
+        .with_columns([pl.when(pl.col(col) >= 0).then(pl.col(col)).alias(col) for col in decodificar])
+        # pandas descarta las filas con clave faltante
+        .filter(pl.all_horizontal([pl.col(n) >= 0 for n in nombres_claves]))
+        .group_by(nombres_claves)
+        .agg(expresiones)
+        .sort(nombres_claves)
+    )
+    resultado = {n: resultado[n].to_numpy() for n in resultado.columns}
+    return _decodificar(resultado, df, claves, nombres_claves, niveles, agregaciones, decodificar, tamano)
+
+def _agregar_duckdb(df, claves, agregaciones, tamano):
+    from nucleo.consultas import conexion, agrupar
+
+    columnas, nombres_claves, niveles, decodificar = _codificar(df, claves, agregaciones)
+    # DuckDB lee el DataFrame registrado sin copiarlo y trata los NaN de pandas como nulos
+    nombre = f'__agregacion_{id(columnas)}'
+    # AVG y SUM de DuckDB no aceptan booleanos: se registran como 0/1 y al decodificar vuelven al tipo de pandas
+    conexion().register(nombre, pd.DataFrame({n: a.astype(np.int8) if a.dtype.kind == 'b' else a for n, a in columnas.items()}))
+    try:
+        resultado = agrupar(
+            nombre, nombres_claves, agregaciones, tamano=tamano, codificadas=set(decodificar),
+            condicion=(' AND '.join(f'"{n}" >= 0' for n in nombres_claves), []),
+        )
+    finally:
+        conexion().unregister(nombre)
+    resultado = {n: resultado[n].to_numpy() for n in resultado.columns}
+    return _decodificar(resultado, df, claves, nombres_claves, niveles, agregaciones, decodificar, tamano)
+
+def agregar_por_grupo(df, claves, agregaciones, mascara=None, tamano=None, motor=None):
+    """
+    Agrupa y agrega con el motor seleccionado.
+    Args:
+        df: DataFrame de entrada.
+        claves: columna o lista de columnas por las que se agrupa.
+        agregaciones: dict columna -> función ('sum', 'mean', 'median', 'min', 'max', 'count', 'nunique', 'std').
+        mascara: arreglo booleano opcional con las filas a considerar (evita copiar el DataFrame filtrado).
+        tamano: nombre de la columna con el número de filas por grupo; None para no agregarla.
+        motor: 'pandas', 'polars' o 'duckdb'; None usa PYTRACK_MOTOR.
+    Returns:
+        resultado: DataFrame indexado por las claves (ordenado), igual al de pandas groupby(claves).agg(agregaciones).
+    """
+    claves = [claves] if isinstance(claves, str) else list(claves)
+    if mascara is not None:
+        df = df[np.asarray(mascara, dtype=bool)]
+
+    motor = resolver_motor(motor)
+    if motor != 'pandas' and len(df) and _soporta_motor_externo(df, agregaciones):
+        return _AGREGADORES[motor](df, claves, agregaciones, tamano)
+    return _agregar_pandas(df, claves if len(claves) > 1 else claves[0], agregaciones, tamano)
+
+_AGREGADORES = {
+    'polars': _agregar_polars,
+    'duckdb': _agregar_duckdb,
+}
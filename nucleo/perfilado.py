@@ -0,0 +1,111 @@
+# Este archivo contiene el núcleo del perfilado (tiempos por sección): el estado por rerun, medir e instrumentar.
+# Solo usa la biblioteca estándar para que los módulos de nucleo/ se instrumenten sin depender de la capa de la app;
+# perfilado.py de la raíz lo reexporta y agrega las partes de Streamlit (fragmento y el panel de tiempos).
+
+# Función: iniciar_rerun / finalizar_rerun
+# - Marcan el inicio y fin de un rerun de app.py; al finalizar, los registros se agregan a un log JSON-lines local.
+# - El perfilado se activa por rerun (interruptor en la barra lateral o variable de entorno PYTRACK_PERFILADO=1).
+
+# Función: medir
+# - Contexto que registra el tiempo de una sección, las filas procesadas y el tamaño de las figuras generadas dentro de ella.
+
+# Función: instrumentar
+# - Decorador para las funciones públicas de los módulos de cálculo y utilitarios; registra tiempo, filas del DataFrame
+#   de entrada y tamaño del JSON de la figura devuelta.
+# - Con el perfilado apagado solo agrega una verificación de bandera por llamada.
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+RUTA_LOG = os.environ.get('PYTRACK_PERFILADO_LOG', 'perfilado.jsonl')
+
+# Streamlit ejecuta cada rerun en su propio hilo: el estado es por hilo para no mezclar sesiones
+_estado = threading.local()
+
+def activado_por_entorno():
+    return os.environ.get('PYTRACK_PERFILADO', '0') == '1'
+
+def esta_activo():
+    return getattr(_estado, 'activo', False)
+
+def iniciar_rerun(activo=False, fragmento=None):
+    _estado.activo = activo
+    _estado.fragmento = fragmento
+    _estado.registros = []
+    _estado.pila = []
+    _estado.inicio_rerun = time.perf_counter()
+    _estado.marca = datetime.now().isoformat(timespec='milliseconds')
+
+def registros_rerun():
+    return sorted(getattr(_estado, 'registros', []), key=lambda r: r['inicio_s'])
+
+def _contar_filas(args, kwargs):
+    for valor in list(args) + list(kwargs.values()):
+        if hasattr(valor, 'shape') and hasattr(valor, 'columns'):
+            return int(valor.shape[0])
+    return None
+
+def _bytes_figura(resultado):
+    # Tamaño del JSON que Streamlit enviaría al navegador; solo se calcula con el perfilado activo
+    if isinstance(resultado, tuple):
+        return sum(_bytes_figura(r) for r in resultado)
+    if type(resultado).__name__ == 'Figure' and hasattr(resultado, 'to_json'):
+        return len(resultado.to_json())
+    return 0
+
+@contextmanager
+def medir(nombre, filas=None, tipo='seccion'):
+    if not esta_activo():
+        yield {}
+        return
+
+    pila = _estado.pila
+    registro = {
+        'nombre': nombre,
+        'tipo': tipo,
+        'nivel': len(pila),
+        'filas': filas,
+        'bytes_figuras': 0,
+        'inicio_s': time.perf_counter() - _estado.inicio_rerun,
+    }
+    pila.append(registro)
+    t0 = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['tiempo_s'] = time.perf_counter() - t0
+        pila.pop()
+        # Las figuras de las funciones internas cuentan también para la sección que las contiene
+        if pila:
+            pila[-1]['bytes_figuras'] += registro['bytes_figuras']
+        _estado.registros.append(registro)
+
+def instrumentar(funcion):
+    nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not getattr(_estado, 'activo', False):
+            return funcion(*args, **kwargs)
+        with medir(nombre, filas=_contar_filas(args, kwargs), tipo='funcion') as registro:
+            resultado = funcion(*args, **kwargs)
+            registro['bytes_figuras'] += _bytes_figura(resultado)
+        return resultado
+
+    return envoltura
+
+def finalizar_rerun(ruta_log=None):
+    if not esta_activo():
+        return
+    registros = registros_rerun()
+    total = time.perf_counter() - _estado.inicio_rerun
+    with open(ruta_log or RUTA_LOG, 'a', encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps({
+                'rerun': _estado.marca, 'fragmento': _estado.fragmento, 'tiempo_total_rerun_s': total, **registro
+            }, ensure_ascii=False) + '\n')
@@ -0,0 +1,127 @@
+# Este archivo contiene los agregados por día y su reagrupación a semana, mes o trimestre.
+# Las sumas y los conteos son aditivos: se calculan una vez por día y cualquier granularidad más gruesa se obtiene
+# sumando los días de cada cubeta, sin volver a recorrer las órdenes.
+
+# Función: dias_desde_epoca
+# - Convierte una columna de fechas en el número de día desde 1970-01-01 (NaN para fechas faltantes).
+
+# Función: dias_en_periodo
+# - Ubica cada fila en un día que respeta su columna 'Periodo' (mes de la fuente): el día de su fecha si cae en ese mes;
+#   si la fecha falta o cae en otro mes, el primer día del mes de 'Periodo'. Las filas sin 'Periodo' quedan fuera,
+#   igual que en groupby('Periodo'). Así los meses y trimestres coinciden siempre con agrupar por 'Periodo',
+#   aunque la fuente traiga órdenes sin inicio o con un periodo distinto al mes de su inicio.
+
+# Función: cubetas
+# - Convierte números de día en el número de cubeta de la granularidad pedida con aritmética entera:
+#   semanas de lunes a domingo, meses del calendario y trimestres como meses // 3.
+
+# Función: etiquetas
+# - Texto de cada cubeta: 'AAAA-MM-DD' (día), 'AAAA-MM-DD/AAAA-MM-DD' (semana), 'AAAA-MM' (mes, igual que la columna Periodo)
+#   y 'AAAAQn' (trimestre). Las etiquetas ordenan igual que las cubetas.
+
+# Función: sumas_diarias
+# - Agrupa por día con el motor de agregación seleccionado (ver nucleo/motor.py).
+
+# Función: reagrupar
+# - Suma las filas diarias de cada cubeta y regresa el resultado indexado por 'Periodo' con las etiquetas de la granularidad.
+
+import numpy as np
+import pandas as pd
+
+GRANULARIDADES = {'dia': 'Día', 'semana': 'Semana', 'mes': 'Mes', 'trimestre': 'Trimestre'}
+
+COLUMNA_DIA = 'Día'
+
+def dias_desde_epoca(fechas):
+    dias = pd.Series(fechas).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    return np.where(np.isnat(dias), np.nan, dias.astype(np.int64).astype(float))
+
+def _meses_periodo(periodos):
+    # Mes (desde 1970-01) de cada valor de 'Periodo': 'AAAA-MM', Period o fecha; NaN si falta o no se reconoce
+    codigos, valores = pd.factorize(pd.Series(periodos), use_na_sentinel=True)
+    if isinstance(valores.dtype, pd.PeriodDtype):
+        inicios = valores.to_timestamp()
+    else:
+        inicios = pd.to_datetime(pd.Series(valores, dtype=object).map(str), errors='coerce', format='mixed')
+    meses = pd.Series(inicios).to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    meses = np.where(np.isnat(meses), np.nan, meses.astype(np.int64).astype(float))
+    return np.where(codigos >= 0, meses[np.maximum(codigos, 0)] if len(meses) else np.nan, np.nan)
+
+def dias_en_periodo(fechas, periodos):
+    dias = dias_desde_epoca(fechas)
+    meses = _meses_periodo(periodos)
+    mes_dia = np.full(len(dias), np.nan)
+    validos = ~np.isnan(dias)
+    mes_dia[validos] = dias[validos].astype(np.int64).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    # Día 1 del mes de 'Periodo' para las filas cuya fecha falta o cae en otro mes
+    primer_dia = np.full(len(dias), np.nan)
+    con_mes = ~np.isnan(meses)
+    primer_dia[con_mes] = meses[con_mes].astype(np.int64).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    return np.where(mes_dia == meses, dias, primer_dia)
+
+def _validar(granularidad):
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad desconocida: {granularidad}. Opciones: {', '.join(GRANULARIDADES)}")
+
+def cubetas(dias, granularidad):
+    _validar(granularidad)
+    dias = np.asarray(dias, dtype=np.int64)
+    if granularidad == 'dia':
+        return dias
+    if granularidad == 'semana':
+        # 1970-01-01 fue jueves: sumar 3 días hace que cada semana empiece en lunes
+        return (dias + 3) // 7
+    meses = dias.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return meses if granularidad == 'mes' else meses // 3
+
+def etiquetas(cubetas_, granularidad):
+    _validar(granularidad)
+    cubetas_ = np.asarray(cubetas_, dtype=np.int64)
+    if granularidad == 'dia':
+        return pd.Index(cubetas_.astype('datetime64[D]').astype(str))
+    if granularidad == 'semana':
+        lunes = (cubetas_ * 7 - 3).astype('datetime64[D]')
+        domingo = lunes + np.timedelta64(6, 'D')
+        return pd.Index([f'{l}/{d}' for l, d in zip(lunes.astype(str), domingo.astype(str))])
+    if granularidad == 'mes':
+        return pd.Index(cubetas_.astype('datetime64[M]').astype(str))
+    return pd.Index([f'{1970 + c // 4}Q{c % 4 + 1}' for c in cubetas_])
+
+def sumas_diarias(df, columna_fecha, sumas, mascara=None, tamano=None, motor=None, columna_periodo=None):
+    """
+    Suma columnas por día.
+    Args:
+        df: DataFrame de entrada.
+        columna_fecha: columna con la fecha que ubica cada fila ('Inicio de la Orden' para órdenes).
+        sumas: lista de columnas a sumar.
+        mascara: arreglo booleano opcional con las filas a considerar.
+        tamano: nombre de la columna con el número de filas por día; None para no agregarla.
+        motor: motor de agregación; None usa PYTRACK_MOTOR.
+        columna_periodo: columna con el mes de la fuente ('Periodo'); si se da, los días respetan ese mes (ver dias_en_periodo).
+    Returns:
+        diario: DataFrame indexado por COLUMNA_DIA (días desde 1970-01-01), ordenado.
+    """
+    from nucleo.motor import agregar_por_grupo
+
+    columnas = list(sumas)
+    if columna_periodo is None:
+        dias = dias_desde_epoca(df[columna_fecha])
+    else:
+        dias = dias_en_periodo(df[columna_fecha], df[columna_periodo])
+    datos = df[columnas].assign(**{COLUMNA_DIA: dias})
+    diario = agregar_por_grupo(datos, COLUMNA_DIA, {c: 'sum' for c in columnas}, mascara=mascara, tamano=tamano, motor=motor)
+    diario.index = diario.index.astype(np.int64)
+    return diario
+
+def reagrupar(diario, granularidad='mes'):
+    """
+    Pasa un agregado diario a otra granularidad.
+    Args:
+        diario: DataFrame de sumas y conteos indexado por día (sumas_diarias).
+        granularidad: 'dia', 'semana', 'mes' o 'trimestre'.
+    Returns:
+        agregado: DataFrame con las mismas columnas, indexado por 'Periodo' (etiquetas de la granularidad), ordenado.
+    """
+    agregado = diario.groupby(cubetas(diario.index.to_numpy(), granularidad), sort=True).sum()
+    agregado.index = pd.Index(etiquetas(agregado.index.to_numpy(), granularidad), name='Periodo')
+    return agregado
@@ -0,0 +1,65 @@
+# Este archivo contiene el cálculo del ranking de la flota a partir del historial de cargas agrupado por tracto.
+
+# Función: ranking_tractos
+# - Calcula en una sola pasada vectorizada la posición y el percentil de todos los tractos para las métricas seleccionadas.
+# - Combina varias métricas promediando sus percentiles, respetando si en cada métrica un valor menor es mejor o peor.
+
+# Función: seleccionar_extremos
+# - Devuelve los N mejores o los N peores tractos del ranking sin ordenar toda la tabla.
+
+# Función: paginar
+# - Regresa solo la página solicitada del ranking, para no enviar cientos de filas al navegador en cada rerun.
+
+import pandas as pd
+import numpy as np
+from nucleo.perfilado import instrumentar
+
+# Métrica de historial_cargas_grouped -> True si un valor menor es mejor
+METRICAS_RANKING = {
+    'CPK Combustible': True,
+    'CPK Peajes': True,
+    'CPK Mantenimiento': True,
+    'Costo Total': True,
+    'Costo por Litro': True,
+    'Rendimiento Kms/Litro': False,
+    'Kms Recorridos por Día': False,
+    'KMs Recorridos desde Última Carga': False,
+    'Kms Totales': False,
+}
+
+@instrumentar
+def ranking_tractos(hist_cargas_grouped, metricas):
+    """
+    Calcula el ranking de todos los tractos para las métricas seleccionadas.
+    Args:
+        hist_cargas_grouped: DataFrame indexado por Tracto (segundo resultado de historial_entre_cargas).
+        metricas: lista de métricas de METRICAS_RANKING.
+    Returns:
+        ranking: DataFrame ordenado de mejor a peor con 'Posición' (1 = mejor), 'Percentil' (100 = mejor),
+            el valor de cada métrica y su percentil individual. Los tractos sin datos quedan al final.
+    """
+    datos = hist_cargas_grouped[metricas].replace([np.inf, -np.inf], np.nan)
+
+    # Se invierte el signo de las métricas donde menor es mejor para que en todas "mayor es mejor"
+    signo = np.where([METRICAS_RANKING[m] for m in metricas], -1.0, 1.0)
+    percentiles = (datos * signo).rank(pct=True, method='average') * 100
+
+    ranking = pd.DataFrame(index=datos.index)
+    ranking['Percentil'] = percentiles.mean(axis=1)
+    ranking['Posición'] = ranking['Percentil'].rank(method='min', ascending=False)
+    ranking = ranking.join(datos).join(percentiles.add_prefix('Percentil '))
+
+    return ranking.sort_values('Posición', na_position='last')[
+        ['Posición', 'Percentil'] + [c for c in ranking.columns if c not in ('Posición', 'Percentil')]
+    ]
+
+def seleccionar_extremos(ranking, n, extremo='Peores'):
+    if extremo == 'Mejores':
+        return ranking.nsmallest(n, 'Posición')
+    return ranking.nlargest(n, 'Posición').sort_values('Posición', ascending=False)
+
+def paginar(df, pagina, tamano_pagina=25):
+    total_paginas = max(1, int(np.ceil(len(df) / tamano_pagina)))
+    pagina = min(max(1, pagina), total_paginas)
+    inicio = (pagina - 1) * tamano_pagina
+    return df.iloc[inicio:inicio + tamano_pagina], total_paginas
@@ -0,0 +1,225 @@
+# Este archivo contiene el cubo de rutas: sumas de costos, kms y litros y conteos de órdenes por ruta y periodo.
+# Se construye una vez con códigos de pd.factorize y np.bincount; el ranking de rutas solo suma celdas del cubo.
+
+# Función: construir_cubo_rutas / cubo_rutas
+# - Agrega las órdenes por ruta (Ruta Ciudades, Ruta Estados, estado o ciudad de origen o destino) y Periodo.
+# - Guarda solo las celdas con órdenes: códigos de ruta y de periodo por celda y un bloque float contiguo con
+#   el número de órdenes, los costos, los kms, los litros y cuántas órdenes tienen cada componente.
+# - Con demasiadas rutas distintas (más de max_rutas, estimado con estimar_cardinalidad), solo las rutas más
+#   frecuentes (rutas_frecuentes) tienen fila propia; las demás se juntan en 'Otras rutas'.
+# - cubo_rutas es la versión con caché en disco, para la base completa (precálculo); las selecciones filtradas
+#   de la interfaz usan construir_cubo_rutas.
+
+# Función: estimar_cardinalidad
+# - Estima el número de valores distintos con los k hashes distintos más pequeños (KMV), sin construir una tabla de hashes.
+
+# Función: rutas_frecuentes
+# - Elige de forma aproximada las rutas más frecuentes: cuenta los hashes en un Count-Min sketch y toma como
+#   candidatas las rutas de una muestra de las órdenes (una ruta frecuente casi siempre cae en la muestra).
+
+# Función: totales_rutas
+# - Suma las celdas del cubo por ruta (todas o solo los periodos pedidos) y calcula CPK, rendimiento y participación en el costo.
+
+# Función: top_rutas
+# - Regresa las k rutas con mayor (o menor) valor de una métrica sin ordenar la tabla completa.
+
+import numpy as np
+import pandas as pd
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+DIMENSIONES_RUTA = ['Ruta Ciudades', 'Ruta Estados', 'Edo. Origen', 'Edo. Destino', 'Cdad. Origen', 'Cdad. Destino']
+
+# Columnas del bloque de valores del cubo; las banderas se suman como conteos
+COLUMNAS_CUBO = [
+    'No. Órdenes', 'Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento', 'kmstotales', 'Litros',
+    'Orden con Costo de Combustible', 'Orden con Costo de Peajes', 'Orden con Costo de Mantenimiento',
+]
+
+METRICAS_RUTAS = [
+    'CPK', 'CPK Combustible', 'CPK Peajes', 'CPK Mantenimiento', 'Rendimiento Kms/Litro',
+    'No. Órdenes', 'kmstotales', 'Costo Total', 'Participación en Costo (%)',
+]
+
+OTRAS_RUTAS = 'Otras rutas'
+
+# Rutas distintas a partir de las cuales el cubo cambia a conteo aproximado de rutas frecuentes
+MAX_RUTAS = 50_000
+
+def estimar_cardinalidad(hashes, k=1024):
+    n = len(hashes)
+    if n == 0:
+        return 0
+    # Se toman los valores más pequeños (con repeticiones) hasta tener k distintos
+    tomar = min(n, 4 * k)
+    while True:
+        menores = np.unique(np.partition(hashes, tomar - 1)[:tomar])
+        if len(menores) >= k or tomar == n:
+            break
+        tomar = min(n, tomar * 4)
+    if len(menores) < k:
+        # Hay menos de k valores distintos: el conteo es exacto
+        return len(menores)
+    return int((k - 1) / (float(menores[k - 1]) / 2.0 ** 64))
+
+def rutas_frecuentes(hashes, n, profundidad=4, muestra=200_000, semilla=0):
+    """
+    Elige de forma aproximada los n valores más frecuentes.
+    Args:
+        hashes: arreglo uint64 con el hash de cada orden (pd.util.hash_pandas_object).
+        n: número de valores a regresar.
+        profundidad: filas del Count-Min sketch (más filas, menos sobreestimación).
+        muestra: órdenes muestreadas para obtener los candidatos.
+        semilla: semilla de la muestra y de las funciones hash del sketch.
+    Returns:
+        frecuentes: arreglo con los hashes de hasta n valores, de los más a los menos frecuentes (estimado).
+    """
+    rng = np.random.default_rng(semilla)
+    # Unas 4 cubetas por valor buscado; multiplicar por una constante impar y tomar los bits altos da hashes independientes
+    bits = max(12, int(np.ceil(np.log2(4 * max(n, 1)))))
+    ancho = 1 << bits
+    multiplicadores = rng.integers(1, 2 ** 63, size=profundidad, dtype=np.uint64) | np.uint64(1)
+    cubetas = [((hashes * m) >> np.uint64(64 - bits)).astype(np.intp) for m in multiplicadores]
+    sketch = [np.bincount(c, minlength=ancho) for c in cubetas]
+
+    if len(hashes) <= muestra:
+        candidatos = np.unique(hashes)
+    else:
+        candidatos = np.unique(hashes[rng.integers(0, len(hashes), muestra)])
+    # Cada fila sobreestima (comparte cubetas con otros valores): el mínimo de las filas es la mejor estimación
+    estimados = np.min([s[((candidatos * m) >> np.uint64(64 - bits)).astype(np.intp)] for s, m in zip(sketch, multiplicadores)], axis=0)
+
+    n = min(n, len(candidatos))
+    elegidos = np.argpartition(-estimados, n - 1)[:n] if n else np.array([], dtype=np.intp)
+    return candidatos[elegidos[np.argsort(-estimados[elegidos], kind='stable')]]
+
+@instrumentar
+def construir_cubo_rutas(df, dimension='Ruta Ciudades', max_rutas=MAX_RUTAS):
+    """
+    Construye el cubo ruta x Periodo.
+    Args:
+        df: DataFrame de órdenes.
+        dimension: columna de ruta (ver DIMENSIONES_RUTA).
+        max_rutas: rutas distintas a partir de las cuales se usa el conteo aproximado; None para usar siempre el exacto.
+    Returns:
+        cubo: dict con
+            'dimension'  -> columna agregada
+            'rutas'      -> Index con las rutas (ordenadas; 'Otras rutas' al final si el cubo es aproximado)
+            'periodos'   -> Index con los periodos (ordenados)
+            'ruta'       -> código de ruta de cada celda
+            'periodo'    -> código de periodo de cada celda
+            'valores'    -> arreglo (celdas, len(COLUMNAS_CUBO)) contiguo con las sumas de cada celda
+            'columnas'   -> COLUMNAS_CUBO
+            'aproximado' -> True si las rutas poco frecuentes quedaron en 'Otras rutas'
+        Las órdenes sin ruta o sin periodo no entran al cubo.
+    """
+    serie = df[dimension]
+    codigos_periodo, periodos = pd.factorize(df['Periodo'], sort=True)
+
+    aproximado = False
+    if max_rutas is not None and len(df) > max_rutas:
+        hashes = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+        aproximado = estimar_cardinalidad(hashes) > max_rutas
+    if aproximado:
+        propias = np.isin(hashes, rutas_frecuentes(hashes, max_rutas))
+        codigos_ruta = np.full(len(df), -1, dtype=np.intp)
+        codigos, rutas = pd.factorize(serie[propias], sort=True)
+        codigos_ruta[propias] = codigos
+        codigos_ruta[~propias & serie.notna().to_numpy()] = len(rutas)
+        rutas = rutas.append(pd.Index([OTRAS_RUTAS]))
+    else:
+        codigos_ruta, rutas = pd.factorize(serie, sort=True)
+
+    # Una celda por combinación (ruta, periodo) con órdenes
+    validas = (codigos_ruta >= 0) & (codigos_periodo >= 0)
+    n_periodos = max(len(periodos), 1)
+    combinados = codigos_ruta[validas].astype(np.int64) * n_periodos + codigos_periodo[validas]
+    celdas, unicos = pd.factorize(combinados, sort=True)
+    n_celdas = len(unicos)
+
+    valores = np.empty((n_celdas, len(COLUMNAS_CUBO)), dtype=float)
+    valores[:, 0] = np.bincount(celdas, minlength=n_celdas)
+    for j, col in enumerate(COLUMNAS_CUBO[1:], start=1):
+        # Los faltantes cuentan como 0, igual que en las sumas de pandas
+        pesos = np.nan_to_num(df[col].to_numpy(dtype=float)[validas])
+        valores[:, j] = np.bincount(celdas, weights=pesos, minlength=n_celdas)
+
+    return {
+        'dimension': dimension,
+        'rutas': rutas,
+        'periodos': periodos,
+        'ruta': (unicos // n_periodos).astype(np.intp),
+        'periodo': (unicos % n_periodos).astype(np.intp),
+        'valores': valores,
+        'columnas': list(COLUMNAS_CUBO),
+        'aproximado': bool(aproximado),
+    }
+
+@instrumentar
+@cache_disco(columnas={'df': lambda a: [a['dimension'], 'Periodo', *COLUMNAS_CUBO[1:]]})
+def cubo_rutas(df, dimension='Ruta Ciudades', max_rutas=MAX_RUTAS):
+    """
+    Construye el cubo ruta x Periodo, con caché en disco.
+    Args:
+        df, dimension, max_rutas: como en construir_cubo_rutas (df es la base completa).
+    Returns:
+        cubo: el mismo dict que construir_cubo_rutas.
+    """
+    return construir_cubo_rutas(df, dimension, max_rutas)
+
+def totales_rutas(cubo, periodos=None):
+    """
+    Suma el cubo por ruta.
+    Args:
+        cubo: resultado de cubo_rutas.
+        periodos: lista de periodos a considerar; None para todos.
+    Returns:
+        totales: DataFrame indexado por ruta con las columnas del cubo, 'Costo Total', los CPK, el rendimiento
+            y 'Participación en Costo (%)'. Solo las rutas con órdenes en los periodos pedidos.
+    """
+    ruta, valores = cubo['ruta'], cubo['valores']
+    if periodos is not None:
+        mascara = np.isin(cubo['periodo'], cubo['periodos'].get_indexer(list(periodos)))
+        ruta, valores = ruta[mascara], valores[mascara]
+
+    n_rutas = len(cubo['rutas'])
+    sumas = np.column_stack([np.bincount(ruta, weights=valores[:, j], minlength=n_rutas) for j in range(valores.shape[1])])
+    totales = pd.DataFrame(sumas, index=pd.Index(cubo['rutas'], name=cubo['dimension']), columns=cubo['columnas'])
+    totales = totales[totales['No. Órdenes'] > 0]
+
+    totales['Costo Total'] = totales['Costo Combustible'] + totales['Costo Peajes'] + totales['Costo Mantenimiento']
+    totales['CPK'] = totales['Costo Total'] / totales['kmstotales']
+    totales['CPK Combustible'] = totales['Costo Combustible'] / totales['kmstotales']
+    totales['CPK Peajes'] = totales['Costo Peajes'] / totales['kmstotales']
+    totales['CPK Mantenimiento'] = totales['Costo Mantenimiento'] / totales['kmstotales']
+    totales['Rendimiento Kms/Litro'] = totales['kmstotales'] / totales['Litros']
+    totales['Participación en Costo (%)'] = totales['Costo Total'] / totales['Costo Total'].sum() * 100
+    return totales
+
+@instrumentar
+def top_rutas(cubo, metrica='CPK', k=20, periodos=None, mayores=True, minimo_ordenes=1):
+    """
+    Ranking de rutas por una métrica.
+    Args:
+        cubo: resultado de cubo_rutas.
+        metrica: columna de METRICAS_RUTAS.
+        k: número de rutas a regresar.
+        periodos: lista de periodos a considerar; None para todos.
+        mayores: True para las rutas con mayor valor (más caras, más órdenes); False para las de menor valor.
+        minimo_ordenes: órdenes mínimas para que una ruta entre al ranking (evita CPK de una sola orden).
+    Returns:
+        top: DataFrame de totales_rutas con las k rutas, ordenado. 'Otras rutas' y los valores no finitos no entran.
+    """
+    totales = totales_rutas(cubo, periodos)
+    totales = totales[(totales['No. Órdenes'] >= minimo_ordenes) & (totales.index != OTRAS_RUTAS)]
+
+    valores = totales[metrica].to_numpy(dtype=float)
+    validos = np.flatnonzero(np.isfinite(valores))
+    clave = -valores[validos] if mayores else valores[validos]
+    k = min(int(k), len(validos))
+    if k <= 0:
+        return totales.iloc[:0]
+
+    elegidos = np.argpartition(clave, k - 1)[:k]
+    elegidos = elegidos[np.argsort(clave[elegidos], kind='stable')]
+    return totales.iloc[validos[elegidos]]
@@ -0,0 +1,169 @@
+# Este archivo contiene el motor de segmentación entre eventos: agrupa las filas por una clave (Tracto, Conductor, ...),
+# las ordena en el tiempo y corta un segmento en cada evento (carga de combustible, mantenimiento, ...).
+# Todo es vectorizado: un ordenamiento, sumas acumuladas para numerar los segmentos y reducciones por segmento
+# con np.add.reduceat y np.bincount; agregar un análisis nuevo es escribir su configuración, no otro ciclo por fila.
+
+# Función: planear_segmentos
+# - La parte costosa de segmentar: el orden de las filas y los límites de los segmentos. Depende solo de la clave,
+#   la columna de orden y el evento, y se guarda en el caché en disco con la huella de esas tres columnas:
+#   una corrección de peajes o kms vuelve a calcular las reducciones, no la segmentación.
+
+# Función: segmentar
+# - Un segmento son las filas de una clave desde la fila siguiente al evento anterior hasta la fila del evento, inclusive.
+#   Las filas después del último evento de cada clave no cierran segmento y no aparecen.
+# - Calcula las reducciones pedidas por segmento (ver REDUCCIONES) y, con mapeo=True, regresa también la fila
+#   de df y el segmento de cada fila que cae en un segmento.
+
+import numpy as np
+import pandas as pd
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+# Reducciones disponibles: (columna, función)
+# - 'sum', 'mean', 'min', 'max': sobre las filas del segmento (un faltante hace faltante el resultado, como al sumar fila por fila)
+# - 'nunique': valores distintos en el segmento (el faltante cuenta como un valor)
+# - 'size': filas del segmento (la columna se ignora)
+# - 'evento': valor en la fila del evento
+# - 'evento_anterior': valor en la fila del evento anterior de la misma clave (faltante en el primero)
+# - 'no_evento': número del evento dentro de su clave, desde 1 (la columna se ignora)
+REDUCCIONES = ('sum', 'mean', 'min', 'max', 'nunique', 'size', 'evento', 'evento_anterior', 'no_evento')
+
+def _orden_filas(df, clave, orden):
+    # Claves en orden de aparición y, dentro de cada clave, filas por la columna de orden (faltantes al final; empates estables)
+    codigos, _ = pd.factorize(df[clave])
+    rango = df[orden].rank(method='first', na_option='bottom').to_numpy()
+    filas = np.lexsort((rango, codigos))
+    # Las filas sin clave no pertenecen a ningún segmento
+    return filas[codigos[filas] >= 0], codigos
+
+def _faltante_como(valores):
+    if valores.dtype.kind == 'M':
+        return np.datetime64('NaT')
+    return np.nan
+
+@instrumentar
+@cache_disco(columnas={'df': lambda a: [a['clave'], a['orden']] + ([a['evento']] if isinstance(a['evento'], str) else [])})
+def planear_segmentos(df, clave, orden, evento):
+    """
+    Ordena las filas y calcula los límites de los segmentos entre eventos.
+    Args:
+        df, clave, orden, evento: como en segmentar.
+    Returns:
+        plan: dict de arreglos sobre las filas ordenadas:
+            'filas' (fila de df), 'es_evento', 'inicios_todos' (inicio de cada segmento, cierre o no en evento),
+            'cerrados' (segmentos que terminan en evento), 'segmento_fila' (segmento cerrado de cada fila o -1),
+            'primero' e 'inicio_clave' (primer segmento cerrado de la clave de cada segmento).
+    """
+    filas, codigos = _orden_filas(df, clave, orden)
+    # Igual que evaluar la condición en Python: un faltante cuenta como verdadero
+    es_evento = (df[evento] if isinstance(evento, str) else pd.Series(evento)).to_numpy().astype(bool)[filas]
+    codigos = codigos[filas]
+
+    # Un segmento empieza al cambiar de clave o después de un evento; solo cuentan los segmentos que terminan en evento
+    n = len(filas)
+    corte = np.ones(n, dtype=bool)
+    if n:
+        corte[1:] = (codigos[1:] != codigos[:-1]) | es_evento[:-1]
+    inicios_todos = np.flatnonzero(corte)
+    fines_todos = np.r_[inicios_todos[1:], n].astype(np.intp) - 1 if n else inicios_todos
+    cerrados = es_evento[fines_todos]
+    fines = fines_todos[cerrados]
+    n_segmentos = len(fines)
+
+    # Segmento de cada fila ordenada (-1 si su segmento no cierra en evento)
+    id_cerrado = np.full(len(inicios_todos), -1, dtype=np.intp)
+    id_cerrado[cerrados] = np.arange(n_segmentos)
+    segmento_fila = id_cerrado[np.cumsum(corte) - 1]
+
+    # Posición del segmento dentro de su clave, para 'no_evento' y 'evento_anterior'
+    clave_segmento = codigos[fines]
+    primero = np.ones(n_segmentos, dtype=bool)
+    primero[1:] = clave_segmento[1:] != clave_segmento[:-1]
+    inicio_clave = np.maximum.accumulate(np.where(primero, np.arange(n_segmentos), 0)) if n_segmentos else np.array([], dtype=np.intp)
+
+    return {
+        'filas': filas,
+        'es_evento': es_evento,
+        'inicios_todos': inicios_todos,
+        'cerrados': cerrados,
+        'segmento_fila': segmento_fila,
+        'primero': primero,
+        'inicio_clave': inicio_clave,
+    }
+
+@instrumentar
+def segmentar(df, clave, orden, evento, reducciones, mapeo=False):
+    """
+    Segmenta las filas entre eventos y reduce cada segmento.
+    Args:
+        df: DataFrame de entrada.
+        clave: columna que agrupa las filas (por ejemplo 'Tracto' o 'Conductor').
+        orden: columna que ordena las filas dentro de cada clave (por ejemplo 'Inicio de la Orden').
+        evento: columna booleana o arreglo booleano alineado con df; True marca la fila que cierra un segmento.
+        reducciones: dict nombre de salida -> (columna, función), con función de REDUCCIONES.
+        mapeo: si es True, también regresa las filas de cada segmento.
+    Returns:
+        segmentos: DataFrame con una fila por segmento (ordenado por clave en orden de aparición y por tiempo),
+            con la clave, 'Segmento' (id desde 0) y una columna por reducción.
+        filas (solo con mapeo=True): DataFrame con 'Posición' (fila de df, para iloc), 'Segmento' y 'Evento'
+            (True en la fila que cierra el segmento), en el mismo orden que los segmentos.
+    """
+    for nombre, (_, funcion) in reducciones.items():
+        if funcion not in REDUCCIONES:
+            raise ValueError(f"Reducción desconocida para {nombre}: {funcion}. Opciones: {', '.join(REDUCCIONES)}")
+
+    plan = planear_segmentos(df, clave, orden, evento)
+    filas, es_evento, segmento_fila = plan['filas'], plan['es_evento'], plan['segmento_fila']
+    inicios_todos, cerrados = plan['inicios_todos'], plan['cerrados']
+    primero, inicio_clave = plan['primero'], plan['inicio_clave']
+    n = len(filas)
+    fines_todos = np.r_[inicios_todos[1:], n].astype(np.intp) - 1 if n else inicios_todos
+    inicios, fines = inicios_todos[cerrados], fines_todos[cerrados]
+    n_segmentos = len(inicios)
+    tamanos = fines - inicios + 1
+
+    columnas = {clave: df[clave].to_numpy()[filas[fines]], 'Segmento': np.arange(n_segmentos)}
+    for nombre, (columna, funcion) in reducciones.items():
+        if funcion == 'size':
+            columnas[nombre] = tamanos.astype(np.int64)
+            continue
+        if funcion == 'no_evento':
+            columnas[nombre] = (np.arange(n_segmentos) - inicio_clave + 1).astype(np.int64)
+            continue
+
+        valores = df[columna].to_numpy()[filas]
+        if funcion == 'evento':
+            columnas[nombre] = valores[fines]
+        elif funcion == 'evento_anterior':
+            anterior = valores[fines][np.maximum(np.arange(n_segmentos) - 1, 0)] if n_segmentos else valores[:0]
+            anterior = anterior.astype(object) if valores.dtype.kind not in 'fM' else anterior.copy()
+            anterior[primero] = _faltante_como(valores)
+            columnas[nombre] = anterior
+        elif funcion == 'nunique':
+            codigos_valor, unicos = pd.factorize(valores, use_na_sentinel=False)
+            en_segmento = segmento_fila >= 0
+            pares = np.unique(segmento_fila[en_segmento].astype(np.int64) * max(len(unicos), 1) + codigos_valor[en_segmento])
+            columnas[nombre] = np.bincount(pares // max(len(unicos), 1), minlength=n_segmentos).astype(np.int64)
+        else:
+            # Las reducciones corren sobre todos los segmentos (contiguos) y se toman solo los cerrados
+            numeros = valores.astype(float)
+            if not n:
+                columnas[nombre] = numeros
+            elif funcion in ('sum', 'mean'):
+                sumas = np.add.reduceat(numeros, inicios_todos)[cerrados]
+                columnas[nombre] = sumas if funcion == 'sum' else sumas / tamanos
+            else:
+                reducir = np.minimum if funcion == 'min' else np.maximum
+                columnas[nombre] = reducir.reduceat(numeros, inicios_todos)[cerrados]
+
+    segmentos = pd.DataFrame(columnas)
+    if not mapeo:
+        return segmentos
+
+    en_segmento = np.flatnonzero(segmento_fila >= 0)
+    filas_segmento = pd.DataFrame({
+        'Posición': filas[en_segmento],
+        'Segmento': segmento_fila[en_segmento],
+        'Evento': es_evento[en_segmento],
+    })
+    return segmentos, filas_segmento
@@ -0,0 +1,130 @@
+# Este archivo contiene los cálculos por tracto (orden físico, offsets y acumulados), sin dependencias de interfaz.
+
+# Función: indexar_por_tracto
+# - Ordena una tabla (órdenes o historial de cargas) por tracto y fecha y devuelve un índice tracto -> (inicio, fin).
+# - Con este índice, cada panel de tracto solo lee las filas de su tracto en lugar de recorrer toda la tabla.
+
+# Función: acumular_por_tracto / precalcular_acumulados_tracto
+# - Calculan las series acumuladas de costos y kms por tracto.
+# - Guardan los valores en arreglos contiguos ordenados por tracto y fecha, con un índice tracto -> (inicio, fin).
+# - Permiten que las gráficas de acumulados solo hagan búsquedas por rebanada en lugar de filtrar toda la tabla.
+# - precalcular_acumulados_tracto es la versión con caché en disco, para la base completa (precálculo y artefactos);
+#   las rebanadas chicas de la interfaz usan acumular_por_tracto y no escriben una entrada del caché en cada rerun.
+
+# Función: serie_acumulada_tracto
+# - Devuelve la rebanada precalculada de un tracto, opcionalmente recortada a una ventana de fechas.
+
+import pandas as pd
+from nucleo.perfilado import instrumentar
+from nucleo.cache_disco import cache_disco
+
+COLUMNAS_ACUMULADAS = ["kmstotales", "Costo Combustible", "Costo Peajes", "Costo Mantenimiento"]
+
+def _orden_por_tracto(df, columna_fecha):
+    # Orden estable por tracto y fecha, con los límites de cada tracto sobre ese orden.
+    import numpy as np
+
+    codigos, tractos = pd.factorize(df['Tracto'], sort=True)
+    fechas = pd.to_datetime(df[columna_fecha]).to_numpy(dtype='datetime64[ns]')
+    orden = np.lexsort((fechas, codigos))
+
+    limites = np.searchsorted(codigos[orden], np.arange(len(tractos) + 1))
+    offsets = {
+        tracto: (int(limites[i]), int(limites[i + 1]))
+        for i, tracto in enumerate(tractos)
+    }
+    return orden, codigos[orden], fechas[orden], offsets
+
+@instrumentar
+def indexar_por_tracto(df, columna_fecha):
+    """
+    Agrupa físicamente las filas por tracto y construye su índice de offsets.
+    Args:
+        df: DataFrame con la columna 'Tracto'.
+        columna_fecha: columna para ordenar las filas dentro de cada tracto
+            ('Inicio de la Orden' para órdenes, 'Fecha Orden de Carga' para el historial).
+    Returns:
+        df_ordenado: DataFrame ordenado por tracto y fecha, con índice 0..n-1.
+        offsets: dict tracto -> (inicio, fin) para usar con df_ordenado.iloc[inicio:fin].
+    """
+    import numpy as np
+
+    orden, _, _, offsets = _orden_por_tracto(df, columna_fecha)
+    # Ya agrupado (como en los artefactos): se regresa el mismo DataFrame, sin copiar ni perder la memoria mapeada
+    indice = df.index
+    if isinstance(indice, pd.RangeIndex) and indice.start == 0 and indice.step == 1 and np.array_equal(orden, np.arange(len(df))):
+        return df, offsets
+    return df.take(orden).reset_index(drop=True), offsets
+
+@instrumentar
+def acumular_por_tracto(df):
+    """
+    Calcula las series acumuladas de costos y kms de los tractos de df.
+    Args:
+        df: DataFrame de órdenes con 'Tracto', 'Inicio de la Orden' y las columnas de COLUMNAS_ACUMULADAS.
+    Returns:
+        acumulados: dict con
+            'fechas'     -> arreglo datetime64 con el inicio de cada orden, ordenado por tracto y fecha
+            'ordenes'    -> arreglo con el No. Orden de cada fila
+            'puntuales'  -> arreglo (n, 4) contiguo con los valores por orden de COLUMNAS_ACUMULADAS
+            'acumulados' -> arreglo (n, 4) contiguo con los acumulados por tracto
+            'offsets'    -> dict tracto -> (inicio, fin) con la rebanada de cada tracto
+    """
+    import numpy as np
+
+    orden, codigos, fechas, offsets = _orden_por_tracto(df, 'Inicio de la Orden')
+
+    puntuales = np.ascontiguousarray(df[COLUMNAS_ACUMULADAS].to_numpy(dtype=float)[orden])
+    acumulados = np.ascontiguousarray(
+        pd.DataFrame(puntuales).groupby(codigos, sort=False).cumsum().to_numpy()
+    )
+
+    if 'No. Orden' in df.columns:
+        ordenes = df['No. Orden'].to_numpy()[orden]
+    else:
+        ordenes = df.index.to_numpy()[orden]
+
+    return {
+        'fechas': fechas,
+        'ordenes': ordenes,
+        'puntuales': puntuales,
+        'acumulados': acumulados,
+        'offsets': offsets,
+    }
+
+@instrumentar
+@cache_disco(columnas={'df': ['Tracto', 'Inicio de la Orden', 'No. Orden', *COLUMNAS_ACUMULADAS]})
+def precalcular_acumulados_tracto(df):
+    """
+    Precalcula las series acumuladas de costos y kms de todos los tractos, con caché en disco.
+    Args:
+        df: DataFrame de órdenes completo (como en acumular_por_tracto).
+    Returns:
+        acumulados: el mismo dict que acumular_por_tracto.
+    """
+    return acumular_por_tracto(df)
+
+def serie_acumulada_tracto(acumulados, tracto, fecha_inicio=None, fecha_fin=None):
+    # Rebanada del tracto; si se da una ventana, se recorta por fecha de inicio y se rebasa el acumulado.
+    import numpy as np
+
+    if tracto not in acumulados['offsets']:
+        return None
+    inicio, fin = acumulados['offsets'][tracto]
+    fechas = acumulados['fechas']
+    if fecha_inicio is not None:
+        inicio += int(np.searchsorted(fechas[inicio:fin], np.datetime64(pd.Timestamp(fecha_inicio)), side='left'))
+    if fecha_fin is not None:
+        fin = inicio + int(np.searchsorted(fechas[inicio:fin], np.datetime64(pd.Timestamp(fecha_fin)), side='left'))
+
+    acum = acumulados['acumulados'][inicio:fin]
+    tracto_inicio = acumulados['offsets'][tracto][0]
+    if inicio > tracto_inicio and len(acum):
+        acum = acum - acumulados['acumulados'][inicio - 1]
+
+    return {
+        'fechas': fechas[inicio:fin],
+        'ordenes': acumulados['ordenes'][inicio:fin],
+        'puntuales': acumulados['puntuales'][inicio:fin],
+        'acumulados': acum,
+    }
@@ -0,0 +1,65 @@
+# Este archivo contiene las herramientas de perfilado (tiempos por sección) de la app.
+# El estado por rerun, medir e instrumentar viven en nucleo/perfilado.py (solo biblioteca estándar) y se reexportan aquí;
+# este archivo agrega las partes de Streamlit.
+
+# Función: iniciar_rerun / finalizar_rerun / medir / instrumentar
+# - Ver nucleo/perfilado.py. Los módulos *_utils.py y app.py los siguen importando desde aquí.
+
+# Función: fragmento
+# - Decorador que convierte una sección de app.py en un fragmento de Streamlit (st.fragment): sus widgets solo vuelven
+#   a correr esa sección. En un rerun completo se mide como una sección más; cuando corre sola, registra su propio rerun.
+
+# Función: mostrar_panel_tiempos
+# - Muestra en la barra lateral de Streamlit la tabla de tiempos del rerun actual.
+
+import functools
+
+from nucleo.perfilado import (
+    RUTA_LOG, activado_por_entorno, esta_activo, iniciar_rerun, registros_rerun, medir, instrumentar, finalizar_rerun,
+)
+
+def fragmento(nombre):
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    def decorador(funcion):
+        @st.fragment
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            # fragment_ids_this_run solo tiene valor cuando Streamlit corre fragmentos sin el resto de la app
+            ctx = get_script_run_ctx()
+            solo = bool(ctx is not None and ctx.fragment_ids_this_run)
+            if solo:
+                iniciar_rerun(activo=st.session_state.get('depuracion_tiempos', activado_por_entorno()), fragmento=nombre)
+            try:
+                with medir(nombre):
+                    return funcion(*args, **kwargs)
+            finally:
+                if solo:
+                    finalizar_rerun()
+
+        return envoltura
+
+    return decorador
+
+def mostrar_panel_tiempos():
+    import streamlit as st
+    import pandas as pd
+
+    if not esta_activo():
+        return
+    registros = registros_rerun()
+    if not registros:
+        return
+
+    tabla = pd.DataFrame(registros)
+    tabla['Sección / función'] = [' ' * nivel + nombre for nivel, nombre in zip(tabla['nivel'], tabla['nombre'])]
+    tabla['ms'] = (tabla['tiempo_s'] * 1000).round(1)
+    tabla['Filas'] = tabla['filas']
+    tabla['KB figuras'] = (tabla['bytes_figuras'] / 1024).round(1)
+
+    with st.sidebar:
+        st.markdown("### Tiempos del rerun")
+        total = sum(r['tiempo_s'] for r in registros if r['nivel'] == 0)
+        st.caption(f"Secciones: {total * 1000:,.0f} ms · log: {RUTA_LOG}")
+        st.dataframe(tabla[['Sección / función', 'ms', 'Filas', 'KB figuras']], hide_index=True, use_container_width=True)
@@ -0,0 +1,218 @@
+
+# Este archivo contiene el precálculo en segundo plano que la app lanza al iniciar cada sesión.
+# Las etapas costosas corren en hilos mientras la página ya se dibuja; cada sección espera solo a las etapas que usa.
+
+# Función: iniciar_precalculo
+# - Lanza las etapas en un ThreadPoolExecutor compartido y regresa un dict nombre -> Future:
+#   'ordenes' (artefactos o Base_viz.xlsx, agrupadas por tracto), 'historial' (historial entre cargas y su mapeo orden -> segmento),
+#   'acumulados_tracto', 'catalogo' (catálogo de columnas del buscador), 'cpk_diario' y 'completitud_diaria'
+#   (sumas diarias de la base completa, que se reagrupan a la granularidad elegida mientras no haya filtros activos)
+#   'rutas' (cubos ruta x periodo de la base completa, uno por dimensión de ruta),
+#   'metadatos' (versión de la base y huellas por columna y por tracto, ver nucleo/huellas.py),
+#   'intervalos' (índice de inicio a cierre de las órdenes por tracto, ver nucleo/intervalos.py)
+#   y 'anomalias' (puntajes de cargas atípicas agrupados por tracto, con sus offsets; ver nucleo/anomalias.py).
+# - Cada etapa espera a las etapas de las que depende; si existen artefactos del modo batch, las etapas solo los leen.
+# - Sin artefactos, las funciones costosas leen sus resultados del caché en disco (nucleo/cache_disco.py) cuando la base
+#   y el código no cambiaron: después de reiniciar el servidor, el primer usuario no vuelve a pagar los cálculos.
+
+# Función: listo / resultado / pendientes
+# - Consultan el estado de las etapas sin bloquear (listo, pendientes) o esperan su resultado (resultado).
+
+# Función: esperar_precalculo
+# - Fragmento de Streamlit que revisa cada segundo las etapas pendientes y vuelve a correr la app cuando alguna termina,
+#   para que las secciones que mostraban un aviso de espera se llenen.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nucleo.carga import RUTA_BASE
+
+# Compartido por todas las sesiones; NumPy, pandas y los motores externos liberan el GIL en las partes pesadas
+_ejecutor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='precalculo')
+
+ETAPAS = ('ordenes', 'metadatos', 'historial', 'acumulados_tracto', 'intervalos', 'catalogo', 'cpk_diario', 'completitud_diaria', 'rutas', 'anomalias')
+
+def _etapa_ordenes(ruta, usar_artefactos):
+    from artefactos import cargar_artefactos
+    from nucleo.carga import cargar_base
+    from nucleo.motor import resolver_motor
+    from nucleo.tractos import indexar_por_tracto
+
+    # Si el modo batch (artefactos.py) ya precalculó los agregados de esta base, la sesión arranca desde ellos
+    artefactos = cargar_artefactos(fuente=ruta) if usar_artefactos else None
+    df = artefactos['ordenes'] if artefactos is not None else cargar_base(ruta)
+
+    # Con el motor 'duckdb', las órdenes también quedan como una vista SQL sobre su Parquet (filtro del buscador)
+    tabla_sql = None
+    if artefactos is not None and resolver_motor() == 'duckdb':
+        from nucleo.consultas import registrar_artefactos
+        registrar_artefactos(artefactos['ruta'])
+        tabla_sql = 'ordenes'
+
+    # Órdenes agrupadas por tracto para que cada panel de tracto lea solo su rebanada
+    df, offsets_tracto = indexar_por_tracto(df, 'Inicio de la Orden')
+    return {'artefactos': artefactos, 'df': df, 'offsets_tracto': offsets_tracto, 'tabla_sql': tabla_sql}
+
+def _etapa_metadatos(ordenes):
+    from nucleo.huellas import metadatos_dataset
+
+    # Los artefactos traen las huellas de sus órdenes en el manifest
+    ordenes = ordenes.result()
+    artefactos = ordenes['artefactos']
+    if artefactos is not None and artefactos['manifest'].get('datos') is not None:
+        return artefactos['manifest']['datos']
+    return metadatos_dataset(ordenes['df'])
+
+def _etapa_historial(ordenes):
+    from nucleo.historial import historial_entre_cargas
+    from nucleo.tractos import indexar_por_tracto
+
+    ordenes = ordenes.result()
+    artefactos = ordenes['artefactos']
+    if artefactos is not None:
+        historial_cargas, historial_cargas_grouped = artefactos['historial_cargas'], artefactos['historial_cargas_grouped']
+        ordenes_segmento = artefactos['ordenes_segmento']
+    else:
+        historial_cargas, historial_cargas_grouped, ordenes_segmento = historial_entre_cargas(ordenes['df'], mapeo=True)
+    historial_cargas, offsets_historial = indexar_por_tracto(historial_cargas, 'Fecha Orden de Carga')
+    return {
+        'historial_cargas': historial_cargas,
+        'offsets_historial': offsets_historial,
+        'historial_cargas_grouped': historial_cargas_grouped,
+        'ordenes_segmento': ordenes_segmento,
+    }
+
+def _etapa_acumulados(ordenes):
+    from nucleo.tractos import precalcular_acumulados_tracto
+
+    ordenes = ordenes.result()
+    if ordenes['artefactos'] is not None:
+        return ordenes['artefactos']['acumulados_tracto']
+    return precalcular_acumulados_tracto(ordenes['df'])
+
+def _etapa_intervalos(ordenes):
+    from nucleo.intervalos import indice_intervalos
+
+    # Las posiciones del índice apuntan al df de órdenes ya agrupado por tracto
+    return indice_intervalos(ordenes.result()['df'])
+
+def _etapa_catalogo(ordenes, columnas_forzar):
+    from nucleo.catalogo import catalogo_columnas
+
+    return catalogo_columnas(ordenes.result()['df'], **columnas_forzar)
+
+def _etapa_cpk(ordenes, historial):
+    from nucleo.cpk import sumas_diarias_cpk
+
+    ordenes = ordenes.result()
+    if ordenes['artefactos'] is not None:
+        return ordenes['artefactos']['cpk_diario']
+    return sumas_diarias_cpk(ordenes['df'], historial.result()['historial_cargas'])
+
+def _etapa_completitud(ordenes):
+    from nucleo.estadisticas import completitud_diaria
+
+    ordenes = ordenes.result()
+    if ordenes['artefactos'] is not None:
+        return ordenes['artefactos']['completitud_diaria']
+    return completitud_diaria(ordenes['df'])
+
+def _etapa_rutas(ordenes):
+    from nucleo.rutas import DIMENSIONES_RUTA, cubo_rutas
+
+    # Los cubos se construyen en una pasada por dimensión; no se guardan como artefactos porque salen directo de las órdenes
+    df = ordenes.result()['df']
+    return {dimension: cubo_rutas(df, dimension) for dimension in DIMENSIONES_RUTA if dimension in df.columns}
+
+def _etapa_anomalias(ordenes, historial):
+    from nucleo.anomalias import iniciar_estado, actualizar_anomalias
+    from nucleo.tractos import indexar_por_tracto
+
+    ordenes = ordenes.result()
+    if ordenes['artefactos'] is not None:
+        puntajes = ordenes['artefactos']['anomalias']
+    else:
+        _, puntajes = actualizar_anomalias(iniciar_estado(), historial.result()['historial_cargas'])
+    # Puntajes agrupados por tracto para que el panel de tracto lea solo su rebanada
+    puntajes, offsets_anomalias = indexar_por_tracto(puntajes, 'Fecha Orden de Carga')
+    return {'anomalias': puntajes, 'offsets_anomalias': offsets_anomalias}
+
+def _cronometrar(funcion, tiempos, nombre, t0):
+    # Registra cuándo quedó lista la etapa, contado desde el lanzamiento (incluye la espera a sus dependencias)
+    def envoltura(*args):
+        try:
+            return funcion(*args)
+        finally:
+            tiempos[nombre] = time.perf_counter() - t0
+    return envoltura
+
+def iniciar_precalculo(ruta=RUTA_BASE, usar_artefactos=True, columnas_forzar=None):
+    """
+    Lanza en segundo plano las etapas costosas del inicio de la app.
+    Args:
+        ruta: base de órdenes (Base_viz.xlsx) o carpeta / patrón glob de extractos mensuales (ver nucleo/carga.py).
+        usar_artefactos: si es True y hay artefactos vigentes del modo batch, las etapas los leen en lugar de calcular.
+        columnas_forzar: dict con columnas_forzar_fecha, columnas_forzar_str y columnas_forzar_num para el catálogo.
+    Returns:
+        etapas: dict nombre -> Future (ver ETAPAS), más 'tiempos' (dict nombre -> segundos desde el lanzamiento
+            hasta que cada etapa terminó).
+    """
+    tiempos = {}
+    t0 = time.perf_counter()
+
+    def lanzar(nombre, funcion, *args):
+        return _ejecutor.submit(_cronometrar(funcion, tiempos, nombre, t0), *args)
+
+    # Las dependencias se lanzan antes que sus dependientes, así una etapa nunca espera a otra que no ha salido de la cola
+    ordenes = lanzar('ordenes', _etapa_ordenes, ruta, usar_artefactos)
+    metadatos = lanzar('metadatos', _etapa_metadatos, ordenes)
+    historial = lanzar('historial', _etapa_historial, ordenes)
+    return {
+        'ordenes': ordenes,
+        'metadatos': metadatos,
+        'historial': historial,
+        'acumulados_tracto': lanzar('acumulados_tracto', _etapa_acumulados, ordenes),
+        'intervalos': lanzar('intervalos', _etapa_intervalos, ordenes),
+        'catalogo': lanzar('catalogo', _etapa_catalogo, ordenes, columnas_forzar or {}),
+        'cpk_diario': lanzar('cpk_diario', _etapa_cpk, ordenes, historial),
+        'completitud_diaria': lanzar('completitud_diaria', _etapa_completitud, ordenes),
+        'rutas': lanzar('rutas', _etapa_rutas, ordenes),
+        'anomalias': lanzar('anomalias', _etapa_anomalias, ordenes, historial),
+        'tiempos': tiempos,
+    }
+
+def listo(etapas, *nombres):
+    return all(etapas[nombre].done() for nombre in nombres)
+
+def resultado(etapas, nombre):
+    # Si la etapa falló, la excepción se vuelve a lanzar aquí, en el hilo de la app
+    return etapas[nombre].result()
+
+def pendientes(etapas):
+    return [nombre for nombre in ETAPAS if not etapas[nombre].done()]
+
+def esperar_precalculo(etapas, pendientes_al_inicio, intervalo=1.0):
+    """
+    Vuelve a correr la app cuando termina alguna etapa que estaba pendiente al iniciar el rerun.
+    Args:
+        etapas: resultado de iniciar_precalculo.
+        pendientes_al_inicio: pendientes(etapas) tomado al inicio del rerun, antes de dibujar las secciones.
+        intervalo: segundos entre revisiones.
+    """
+    import streamlit as st
+
+    # En Streamlit 1.37 el fragmento que corre solo reutiliza los argumentos de su primera ejecución;
+    # lo que cambia entre reruns se lee de la sesión
+    st.session_state._precalculo_pendiente = pendientes_al_inicio
+    if not pendientes_al_inicio:
+        return
+
+    @st.fragment(run_every=intervalo)
+    def _revisar():
+        faltan = pendientes(etapas)
+        # Una sección que se dibujó con aviso de espera se llena en el siguiente rerun completo
+        if faltan != st.session_state._precalculo_pendiente:
+            st.rerun()
+        st.caption("Calculando en segundo plano: " + ", ".join(faltan))
+
+    _revisar()
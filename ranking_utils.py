@@ -0,0 +1,71 @@
+# Este archivo contiene la vista del ranking de la flota en Streamlit.
+# El cálculo del ranking (ranking_tractos, seleccionar_extremos, paginar) vive en nucleo/ranking.py.
+
+# Función: seccion_ranking_tractos
+# - Orquesta la vista del ranking en Streamlit: métricas, top/bottom N, paginación y salto a los paneles de tracto.
+
+import numpy as np
+from perfilado import instrumentar
+from nucleo.ranking import METRICAS_RANKING, ranking_tractos, seleccionar_extremos, paginar
+
+@instrumentar
+def seccion_ranking_tractos(hist_cargas_grouped, paneles=("1tracto", "2tracto"), key="ranking"):
+    import streamlit as st
+
+    metricas_disponibles = [m for m in METRICAS_RANKING if m in hist_cargas_grouped.columns]
+
+    col1, col2, col3, col4 = st.columns([4, 2, 1, 1])
+    with col1:
+        metricas = st.multiselect(
+            "Métricas para el ranking",
+            options=metricas_disponibles,
+            default=metricas_disponibles[:1],
+            key=f"metricas_{key}"
+        )
+    with col2:
+        extremo = st.radio(
+            "Mostrar",
+            options=["Peores", "Mejores", "Todos"],
+            horizontal=True,
+            key=f"extremo_{key}"
+        )
+    with col3:
+        n = st.number_input("N", min_value=1, max_value=max(1, len(hist_cargas_grouped)), value=min(20, max(1, len(hist_cargas_grouped))), step=5, key=f"n_{key}")
+    with col4:
+        tamano_pagina = st.selectbox("Filas por página", options=[10, 25, 50, 100], index=1, key=f"tamano_{key}")
+
+    if not metricas:
+        st.info("Selecciona al menos una métrica para construir el ranking.")
+        return
+
+    ranking = ranking_tractos(hist_cargas_grouped, metricas)
+    if extremo != "Todos":
+        ranking = seleccionar_extremos(ranking, int(n), extremo)
+
+    total_paginas = max(1, int(np.ceil(len(ranking) / tamano_pagina)))
+    # Etiqueta y límites fijos: Streamlit identifica el widget por ellos y, si cambian, pierde la página elegida.
+    # Si el ranking se acorta (otro N, otro tamaño de página) o se escribe una página mayor, pasa a la última que existe
+    clave_pagina = f"pagina_{key}"
+    if st.session_state.get(clave_pagina, 1) > total_paginas:
+        st.session_state[clave_pagina] = total_paginas
+    pagina = min(int(st.number_input("Página", min_value=1, step=1, key=clave_pagina)), total_paginas)
+    st.caption(f"Página {pagina} de {total_paginas}")
+    pagina_df, _ = paginar(ranking, int(pagina), tamano_pagina)
+
+    st.dataframe(pagina_df.round(2), use_container_width=True)
+
+    # Salto del ranking a los paneles de tracto: se fija el valor del selector del panel y se vuelve a correr la app,
+    # porque los paneles son fragmentos aparte y no se redibujan con los widgets del ranking
+    aviso = st.session_state.pop(f"aviso_{key}", None)
+    if aviso:
+        st.success(aviso)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        tracto_sel = st.selectbox("Tracto de esta página", options=pagina_df.index.tolist(), key=f"tracto_{key}")
+    for col, panel in zip([col2, col3], paneles):
+        with col:
+            st.markdown(" ")
+            if st.button(f"Ver en panel {panel[0]}", key=f"ver_{panel}_{key}") and tracto_sel is not None:
+                st.session_state[f"tracto_selector_{panel}"] = tracto_sel
+                st.session_state[f"aviso_{key}"] = f"Tracto {tracto_sel} abierto en el panel {panel[0]} del Comparativo entre Tractos."
+                st.rerun()
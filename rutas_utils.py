@@ -0,0 +1,86 @@
+# Este archivo contiene la vista del ranking de rutas en Streamlit.
+# El cubo de rutas y el top-K (construir_cubo_rutas, top_rutas) viven en nucleo/rutas.py.
+
+# Función: plot_top_rutas
+# - Gráfico de barras horizontales con la métrica elegida para las rutas del ranking.
+
+# Función: seccion_ranking_rutas
+# - Orquesta la vista: dimensión de ruta, métrica, mayores o menores, K, órdenes mínimas y rango de periodos.
+# - Usa los cubos precalculados de la base completa; con filtros activos construye el cubo de las órdenes
+#   seleccionadas una sola vez y lo reutiliza mientras solo cambian los widgets de la sección.
+
+import pandas as pd
+from perfilado import instrumentar
+from nucleo.rutas import DIMENSIONES_RUTA, METRICAS_RUTAS, construir_cubo_rutas, top_rutas
+
+@instrumentar
+def plot_top_rutas(top, metrica, width=800, height=600):
+    import plotly.graph_objects as go
+
+    # La primera ruta del ranking queda arriba
+    datos = top[metrica].iloc[::-1]
+    fig = go.Figure(go.Bar(
+        x=datos.to_numpy(),
+        y=datos.index.astype(str),
+        orientation='h',
+        marker_color='#4361EE',
+        customdata=top['No. Órdenes'].iloc[::-1].to_numpy(),
+        hovertemplate="<b>%{y}</b><br>" + metrica + ": %{x:,.2f}<br>Órdenes: %{customdata:,.0f}<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"{metrica} por ruta ({top.index.name})",
+        xaxis_title=metrica,
+        template='plotly_white',
+        width=width,
+        height=height,
+        margin=dict(l=200),
+    )
+    return fig
+
+def _cubo(df, dimension, cubos):
+    import streamlit as st
+
+    if cubos is not None and dimension in cubos:
+        return cubos[dimension]
+    cache = st.session_state.setdefault('cache_cubos_rutas', {})
+    clave = (dimension, len(df), int(pd.util.hash_pandas_object(df['No. Orden'], index=False).sum()))
+    if clave not in cache:
+        if len(cache) >= 8:
+            cache.pop(next(iter(cache)))
+        cache[clave] = construir_cubo_rutas(df, dimension)
+    return cache[clave]
+
+@instrumentar
+def seccion_ranking_rutas(df, cubos=None, key="rutas"):
+    import streamlit as st
+
+    dimensiones = [d for d in DIMENSIONES_RUTA if d in df.columns]
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 1, 1])
+    with col1:
+        dimension = st.selectbox("Agrupar por", options=dimensiones, key=f"dimension_{key}")
+    with col2:
+        metrica = st.selectbox("Métrica", options=METRICAS_RUTAS, key=f"metrica_{key}")
+    with col3:
+        extremo = st.radio("Mostrar", options=["Mayores", "Menores"], horizontal=True, key=f"extremo_{key}")
+    with col4:
+        k = st.number_input("K", min_value=1, max_value=200, value=15, step=5, key=f"k_{key}")
+    with col5:
+        minimo = st.number_input("Órdenes mín.", min_value=1, value=5, step=1, key=f"minimo_{key}")
+
+    cubo = _cubo(df, dimension, cubos)
+    periodos = cubo['periodos'].tolist()
+    if len(periodos) > 1:
+        inicio, fin = st.select_slider(
+            "Periodos", options=periodos, value=(periodos[0], periodos[-1]), key=f"periodos_{key}_{dimension}"
+        )
+        periodos = periodos[periodos.index(inicio):periodos.index(fin) + 1]
+
+    top = top_rutas(cubo, metrica, k=int(k), periodos=periodos, mayores=extremo == "Mayores", minimo_ordenes=int(minimo))
+    if top.empty:
+        st.info("No hay rutas con suficientes órdenes en los periodos seleccionados.")
+        return
+    if cubo['aproximado']:
+        st.caption("Hay demasiadas rutas distintas: las poco frecuentes se agrupan en 'Otras rutas' y no entran al ranking.")
+
+    st.plotly_chart(plot_top_rutas(top, metrica, height=max(400, 28 * len(top))), use_container_width=True)
+    st.dataframe(top.round(2), use_container_width=True)
@@ -0,0 +1,89 @@
+# Pruebas de la continuación de anomalías en el modo batch: conservar los tractos sin cambios (según sus huellas),
+# continuar los que solo tienen cargas nuevas y calificar de nuevo los demás debe dar los mismos puntajes
+# que calificar todo el historial nuevo desde cero.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datos_sinteticos import generar_ordenes
+from nucleo.anomalias import iniciar_estado, actualizar_anomalias, conservar_anomalias, tabla_estado
+from nucleo.historial import historial_entre_cargas
+from nucleo.huellas import huella_df, metadatos_dataset, cambios
+from nucleo.tractos import indexar_por_tracto
+
+def _calificar(df, estado=None):
+    historial, _ = historial_entre_cargas(df)
+    historial, _ = indexar_por_tracto(historial, 'Fecha Orden de Carga')
+    return historial, actualizar_anomalias(estado or iniciar_estado(), historial)
+
+def _ordenados(puntajes):
+    return puntajes.sort_values(['Tracto', 'Fecha Orden de Carga'], kind='stable').reset_index(drop=True)
+
+@pytest.fixture
+def ordenes():
+    df = generar_ordenes(n_tractos=8, ordenes_por_tracto=60, meses=4, semilla=3)
+    df, _ = indexar_por_tracto(df, 'Inicio de la Orden')
+    return df
+
+def test_huella_cambia_con_modificaciones_en_su_lugar(ordenes):
+    antes = huella_df(ordenes)
+    ordenes.loc[0, 'Litros'] = ordenes.loc[0, 'Litros'] + 1
+    assert huella_df(ordenes) != antes
+
+def test_conservar_igual_a_recalcular(ordenes):
+    _, (estado, puntajes) = _calificar(ordenes)
+    anteriores = metadatos_dataset(ordenes)
+
+    # Se corrigen los litros de un tracto en su lugar y se quita otro tracto
+    tractos = ordenes['Tracto'].unique()
+    corregido, quitado = tractos[0], tractos[1]
+    filas = np.flatnonzero((ordenes['Tracto'] == corregido) & ordenes['Orden con Costo de Combustible'])
+    ordenes.loc[filas[len(filas) // 2], 'Litros'] *= 3
+    ordenes = ordenes[ordenes['Tracto'] != quitado].reset_index(drop=True)
+
+    cambiados = cambios(anteriores, metadatos_dataset(ordenes))['grupos']
+    assert sorted(cambiados) == sorted([str(corregido), str(quitado)])
+
+    historial, (_, esperado) = _calificar(ordenes)
+    estado, conservados, pendientes = conservar_anomalias(estado, puntajes, historial, cambiados)
+    assert set(pendientes['Tracto']) == {corregido}
+    estado, nuevos = actualizar_anomalias(estado, pendientes)
+
+    obtenido = _ordenados(pd.concat([conservados, nuevos], ignore_index=True))
+    pd.testing.assert_frame_equal(obtenido, _ordenados(esperado))
+    _, (estado_esperado, _) = _calificar(ordenes)
+    pd.testing.assert_frame_equal(
+        tabla_estado(estado).sort_values('Tracto').reset_index(drop=True),
+        tabla_estado(estado_esperado).sort_values('Tracto').reset_index(drop=True),
+    )
+
+def _continuar(historial_anterior, historial, cambiados):
+    estado, puntajes = actualizar_anomalias(iniciar_estado(), historial_anterior)
+    estado, conservados, pendientes = conservar_anomalias(estado, puntajes, historial, cambiados)
+    estado, nuevos = actualizar_anomalias(estado, pendientes)
+    assert estado['omitidas'] == 0
+    return pendientes, _ordenados(pd.concat([conservados, nuevos], ignore_index=True))
+
+def test_cargas_agregadas_continuan(ordenes):
+    historial, (_, esperado) = _calificar(ordenes)
+    corte = ordenes['Inicio de la Orden'].quantile(0.7)
+    anterior, _ = _calificar(ordenes[ordenes['Inicio de la Orden'] < corte].reset_index(drop=True))
+
+    pendientes, obtenido = _continuar(anterior, historial, historial['Tracto'].astype(str).unique())
+    # Solo se califican las cargas posteriores a las que ya estaban
+    assert len(pendientes) < len(historial)
+    pd.testing.assert_frame_equal(obtenido, _ordenados(esperado))
+
+def test_carga_con_la_misma_fecha_vuelve_a_empezar(ordenes):
+    historial, _ = _calificar(ordenes)
+    historial = historial.copy()
+    tracto = historial['Tracto'].iloc[0]
+    filas = np.flatnonzero(historial['Tracto'] == tracto)
+    # La carga nueva del tracto tiene la misma fecha que la última ya calificada
+    historial.loc[filas[-1], 'Fecha Orden de Carga'] = historial.loc[filas[-2], 'Fecha Orden de Carga']
+    _, esperado = actualizar_anomalias(iniciar_estado(), historial)
+
+    pendientes, obtenido = _continuar(historial.drop(index=filas[-1]), historial, [str(tracto)])
+    assert (pendientes['Tracto'] == tracto).sum() == len(filas)
+    pd.testing.assert_frame_equal(obtenido, _ordenados(esperado))
@@ -0,0 +1,35 @@
+# Pruebas de las tablas compartidas: el filtro de la búsqueda no debe copiar las órdenes, así la selección de cada sesión
+# sigue apuntando a las columnas con memoria mapeada de los artefactos (nucleo/compartido.py).
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from benchmarks.datos_sinteticos import generar_ordenes
+from nucleo.compartido import escribir_compartido, leer_compartido, columnas_compartidas
+from df_filter_utils import aplicar_filtro
+
+@pytest.fixture(scope='module')
+def ordenes(tmp_path_factory):
+    ruta = str(tmp_path_factory.mktemp('compartido') / 'ordenes.arrow')
+    escribir_compartido(generar_ordenes(n_tractos=10, ordenes_por_tracto=50, semilla=2), ruta)
+    return leer_compartido(ruta)
+
+def test_columnas_mapeadas(ordenes):
+    assert len(columnas_compartidas(ordenes)) > 0
+
+def test_sin_filtro_comparte_las_columnas(ordenes):
+    filtro = aplicar_filtro(ordenes, 'Proyecto', 'texto', [])
+    assert filtro is ordenes
+    # Lo que hace la app con el resultado de la tabla: la selección sigue sobre las mismas páginas
+    seleccion = pd.DataFrame(filtro)
+    assert columnas_compartidas(seleccion) == columnas_compartidas(ordenes)
+
+def test_filtro_no_modifica_las_ordenes(ordenes):
+    compartidas = columnas_compartidas(ordenes)
+    filtro = aplicar_filtro(ordenes, 'kmstotales', 'num', (100, 500))
+    assert ((filtro['kmstotales'] >= 100) & (filtro['kmstotales'] <= 500)).all()
+    fechas = aplicar_filtro(ordenes, 'Inicio de la Orden', 'fecha', (pd.Timestamp('2025-02-01').date(), pd.Timestamp('2025-03-01').date()))
+    assert fechas['Inicio de la Orden'].dt.date.between(pd.Timestamp('2025-02-01').date(), pd.Timestamp('2025-03-01').date()).all()
+    assert columnas_compartidas(ordenes) == compartidas
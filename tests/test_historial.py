@@ -0,0 +1,268 @@
+# Pruebas del historial entre eventos: el motor vectorizado (nucleo/segmentos.py) debe dar lo mismo que el ciclo
+# original por tracto (historial_cargas.py antes del motor), con órdenes sin inicio o sin cierre y tractos con un solo evento.
+# El ciclo original escribía la fecha de la carga en 'Fecha Orden de Ant. Carga' y la anterior en 'Fecha Orden de Carga';
+# la referencia de abajo lo reproduce con fechas_intercambiadas=True y las pruebas comparan contra las fechas corregidas.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datos_sinteticos import generar_ordenes
+from nucleo.historial import historial_entre_cargas, historial_entre_mantenimientos
+
+COLUMNAS_CARGAS = [
+    'Periodo',
+    'Tracto',
+    'No. de Carga Combustible',
+    'Fecha Orden de Ant. Carga',
+    'Fecha Orden de Carga',
+    'Litros Combustible Cargados',
+    'Costo por Litro',
+    'Rendimiento Kms/Litro',
+    'Costo de Combustible',
+    'Costo de Peajes',
+    'Costo de Mantenimiento',
+    'Costo Total',
+    'CPK Combustible',
+    'CPK Peajes',
+    'CPK Mantenimiento',
+    'KMs Recorridos desde Última Carga',
+    'Viajes entre Cargas',
+    'Rutas Distintas',
+    'Proyectos Distintos',
+    'Promedio Kms por Viaje',
+    'Kms Recorridos por Día',
+]
+
+AGREGADOS_CARGAS = {
+    'No. de Carga Combustible': 'median',
+    'Tiempo entre Cargas': 'mean',
+    'KMs Recorridos desde Última Carga': 'mean',
+    'Litros Combustible Cargados': 'mean',
+    'Costo por Litro': 'mean',
+    'Rendimiento Kms/Litro': 'mean',
+    'Costo de Combustible': 'mean',
+    'Costo de Peajes': 'mean',
+    'Costo de Mantenimiento': 'mean',
+    'Costo Total': 'mean',
+    'CPK Combustible': 'mean',
+    'CPK Peajes': 'mean',
+    'CPK Mantenimiento': 'mean',
+    'Viajes entre Cargas': 'median',
+    'Rutas Distintas': 'median',
+    'Proyectos Distintos': 'median',
+    'Promedio Kms por Viaje': 'mean',
+    'Kms Recorridos por Día': 'mean',
+    'Kms Totales': 'sum',
+    'No. Viajes': 'sum',
+}
+
+COLUMNAS_MANTENIMIENTOS = [
+    'Periodo',
+    'Tracto',
+    'No. de Mantenimiento',
+    'Fecha Mantenimiento Anterior',
+    'Fecha Mantenimiento',
+    'Costo de Mantenimiento',
+    'KMs desde Último Mantenimiento',
+    'Órdenes entre Mantenimientos',
+    'Costo de Combustible',
+    'Costo de Peajes',
+    'CPK Mantenimiento',
+]
+
+def _ordenes_de(df, ud):
+    # Orden estable: las órdenes sin inicio quedan al final en el orden de la base, igual que en el motor
+    return df[df['Tracto'] == ud].sort_values('Inicio de la Orden', ascending=True, kind='stable')
+
+def _sin_evento_anterior(historial, inicio, fin, columna_dias):
+    historial[columna_dias] = (historial[fin] - historial[inicio]).dt.total_seconds() / (24 * 3600)
+    return historial[
+        ~historial[columna_dias].isin([np.inf, -np.inf]) &
+        ~historial[columna_dias].isna()
+    ].copy()
+
+def historial_cargas_ciclo(df, fechas_intercambiadas=False):
+    # El ciclo original por tracto y por orden (sin el filtro de periodos que ya no se aplicaba)
+    historial_cargas = []
+
+    for ud in df['Tracto'].unique():
+        df_ud = _ordenes_de(df, ud)
+        cont_kms = 0
+        cont_cargas = 0
+        viajes = 0
+        fecha_ant_carga = pd.NaT
+        no_rutas_distintas = set()
+        no_proyectos_distintos = set()
+        mean_kms_l = []
+        costo_peajes_entre_cargas = 0
+        costo_mant_entre_cargas = 0
+
+        for i in range(len(df_ud)):
+            no_rutas_distintas.add(df_ud['Ruta Ciudades'].iloc[i])
+            no_proyectos_distintos.add(df_ud['Proyecto'].iloc[i])
+            mean_kms_l.append(df_ud['kmstotales'].iloc[i])
+            cont_kms += df_ud['kmstotales'].iloc[i]
+            costo_peajes_entre_cargas += df_ud['Costo Peajes'].iloc[i]
+            costo_mant_entre_cargas += df_ud['Costo Mantenimiento'].iloc[i]
+
+            if df_ud['Orden con Costo de Combustible'].iloc[i]:
+                cont_cargas += 1
+                fecha_carga = df_ud['Cierre de la Orden'].iloc[i]
+                litros_carga = df_ud['Litros'].iloc[i]
+                costo_carga = df_ud['Costo Combustible'].iloc[i]
+                costo_total = costo_carga + costo_peajes_entre_cargas + costo_mant_entre_cargas
+
+                rendimiento = cont_kms / litros_carga if litros_carga != 0 else np.nan
+                if cont_kms != 0:
+                    cpk = costo_carga / cont_kms
+                    cpk_peajes = costo_peajes_entre_cargas / cont_kms
+                    cpk_mant = costo_mant_entre_cargas / cont_kms
+                else:
+                    cpk = cpk_peajes = cpk_mant = np.nan
+
+                dias = (fecha_carga - fecha_ant_carga).days
+                kms_por_dia = cont_kms / dias if pd.notna(fecha_ant_carga) and dias != 0 else 0
+                fechas = (fecha_carga, fecha_ant_carga) if fechas_intercambiadas else (fecha_ant_carga, fecha_carga)
+                historial_cargas.append([
+                    df_ud['Periodo'].iloc[i], ud, cont_cargas, *fechas, litros_carga, df_ud['Costo por litro'].iloc[i],
+                    rendimiento, costo_carga, costo_peajes_entre_cargas, costo_mant_entre_cargas, costo_total,
+                    cpk, cpk_peajes, cpk_mant, cont_kms, viajes, len(no_rutas_distintas), len(no_proyectos_distintos),
+                    sum(mean_kms_l) / len(mean_kms_l), kms_por_dia,
+                ])
+                fecha_ant_carga = fecha_carga
+                cont_kms = 0
+                viajes = 0
+                no_rutas_distintas = set()
+                no_proyectos_distintos = set()
+                mean_kms_l = []
+                costo_peajes_entre_cargas = 0
+                costo_mant_entre_cargas = 0
+
+            viajes += 1
+
+    historial_cargas = pd.DataFrame(historial_cargas, columns=COLUMNAS_CARGAS)
+    historial_cargas = _sin_evento_anterior(historial_cargas, 'Fecha Orden de Ant. Carga', 'Fecha Orden de Carga', 'Tiempo entre Cargas')
+    historial_cargas['Kms Totales'] = historial_cargas['KMs Recorridos desde Última Carga'].fillna(0)
+    historial_cargas['No. Viajes'] = historial_cargas['Viajes entre Cargas'].fillna(0)
+    return historial_cargas, historial_cargas.groupby('Tracto').agg(AGREGADOS_CARGAS)
+
+def historial_mantenimientos_ciclo(df):
+    # El mismo ciclo con el mantenimiento como evento
+    historial_mant = []
+
+    for ud in df['Tracto'].unique():
+        df_ud = _ordenes_de(df, ud)
+        no_mant = 0
+        ordenes = 0
+        kms = combustible = peajes = 0
+        fecha_ant = pd.NaT
+
+        for i in range(len(df_ud)):
+            ordenes += 1
+            kms += df_ud['kmstotales'].iloc[i]
+            combustible += df_ud['Costo Combustible'].iloc[i]
+            peajes += df_ud['Costo Peajes'].iloc[i]
+
+            if df_ud['Orden con Costo de Mantenimiento'].iloc[i]:
+                no_mant += 1
+                fecha = df_ud['Cierre de la Orden'].iloc[i]
+                costo = df_ud['Costo Mantenimiento'].iloc[i]
+                historial_mant.append([
+                    df_ud['Periodo'].iloc[i], ud, no_mant, fecha_ant, fecha, costo, kms, ordenes,
+                    combustible, peajes, costo / kms if kms != 0 else np.nan,
+                ])
+                fecha_ant = fecha
+                ordenes = 0
+                kms = combustible = peajes = 0
+
+    historial_mant = pd.DataFrame(historial_mant, columns=COLUMNAS_MANTENIMIENTOS)
+    return _sin_evento_anterior(historial_mant, 'Fecha Mantenimiento Anterior', 'Fecha Mantenimiento', 'Días entre Mantenimientos')
+
+@pytest.fixture(scope='module')
+def ordenes():
+    df = generar_ordenes(n_tractos=12, ordenes_por_tracto=80, meses=4, semilla=7)
+    rng = np.random.default_rng(1)
+    filas = rng.permutation(len(df))
+    # Órdenes sin inicio (quedan al final de su tracto) y sin cierre (la carga no tiene fecha)
+    df.loc[filas[:25], 'Inicio de la Orden'] = pd.NaT
+    df.loc[filas[25:50], 'Cierre de la Orden'] = pd.NaT
+
+    # Un tracto con una sola carga y un solo mantenimiento, y otro con una sola orden
+    plantilla = df.iloc[:6].copy()
+    plantilla['Tracto'] = 9001
+    plantilla['Orden con Costo de Combustible'] = [False, False, True, False, False, False]
+    plantilla['Orden con Costo de Mantenimiento'] = [False, True, False, False, False, False]
+    unica = df.iloc[[0]].copy()
+    unica['Tracto'] = 9002
+    unica['Orden con Costo de Combustible'] = True
+    unica['Orden con Costo de Mantenimiento'] = True
+
+    df = pd.concat([df, plantilla, unica], ignore_index=True)
+    df['No. Orden'] = np.arange(len(df))
+    return df
+
+def _comparar(obtenido, esperado, columnas):
+    assert len(obtenido) == len(esperado)
+    for columna in columnas:
+        a, b = obtenido[columna].reset_index(drop=True), esperado[columna].reset_index(drop=True)
+        if a.dtype.kind == 'M' or b.dtype.kind == 'M':
+            pd.testing.assert_series_equal(pd.to_datetime(a), pd.to_datetime(b), check_names=False)
+        elif a.dtype.kind in 'fiub':
+            np.testing.assert_allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), equal_nan=True, err_msg=columna)
+        else:
+            assert a.tolist() == b.tolist(), columna
+
+def test_historial_cargas_igual_al_ciclo(ordenes):
+    esperado, esperado_grouped = historial_cargas_ciclo(ordenes)
+    obtenido, obtenido_grouped = historial_entre_cargas(ordenes)
+
+    _comparar(obtenido, esperado, COLUMNAS_CARGAS + ['Tiempo entre Cargas', 'Kms Totales', 'No. Viajes'])
+    assert list(obtenido_grouped.sort_index().index) == list(esperado_grouped.index)
+    _comparar(obtenido_grouped.sort_index(), esperado_grouped, list(AGREGADOS_CARGAS))
+
+def test_tractos_con_un_solo_evento(ordenes):
+    # Su única carga no tiene carga anterior: no queda ningún segmento y el tracto no aparece en el resumen
+    historial_cargas, hist_cargas_grouped = historial_entre_cargas(ordenes)
+    historial_mant, hist_mant_grouped = historial_entre_mantenimientos(ordenes)
+    for tracto in (9001, 9002):
+        assert tracto not in set(historial_cargas['Tracto']) and tracto not in hist_cargas_grouped.index
+        assert tracto not in set(historial_mant['Tracto']) and tracto not in hist_mant_grouped.index
+
+def test_ordenes_sin_fecha(ordenes):
+    # Una carga sin cierre no tiene tiempo entre cargas: sale ella y la carga siguiente de su tracto
+    historial_cargas, _ = historial_entre_cargas(ordenes)
+    assert historial_cargas['Fecha Orden de Carga'].notna().all()
+    assert historial_cargas['Fecha Orden de Ant. Carga'].notna().all()
+
+    sin_cierre = ordenes['Cierre de la Orden'].isna() & ordenes['Orden con Costo de Combustible'].astype(bool)
+    completas, _ = historial_entre_cargas(ordenes.assign(**{'Cierre de la Orden': ordenes['Cierre de la Orden'].fillna(pd.Timestamp('2030-01-01'))}))
+    assert sin_cierre.any() and len(historial_cargas) < len(completas)
+
+def test_fechas_de_carga_corregidas(ordenes):
+    # El ciclo original dejaba cada fecha en la columna de la otra y el tiempo entre cargas con el signo invertido
+    original, _ = historial_cargas_ciclo(ordenes, fechas_intercambiadas=True)
+    obtenido, _ = historial_entre_cargas(ordenes)
+
+    pd.testing.assert_series_equal(
+        obtenido['Fecha Orden de Ant. Carga'].reset_index(drop=True),
+        original['Fecha Orden de Carga'].reset_index(drop=True),
+        check_names=False,
+    )
+    np.testing.assert_allclose(obtenido['Tiempo entre Cargas'].to_numpy(), -original['Tiempo entre Cargas'].to_numpy())
+
+def test_historial_mantenimientos_igual_al_ciclo(ordenes):
+    esperado = historial_mantenimientos_ciclo(ordenes)
+    obtenido, obtenido_grouped = historial_entre_mantenimientos(ordenes)
+
+    assert len(esperado) > 0
+    _comparar(obtenido, esperado, COLUMNAS_MANTENIMIENTOS + ['Días entre Mantenimientos'])
+    esperado_grouped = esperado.groupby('Tracto').agg({
+        'No. de Mantenimiento': 'max',
+        'Días entre Mantenimientos': 'mean',
+        'KMs desde Último Mantenimiento': 'mean',
+        'Órdenes entre Mantenimientos': 'median',
+        'Costo de Mantenimiento': 'mean',
+        'CPK Mantenimiento': 'mean',
+    })
+    _comparar(obtenido_grouped.sort_index(), esperado_grouped, list(esperado_grouped.columns))
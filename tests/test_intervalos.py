@@ -0,0 +1,86 @@
+# Pruebas del índice de intervalos: cada consulta debe regresar las mismas filas que la máscara sobre toda la tabla
+# que reemplaza, con órdenes sin inicio o sin cierre, órdenes sin tracto, cierres antes del inicio y tractos desconocidos.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nucleo.intervalos import indice_intervalos, ordenes_en_ventana, ordenes_traslapadas, ordenes_en_momento, tractos_en_ruta
+
+TRACTOS = ['A', 'B', 'C']
+CONSULTAS = 300
+
+@pytest.fixture(scope='module')
+def ordenes():
+    rng = np.random.default_rng(1)
+    n = 3000
+    inicio = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit='h')
+    # Algunas duraciones negativas: el cierre queda antes del inicio
+    cierre = inicio + pd.to_timedelta(rng.integers(-5, 200, n), unit='h')
+    df = pd.DataFrame({
+        'Tracto': rng.choice(TRACTOS + [None], n),
+        'Inicio de la Orden': inicio,
+        'Cierre de la Orden': cierre,
+    })
+    df.loc[rng.choice(n, 50), 'Cierre de la Orden'] = pd.NaT
+    df.loc[rng.choice(n, 50), 'Inicio de la Orden'] = pd.NaT
+    return df
+
+@pytest.fixture(scope='module')
+def indice(ordenes):
+    return indice_intervalos(ordenes)
+
+def _consultas(semilla):
+    # Tracto (o uno que no existe) y una ventana que puede empezar antes o terminar después de los datos
+    rng = np.random.default_rng(semilla)
+    for _ in range(CONSULTAS):
+        tracto = rng.choice(TRACTOS + ['Z'])
+        desde = pd.Timestamp('2025-01-01') + pd.Timedelta(hours=int(rng.integers(-100, 9000)))
+        yield tracto, desde, desde + pd.Timedelta(hours=int(rng.integers(0, 2000)))
+
+def _columnas(df):
+    return df['Tracto'], df['Inicio de la Orden'], df['Cierre de la Orden']
+
+def test_ordenes_en_ventana(ordenes, indice):
+    tracto_col, inicio, cierre = _columnas(ordenes)
+    for tracto, desde, hasta in _consultas(2):
+        mascara = (inicio >= desde) & (cierre < hasta) & (tracto_col == tracto)
+        np.testing.assert_array_equal(np.sort(ordenes_en_ventana(indice, tracto, desde, hasta)), np.flatnonzero(mascara))
+
+        # Con un lado abierto solo cuentan las órdenes con las dos fechas
+        mascara = (inicio >= desde) & cierre.notna() & (tracto_col == tracto)
+        np.testing.assert_array_equal(np.sort(ordenes_en_ventana(indice, tracto, desde=desde)), np.flatnonzero(mascara))
+        mascara = inicio.notna() & (cierre < hasta) & (tracto_col == tracto)
+        np.testing.assert_array_equal(np.sort(ordenes_en_ventana(indice, tracto, hasta=hasta)), np.flatnonzero(mascara))
+
+def test_ventana_del_tracto_completo(ordenes, indice):
+    # La ventana del panel de tracto va del primer inicio al último cierre del tracto
+    tracto_col, inicio, cierre = _columnas(ordenes)
+    for tracto in TRACTOS:
+        del_tracto = tracto_col == tracto
+        desde, hasta = inicio[del_tracto].min(), cierre[del_tracto].max()
+        mascara = (inicio >= desde) & (cierre < hasta) & del_tracto
+        np.testing.assert_array_equal(np.sort(ordenes_en_ventana(indice, tracto, desde, hasta)), np.flatnonzero(mascara))
+
+def test_ordenes_traslapadas(ordenes, indice):
+    tracto_col, inicio, cierre = _columnas(ordenes)
+    for tracto, desde, hasta in _consultas(3):
+        mascara = (inicio < hasta) & (cierre > desde) & (tracto_col == tracto)
+        np.testing.assert_array_equal(np.sort(ordenes_traslapadas(indice, tracto, desde, hasta)), np.flatnonzero(mascara))
+
+def test_ordenes_en_momento(ordenes, indice):
+    tracto_col, inicio, cierre = _columnas(ordenes)
+    for tracto, momento, _ in _consultas(4):
+        mascara = (inicio <= momento) & (cierre > momento) & (tracto_col == tracto)
+        np.testing.assert_array_equal(np.sort(ordenes_en_momento(indice, tracto, momento)), np.flatnonzero(mascara))
+
+def test_tractos_en_ruta(ordenes, indice):
+    tracto_col, inicio, cierre = _columnas(ordenes)
+    for _, momento, _ in _consultas(5):
+        en_curso = (inicio <= momento) & (cierre > momento)
+        assert tractos_en_ruta(indice, momento) == sorted(set(tracto_col[en_curso].dropna()))
+
+def test_tracto_desconocido(indice):
+    assert len(ordenes_en_ventana(indice, 'Z')) == 0
+    assert len(ordenes_traslapadas(indice, 'Z', '2025-01-01', '2026-01-01')) == 0
+    assert len(ordenes_en_momento(indice, 'Z', '2025-06-01')) == 0
@@ -0,0 +1,82 @@
+# Pruebas de los agregados por periodo: por mes, las sumas diarias de CPK y completitud reagrupadas deben ser iguales
+# a agrupar las órdenes y el historial por su columna 'Periodo' (el cálculo original), aunque haya órdenes sin inicio
+# o con un 'Periodo' distinto al mes de su inicio.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datos_sinteticos import generar_ordenes
+from nucleo.periodos import reagrupar
+from nucleo.cpk import sumas_diarias_cpk
+from nucleo.estadisticas import df_completitud
+from nucleo.historial import historial_entre_cargas
+
+SUMAS_ORDENES = ['Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento', 'kmstotales', 'Litros']
+
+@pytest.fixture(scope='module')
+def ordenes():
+    df = generar_ordenes(n_tractos=20, ordenes_por_tracto=60, meses=6, semilla=3)
+    rng = np.random.default_rng(0)
+    filas = rng.permutation(len(df))
+    # Órdenes sin inicio, con el periodo del mes siguiente y sin periodo
+    df.loc[filas[:40], 'Inicio de la Orden'] = pd.NaT
+    df.loc[filas[40:80], 'Periodo'] = (
+        df.loc[filas[40:80], 'Periodo'].map(lambda p: str(pd.Period(p, freq='M') + 1))
+    )
+    df.loc[filas[80:90], 'Periodo'] = None
+    return df
+
+def _completitud_por_periodo(df):
+    # df_completitud antes de los agregados diarios
+    df = df.copy()
+    df['Orden con Costo de Combustible'] = df['Costo Combustible'] > 0
+    df['Orden con Costo de Peajes'] = df['Costo Peajes'] > 0
+    df['Orden con Costo de Mantenimiento'] = df['Costo Mantenimiento'] > 0
+    return df.groupby(['Periodo']).agg({
+        'No. Viajes': 'sum',
+        'Orden con Costo de Combustible': 'sum',
+        'Orden con Costo de Peajes': 'sum',
+        'Orden con Costo de Mantenimiento': 'sum'})
+
+def test_completitud_mensual_igual_a_periodo(ordenes):
+    esperado = _completitud_por_periodo(ordenes)
+    obtenido = df_completitud(ordenes, granularidad='mes')
+    assert list(obtenido.index) == list(esperado.index)
+    for columna in esperado.columns:
+        np.testing.assert_allclose(obtenido[columna].to_numpy(dtype=float), esperado[columna].to_numpy(dtype=float))
+
+def test_cpk_mensual_igual_a_periodo(ordenes):
+    historial_cargas, _ = historial_entre_cargas(ordenes)
+    mensual = reagrupar(sumas_diarias_cpk(ordenes, historial_cargas), 'mes')
+
+    criterios = {
+        'Todas las Órdenes': ordenes,
+        'Órdenes con costo': ordenes[ordenes['Costo Total'] > 0],
+        'Combustible': ordenes[ordenes['Orden con Costo de Combustible'] == True],
+        'Peajes': ordenes[ordenes['Orden con Costo de Peajes'] == True],
+    }
+    for parte, filas in criterios.items():
+        esperado = filas.groupby('Periodo')
+        columnas = [c for c in SUMAS_ORDENES if (parte, c) in mensual.columns]
+        sumas = esperado[columnas].sum().reindex(mensual.index, fill_value=0)
+        for columna in columnas:
+            np.testing.assert_allclose(mensual[(parte, columna)].to_numpy(), sumas[columna].to_numpy(), err_msg=f'{parte}: {columna}')
+        conteos = esperado.size().reindex(mensual.index, fill_value=0)
+        np.testing.assert_array_equal(mensual[(parte, 'No. Órdenes')].to_numpy(), conteos.to_numpy())
+
+    cargas = historial_cargas.groupby('Periodo')
+    np.testing.assert_allclose(
+        mensual[('Entre Cargas', 'Costo de Combustible')].to_numpy(),
+        cargas['Costo de Combustible'].sum().reindex(mensual.index, fill_value=0).to_numpy(),
+    )
+    np.testing.assert_array_equal(
+        mensual[('Entre Cargas', 'No. Cargas con Combustible')].to_numpy(),
+        cargas.size().reindex(mensual.index, fill_value=0).to_numpy(),
+    )
+
+def test_ordenes_sin_inicio_cuentan(ordenes):
+    # Las órdenes sin inicio (con Periodo) entran al primer día de su mes
+    diario = df_completitud(ordenes, granularidad='dia')
+    con_periodo = ordenes['Periodo'].notna()
+    assert diario['No. Viajes'].sum() == ordenes.loc[con_periodo, 'No. Viajes'].sum()
@@ -1,8 +1,13 @@
 
-# Este archivo contiene funciones para analizar y visualizar información específica de cada tracto.
+# Este archivo contiene funciones para visualizar información específica de cada tracto.
+# Los cálculos por tracto (indexar_por_tracto, acumular_por_tracto, precalcular_acumulados_tracto, serie_acumulada_tracto) viven en nucleo/tractos.py.
 
 # Función: monocromatic_color
 # - Genera colores monocromáticos derivados de un color base para distinguir visualmente diferentes variables.
+# - Junto con color_base_tracto, escala a decenas de tractos: cada tracto recibe un tono y cada variable una luminosidad.
+
+# Función: color_base_tracto
+# - Asigna un color base distinto a cada tracto, escalando a decenas de tractos en una misma gráfica.
 
 # Función: plot_acumulado_vs_kms
 # - Grafica la evolución acumulada de costos y kilómetros para uno o varios tractos.
@@ -10,16 +15,24 @@
 
 # Función: plot_costos_vs_kms_bars
 # - Muestra barras comparativas de los costos y kilómetros totales para un tracto en un periodo dado.
+# - Con el índice de intervalos (nucleo/intervalos.py) las órdenes de la ventana salen de búsquedas binarias en la rebanada
+#   del tracto en lugar de máscaras sobre toda la tabla.
 
 # Función: seccion_graficos_tracto
 # - Orquesta la visualización de los gráficos y tablas para un tracto seleccionado en la app Streamlit.
-# - Incluye gráficos de acumulados, barras y el historial de cargas.
+# - Incluye gráficos de acumulados, barras, el historial de cargas y las cargas atípicas del tracto (ver nucleo/anomalias.py),
+#   con umbrales que se ajustan sin recalcular los puntajes.
 # - Facilita el análisis detallado y visual de cada tracto.
 
-from turtle import width
 import pandas as pd
-import plotly.graph_objects as go
 import colorsys
+from perfilado import instrumentar
+from nucleo.tractos import COLUMNAS_ACUMULADAS, acumular_por_tracto, serie_acumulada_tracto
+from nucleo.intervalos import ordenes_en_ventana
+
+TRACTO_BASE_COLORS = [
+    "#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd"
+]
 
 def monocromatic_color(base_hex, idx, total):
     base_rgb = tuple(int(base_hex.lstrip('#')[i:i+2], 16)/255. for i in (0, 2, 4))
@@ -32,11 +45,22 @@ def monocromatic_color(base_hex, idx, total):
     rgb = colorsys.hsv_to_rgb(h, s, v2)
     return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255))
 
-def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600):
+def color_base_tracto(idx, total):
+    # Con pocos tractos se usa la paleta fija; con más, los tonos se reparten con el ángulo dorado
+    # y se alterna la saturación para que tonos vecinos no se confundan.
+    if total <= len(TRACTO_BASE_COLORS):
+        return TRACTO_BASE_COLORS[idx % len(TRACTO_BASE_COLORS)]
+    h = (idx * 0.618033988749895) % 1.0
+    s = 0.85 if idx % 2 == 0 else 0.55
+    rgb = colorsys.hsv_to_rgb(h, s, 0.85)
+    return '#{:02x}{:02x}{:02x}'.format(int(rgb[0]*255), int(rgb[1]*255), int(rgb[2]*255))
+
+@instrumentar
+def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600, acumulados=None, variables=None,
+                          fecha_inicio=None, fecha_fin=None):
+    import numpy as np
+    import plotly.graph_objects as go
 
-    TRACTO_BASE_COLORS = [
-    "#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd"
-    ]
     LINE_STYLES = {
         "kmstotales": "solid",
         "Costo Combustible": "dot",
@@ -49,12 +73,6 @@ def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600):
         "Costo Peajes": "square",
         "Costo Mantenimiento": "triangle-up",
     }
-    VARIABLES = [
-        ("kmstotales", "acum_kms", "kmstotales"),
-        ("Costo Combustible", "acum_combustible", "Costo Combustible"),
-        ("Costo Peajes", "acum_peajes", "Costo Peajes"),
-        ("Costo Mantenimiento", "acum_mantenimiento", "Costo Mantenimiento"),
-    ]
     YAXIS_MAP = {
         "Costo Combustible": "y1",
         "Costo Peajes": "y1",
@@ -70,38 +88,37 @@ def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600):
         "Costo Mantenimiento": "#5086F2",  # Azul claro
     }
 
-    df = df[df['Tracto'].isin(tractos)].copy()
-    df['Inicio de la Orden'] = pd.to_datetime(df['Inicio de la Orden'])
-    df = df.sort_values('Inicio de la Orden')
+    if variables is None:
+        variables = COLUMNAS_ACUMULADAS
+
+    # Sin acumulados precalculados se acumulan solo las órdenes recibidas, sin pasar por el caché en disco
+    if acumulados is None:
+        acumulados = acumular_por_tracto(df[df['Tracto'].isin(tractos)])
+
+    # Con muchos tractos se usa WebGL y marcadores más chicos para que la gráfica siga siendo fluida
+    muchos_tractos = len(tractos) > len(TRACTO_BASE_COLORS)
+    Scatter = go.Scattergl if muchos_tractos else go.Scatter
+    marker_size = 4 if muchos_tractos else MARKER_SIZE
 
     fig = go.Figure()
     for tracto_idx, tracto in enumerate(tractos):
-        base_color = TRACTO_BASE_COLORS[tracto_idx % len(TRACTO_BASE_COLORS)]
-        dft = df[df['Tracto'] == tracto].sort_values('Inicio de la Orden').copy()
-        dft['acum_combustible'] = dft['Costo Combustible'].cumsum()
-        dft['acum_peajes'] = dft['Costo Peajes'].cumsum()
-        dft['acum_mantenimiento'] = dft['Costo Mantenimiento'].cumsum()
-        dft['acum_kms'] = dft["kmstotales"].cumsum()
-        for var_idx, (variable, var_acum, var_single) in enumerate(VARIABLES):
+        serie = serie_acumulada_tracto(acumulados, tracto, fecha_inicio, fecha_fin)
+        if serie is None or len(serie['fechas']) == 0:
+            continue
+        base_color = color_base_tracto(tracto_idx, len(tractos))
+        for var_idx, variable in enumerate(variables):
+            col = COLUMNAS_ACUMULADAS.index(variable)
             # Si solo hay un tracto, usa la paleta de componentes
             if len(tractos) == 1:
                 color = COMPONENTE_COLORES[variable]
             else:
-                color = monocromatic_color(base_color, var_idx, len(VARIABLES))
-            vals_acum = dft[var_acum]
-            vals_puntual = dft[var_single]
-            ordenes = dft.index
-            customdata = pd.concat(
-                [
-                    vals_puntual,
-                    pd.Series(ordenes, index=vals_puntual.index, name="No. Orden")
-                ],
-                axis=1
-            ).values
-            fig.add_trace(go.Scatter(
-                x=dft['Inicio de la Orden'],
+                color = monocromatic_color(base_color, var_idx, len(variables))
+            vals_acum = serie['acumulados'][:, col]
+            customdata = np.column_stack([serie['puntuales'][:, col], serie['ordenes']])
+            fig.add_trace(Scatter(
+                x=serie['fechas'],
                 y=vals_acum,
-                name=f"Acum. {variable} ({vals_acum.iloc[-1]:,.0f}) | {tracto}",
+                name=f"Acum. {variable} ({vals_acum[-1]:,.0f}) | {tracto}",
                 mode='lines+markers',
                 line=dict(
                     color=color,
@@ -109,14 +126,14 @@ def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600):
                     dash=LINE_STYLES[variable]
                 ),
                 marker=dict(
-                    size=MARKER_SIZE,
+                    size=marker_size,
                     color=color,
                     symbol=MARKERS[variable],
                     line=dict(color="black", width=0.6)
                 ),
                 yaxis=YAXIS_MAP[variable],
                 showlegend=True,
-                legendgroup=None,
+                legendgroup=str(tracto) if muchos_tractos else None,
                 customdata=customdata,
                 hovertemplate=(
                     "<b>%{fullData.name}</b><br>"
@@ -156,9 +173,15 @@ def plot_acumulado_vs_kms(df, tractos, title=None, width=800, height=600):
     )
     return fig
 
-def plot_costos_vs_kms_bars(df, fecha_inicio, fecha_fin, tracto, width=800, height=600):
-    # Filtrado y suma
-    data = df[(df['Inicio de la Orden'] >= fecha_inicio) & (df['Cierre de la Orden'] < fecha_fin) & (df['Tracto'] == tracto)].copy()
+@instrumentar
+def plot_costos_vs_kms_bars(df, fecha_inicio, fecha_fin, tracto, width=800, height=600, intervalos=None):
+    import plotly.graph_objects as go
+
+    # Filtrado y suma; con el índice de intervalos (construido sobre df) la ventana se resuelve por búsqueda binaria
+    if intervalos is not None:
+        data = df.take(ordenes_en_ventana(intervalos, tracto, fecha_inicio, fecha_fin))
+    else:
+        data = df[(df['Inicio de la Orden'] >= fecha_inicio) & (df['Cierre de la Orden'] < fecha_fin) & (df['Tracto'] == tracto)].copy()
     total = data[['Costo Combustible', 'Costo Peajes', 'Costo Mantenimiento', 'kmstotales']].sum()
 
     colores = {
@@ -223,8 +246,11 @@ def plot_costos_vs_kms_bars(df, fecha_inicio, fecha_fin, tracto, width=800, heig
     )
     return fig
 
-def seccion_graficos_tracto(df, historial_cargas, key=""):
+@instrumentar
+def seccion_graficos_tracto(df, historial_cargas, key="", offsets=None, offsets_historial=None, anomalias=None, offsets_anomalias=None,
+                            intervalos=None):
     import streamlit as st
+    from nucleo.anomalias import UMBRAL_Z, UMBRAL_MAD, cargas_atipicas
     from tracto_utils import plot_acumulado_vs_kms, plot_costos_vs_kms_bars
     import numpy as np
     from graph_hist_utils import streamlit_viz_selector,get_viz_figure
@@ -236,27 +262,48 @@ def seccion_graficos_tracto(df, historial_cargas, key=""):
     Selecciona un tracto para visualizar la evolución acumulada de costos y kilómetros, así como el resumen total de cada componente para el periodo disponible.
     """)
 
-    tractos = df['Tracto'].unique()
-    tracto_default = tractos[0] if len(tractos) > 0 else None
+    # Con el índice de offsets (ver indexar_por_tracto) el panel solo lee las filas del tracto seleccionado
+    tractos = list(offsets.keys()) if offsets is not None else df['Tracto'].unique()
     tracto_sel = st.selectbox("Selecciona un tracto", options=tractos, index=0, key=f"tracto_selector_{key}")
 
-    fecha_inicio = df[df['Tracto'] == tracto_sel]['Inicio de la Orden'].min()
-    fecha_fin = df[df['Tracto'] == tracto_sel]['Cierre de la Orden'].max()
+    if offsets is not None:
+        inicio, fin = offsets[tracto_sel]
+        df_tracto = df.iloc[inicio:fin]
+    else:
+        df_tracto = df[df['Tracto'] == tracto_sel]
+
+    if offsets_historial is not None:
+        inicio, fin = offsets_historial.get(tracto_sel, (0, 0))
+        hist_tracto = historial_cargas.iloc[inicio:fin]
+    else:
+        hist_tracto = historial_cargas[historial_cargas['Tracto'] == tracto_sel]
+
+    fecha_inicio = df_tracto['Inicio de la Orden'].min()
+    fecha_fin = df_tracto['Cierre de la Orden'].max()
 
-    hist_cargas = historial_cargas[(historial_cargas['Tracto'] == tracto_sel) & (historial_cargas['Fecha Orden de Carga'] >= fecha_inicio) & (historial_cargas['Fecha Orden de Carga'] <= fecha_fin)]
+    hist_cargas = hist_tracto[(hist_tracto['Fecha Orden de Carga'] >= fecha_inicio) & (hist_tracto['Fecha Orden de Carga'] <= fecha_fin)]
+    # El id de segmento solo sirve para el mapeo orden -> segmento; no se muestra
+    hist_cargas = hist_cargas.drop(columns=['Segmento'], errors='ignore')
 
     
     title = f"Acumulados de Costos y Kms | Tracto {tracto_sel} | {fecha_inicio.strftime('%d-%b-%Y')} al {fecha_fin.strftime('%d-%b-%Y')}"
-    fig1 = plot_acumulado_vs_kms(df[(df['Inicio de la Orden']>=fecha_inicio) & (df['Cierre de la Orden']<fecha_fin)], [tracto_sel], title=title, width=400, height=700)
+    # La ventana es todo el periodo del tracto: el índice y la máscara sobre df_tracto recorren las mismas filas;
+    # el índice solo ahorra trabajo cuando la ventana es más angosta que el tracto
+    if intervalos is not None:
+        df_ventana = df.take(ordenes_en_ventana(intervalos, tracto_sel, fecha_inicio, fecha_fin))
+    else:
+        df_ventana = df_tracto[(df_tracto['Inicio de la Orden']>=fecha_inicio) & (df_tracto['Cierre de la Orden']<fecha_fin)]
+    fig1 = plot_acumulado_vs_kms(df_ventana, [tracto_sel], title=title, width=400, height=700)
     st.plotly_chart(fig1, use_container_width=True)
 
     fig2 = plot_costos_vs_kms_bars(
-        df,
+        df if intervalos is not None else df_tracto,
         fecha_inicio=fecha_inicio,
         fecha_fin=fecha_fin,
         tracto=tracto_sel,
         width=400, 
-        height=500
+        height=500,
+        intervalos=intervalos
     )
     st.plotly_chart(fig2, use_container_width=True)
 
@@ -278,6 +325,37 @@ def seccion_graficos_tracto(df, historial_cargas, key=""):
                 height=420  # Cambia el valor según lo que necesites
             )
 
+    st.markdown("### Cargas Atípicas")
+    st.info(
+        """
+        **¿Qué muestra esta tabla?**
+
+        Cargas en las que el rendimiento bajó, el CPK de combustible subió o los kms por día cambiaron mucho respecto a las cargas anteriores del mismo tracto.  
+        Cada carga se compara con el promedio móvil (EWMA) de las cargas previas (puntaje z) y con la mediana de las últimas cargas (puntaje robusto, mediana/MAD).  
+
+        Sube los umbrales para ver solo las desviaciones más fuertes.
+        """
+    )
+
+    if anomalias is None:
+        st.info("Calculando las cargas atípicas; la tabla aparecerá en cuanto termine.")
+    else:
+        col_z, col_mad = st.columns(2)
+        umbral_z = col_z.number_input("Umbral puntaje z", min_value=0.5, value=UMBRAL_Z, step=0.5, key=f"umbral_z_{key}")
+        umbral_mad = col_mad.number_input("Umbral puntaje robusto", min_value=0.5, value=UMBRAL_MAD, step=0.5, key=f"umbral_mad_{key}")
+
+        if offsets_anomalias is not None:
+            inicio, fin = offsets_anomalias.get(tracto_sel, (0, 0))
+            puntajes = anomalias.iloc[inicio:fin]
+        else:
+            puntajes = anomalias[anomalias['Tracto'] == tracto_sel]
+        puntajes = puntajes[(puntajes['Fecha Orden de Carga'] >= fecha_inicio) & (puntajes['Fecha Orden de Carga'] <= fecha_fin)]
+        atipicas = cargas_atipicas(puntajes, umbral_z=umbral_z, umbral_mad=umbral_mad)
+        if atipicas.empty:
+            st.success("El tracto no tiene cargas fuera de los umbrales.")
+        else:
+            st.dataframe(atipicas.drop(columns=['Tracto', 'Segmento']), use_container_width=True, height=300)
+
     st.markdown("### Visualización de Datos")
     st.info(
         "Selecciona una columna numérica y el tipo de gráfico para visualizar la distribución de los datos del historial de cargas. "
@@ -1,11 +1,7 @@
 
 # Este archivo contiene funciones utilitarias generales para la app Streamlit.
-# Su objetivo es centralizar lógica común para el análisis y visualización de datos.
-
-# Función: df_completitud
-# - Calcula el porcentaje de órdenes que tienen costos de combustible, peajes y mantenimiento por periodo.
-# - Devuelve un DataFrame agrupado por periodo con estos indicadores.
-# - Útil para evaluar la calidad y completitud de los datos.
+# Su objetivo es centralizar lógica común para la visualización de datos; los cálculos
+# (df_completitud, indicadores_generales, estadisticas_por_orden) viven en nucleo/estadisticas.py.
 
 # Función: plot_completitud_y_mediana
 # - Genera un gráfico de líneas con Plotly mostrando la completitud de los datos por componente y periodo.
@@ -13,32 +9,14 @@
 # - Facilita la identificación de periodos con baja calidad de datos.
 
 # Función: show_info_columns
-# - Calcula y muestra indicadores generales y estadísticos de las órdenes seleccionadas.
+# - Muestra indicadores generales y estadísticos de las órdenes seleccionadas.
 # - Incluye totales, promedios, medianas, cuartiles y máximos/mínimos de costos y kilómetros.
 # - Presenta la información en un formato visual atractivo usando HTML y CSS embebido en Streamlit.
 # - Ayuda a obtener una visión rápida y clara del estado de los datos filtrados.
 
-import streamlit as st
-import pandas as pd
-import numpy as np
-
-def df_completitud(df):
-    df['Orden con Costo de Combustible'] = df['Costo Combustible'] > 0
-    df['Orden con Costo de Peajes'] = df['Costo Peajes'] > 0
-    df['Orden con Costo de Mantenimiento'] = df['Costo Mantenimiento'] > 0
-
-    completitud_groupby = df.groupby(['Periodo']).agg({
-        'No. Viajes':'sum',
-        'Orden con Costo de Combustible': 'sum',
-        'Orden con Costo de Peajes': 'sum',
-        'Orden con Costo de Mantenimiento': 'sum'})
-
-    completitud_groupby['% Órdenes con Costo Combustible'] = (completitud_groupby['Orden con Costo de Combustible'] / completitud_groupby['No. Viajes']) * 100
-    completitud_groupby['% Órdenes con Costo Peajes'] = (completitud_groupby['Orden con Costo de Peajes'] / completitud_groupby['No. Viajes']) * 100
-    completitud_groupby['% Órdenes con Costo Mantenimiento'] = (completitud_groupby['Orden con Costo de Mantenimiento'] / completitud_groupby['No. Viajes']) * 100
-
-    return completitud_groupby
+from perfilado import instrumentar
 
+@instrumentar
 def plot_completitud_y_mediana(
     completitud_groupby, 
     columnas_estadistica,  # Lista de columnas para líneas de mediana
@@ -122,61 +100,20 @@ def plot_completitud_y_mediana(
 
     return fig
 
+@instrumentar
 def show_info_columns(df):
-    from graph_hist_utils import streamlit_viz_selector, get_viz_figure
-    import numpy as np
+    import streamlit as st
+    from nucleo.estadisticas import indicadores_generales, estadisticas_por_orden
     
     # --- Calcula los indicadores ---
-    info_df = {}
-
-    # Generales
-    info_df['EC'] = len(df['EC'].unique())
-    info_df['Proyectos'] = len(df['Proyecto'].unique())
-    info_df['Clientes'] = len(df['Cliente'].unique())
-    info_df['Unidades'] = len(df['Tracto'].unique())
-    info_df['Conductores'] = len(df['Conductor'].unique())
-    info_df['No. Rutas'] = len(df['Ruta Ciudades'].unique())
-    info_df['No. de Órdenes'] = len(df)
-    info_df['Periodo'] = len(df['Periodo'].unique())
-
-    # Costos, CPK y Kms Recorridos
-    info_df['Costo Combustible'] = df['Costo Combustible'].sum()
-    info_df['Costo Peajes'] = df['Costo Peajes'].sum()
-    info_df['Costo Mantenimiento'] = df['Costo Mantenimiento'].sum()
-    info_df['Costo Total'] = info_df['Costo Combustible'] + info_df['Costo Peajes'] + info_df['Costo Mantenimiento']
-    info_df['kms Totales Recorridos'] = df['kmstotales'].sum()
-    info_df['Costo Por Km (CPK)'] = info_df['Costo Total'] / info_df['kms Totales Recorridos'] if info_df['kms Totales Recorridos'] > 0 else 0
-    info_df['Costo por Litro'] = df['Costo por litro'].fillna(0).mean() if not df['Costo por litro'].empty else 0
-
-
-    # Variaciones
-    df_for_desc = df.copy()
-    df_for_desc = df_for_desc.replace([np.inf, -np.inf], np.nan)
-
-    def q1(series):
-        return series.quantile(0.25)
-    def q3(series):
-        return series.quantile(0.75)
+    info_df = indicadores_generales(df)
+    estadisticas = estadisticas_por_orden(df)
 
-    # Para cada variable, calcula los stats
-    def get_stats(col, money=False):
-        if col in df_for_desc.columns:
-            s = df_for_desc[col].dropna()
-            return [
-                ("Q1", f"<b>${s.quantile(0.25):,.2f}</b>" if money else f"<b>{s.quantile(0.25):,.2f}</b>"),
-                ("Mediana", f"<b>${s.median():,.2f}</b>" if money else f"<b>{s.median():,.2f}</b>"),
-                ("Q3", f"<b>${s.quantile(0.75):,.2f}</b>" if money else f"<b>{s.quantile(0.75):,.2f}</b>"),
-                ("Mínimo", f"<b>${s.min():,.2f}</b>" if money else f"<b>{s.min():,.2f}</b>"),
-                ("Máximo", f"<b>${s.max():,.2f}</b>" if money else f"<b>{s.max():,.2f}</b>"),
-            ]
-        else:
-            return [
-                ("Q1", "<b>No disponible</b>"),
-                ("Mediana", "<b>No disponible</b>"),
-                ("Q3", "<b>No disponible</b>"),
-                ("Mínimo", "<b>No disponible</b>"),
-                ("Máximo", "<b>No disponible</b>"),
-            ]
+    def contenido_estadisticas(col, money=True):
+        return [
+            (etiqueta, f"<b>${valor:,.2f}</b>" if money else f"<b>{valor:,.2f}</b> km")
+            for etiqueta, valor in estadisticas.loc[col].items()
+        ]
 
     # Estructura agrupada en 4 columnas/secciones
     columns_structure = [
@@ -206,51 +143,19 @@ def show_info_columns(df):
         },
         {
             "title": "Costo de Combustible p/ Orden",
-            "content": [
-                ("Promedio", f"<b>${df_for_desc['Costo Combustible'].mean():,.2f}</b>"),
-                ("Desviación Estándar", f"<b>${df_for_desc['Costo Combustible'].std():,.2f}</b>"),
-                ("Q1", f"<b>${df_for_desc['Costo Combustible'].quantile(0.25):,.2f}</b>"),
-                ("Mediana", f"<b>${df_for_desc['Costo Combustible'].median():,.2f}</b>"),
-                ("Q3", f"<b>${df_for_desc['Costo Combustible'].quantile(0.75):,.2f}</b>"),
-                ("Mínimo", f"<b>${df_for_desc['Costo Combustible'].min():,.2f}</b>"),
-                ("Máximo", f"<b>${df_for_desc['Costo Combustible'].max():,.2f}</b>"),
-            ],
+            "content": contenido_estadisticas('Costo Combustible'),
         },
         {
             "title": "Costo de Peajes p/ Orden",
-            "content": [
-                ("Promedio", f"<b>${df_for_desc['Costo Peajes'].mean():,.2f}</b>"),
-                ("Desviación Estándar", f"<b>${df_for_desc['Costo Peajes'].std():,.2f}</b>"),
-                ("Q1", f"<b>${df_for_desc['Costo Peajes'].quantile(0.25):,.2f}</b>"),
-                ("Mediana", f"<b>${df_for_desc['Costo Peajes'].median():,.2f}</b>"),
-                ("Q3", f"<b>${df_for_desc['Costo Peajes'].quantile(0.75):,.2f}</b>"),
-                ("Mínimo", f"<b>${df_for_desc['Costo Peajes'].min():,.2f}</b>"),
-                ("Máximo", f"<b>${df_for_desc['Costo Peajes'].max():,.2f}</b>"),
-            ],
+            "content": contenido_estadisticas('Costo Peajes'),
         },
         {
             "title": "Costo de Mantenimiento p/ Orden",
-            "content": [
-                ("Promedio", f"<b>${df_for_desc['Costo Mantenimiento'].mean():,.2f}</b>"),
-                ("Desviación Estándar", f"<b>${df_for_desc['Costo Mantenimiento'].std():,.2f}</b>"),
-                ("Q1", f"<b>${df_for_desc['Costo Mantenimiento'].quantile(0.25):,.2f}</b>"),
-                ("Mediana", f"<b>${df_for_desc['Costo Mantenimiento'].median():,.2f}</b>"),
-                ("Q3", f"<b>${df_for_desc['Costo Mantenimiento'].quantile(0.75):,.2f}</b>"),
-                ("Mínimo", f"<b>${df_for_desc['Costo Mantenimiento'].min():,.2f}</b>"),
-                ("Máximo", f"<b>${df_for_desc['Costo Mantenimiento'].max():,.2f}</b>"),
-            ],
+            "content": contenido_estadisticas('Costo Mantenimiento'),
         },
         {
             "title": "Kms Recorridos p/ Orden", 
-            "content": [
-                ("Promedio", f"<b>{df_for_desc['kmstotales'].mean():,.2f}</b> km"),
-                ("Desviación Estándar", f"<b>{df_for_desc['kmstotales'].std():,.2f}</b> km"),
-                ("Q1", f"<b>{df_for_desc['kmstotales'].quantile(0.25):,.2f}</b> km"),
-                ("Mediana", f"<b>{df_for_desc['kmstotales'].median():,.2f}</b> km"),
-                ("Q3", f"<b>{df_for_desc['kmstotales'].quantile(0.75):,.2f}</b> km"),
-                ("Mínimo", f"<b>{df_for_desc['kmstotales'].min():,.2f}</b> km"),
-                ("Máximo", f"<b>{df_for_desc['kmstotales'].max():,.2f}</b> km"),
-            ],
+            "content": contenido_estadisticas('kmstotales', money=False),
         }
         ]
 